@@ -9,8 +9,15 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
 
-from app.services.rag_pipeline import answer_question
+from app.core.config import INGEST_WAIT_S
+from app.models.chat import RetrievalOptions
+from app.services.rag_pipeline import (
+    answer_question_async,
+    stream_answer_question,
+)
+from app.services.ingest_jobs import ingest_jobs
 from app.state.document_store import document_store
+from app.utils.helpers import sse_response
 
 router = APIRouter()
 
@@ -19,13 +26,18 @@ class ChatRequest(BaseModel):
     session_id: str
     question: str
     documents: Optional[List[str]] = None
+    retrieval: Optional[RetrievalOptions] = None
 
 
-@router.post("/")
-def chat(request: ChatRequest):
-    """
-    Answers questions using only session documents.
-    """
+async def _session_chunks(request: ChatRequest) -> list[dict]:
+    # Answer from fully indexed documents: wait (bounded) for background
+    # ingestion
+    if not await ingest_jobs.wait_for_session(
+        request.session_id, INGEST_WAIT_S
+    ):
+        raise HTTPException(
+            409, "Documents for this session are still being indexed"
+        )
 
     if request.documents:
         chunks = document_store.get_documents(
@@ -39,8 +51,42 @@ def chat(request: ChatRequest):
             400, "No documents available for this session"
         )
 
-    return answer_question(
+    return chunks
+
+
+@router.post("/")
+async def chat(request: ChatRequest):
+    """
+    Answers questions using only session documents.
+    """
+
+    chunks = await _session_chunks(request)
+
+    return await answer_question_async(
         session_id=request.session_id,
         question=request.question,
         all_chunks=chunks,
+        documents=request.documents,
+        retrieval=request.retrieval,
+    )
+
+
+@router.post("/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    /chat/ as Server-Sent Events: "token" events while the answer is
+    generated, then a final "citations" event.
+    """
+
+    chunks = await _session_chunks(request)
+
+    return sse_response(
+        stream_answer_question(
+            session_id=request.session_id,
+            question=request.question,
+            all_chunks=chunks,
+            documents=request.documents,
+            retrieval=request.retrieval,
+        ),
+        error_detail="Failed to answer question",
     )
@@ -1,7 +1,43 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services.embeddings import embedding_service
+from app.services.query_rewriter import rewrite_stats
+from app.services.warmup import warmup
+from app.state.answer_cache import answer_cache
+from app.state.document_registry import document_registry
+from app.state.embedding_cache import embedding_cache
+from app.state.retriever_cache import retriever_cache
+from app.state.summary_cache import summary_cache
 
 router = APIRouter()
 
 @router.get("/")
 def health_check():
+    """
+    Liveness: the process is up (never waits on models or clients).
+    """
     return {"status": "ok"}
+
+
+@router.get("/ready")
+def readiness_check():
+    """
+    Readiness: 200 once the embedding model and vector store are loaded.
+    """
+
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@router.get("/cache")
+def cache_stats():
+    return {
+        "retriever": retriever_cache.stats(),
+        "embeddings": embedding_cache.stats(),
+        "embedding_service": embedding_service.stats(),
+        "documents": document_registry.stats(),
+        "query_rewrite": rewrite_stats.stats(),
+        "answers": answer_cache.stats(),
+        "summaries": summary_cache.stats(),
+    }
@@ -3,19 +3,23 @@
 from fastapi import APIRouter, HTTPException
 from loguru import logger
 
+from app.core.config import INGEST_WAIT_S
 from app.state.document_store import document_store
-from app.services.answer_generator import generate_answer
-from app.services.citation import build_citations
-from app.services.retriever import HybridRetriever
+from app.services.ingest_jobs import ingest_jobs
+from app.services.summarizer import summarizer
+from app.utils.helpers import sse_response
 
 router = APIRouter()
 
 
-@router.post("/upload")
-async def summarize_uploaded_documents(session_id: str):
-    """
-    Multi-level, citation-grounded document summarization.
-    """
+async def _session_chunks(session_id: str) -> list[dict]:
+    # A summary must cover whole documents: wait (bounded) for background
+    # ingestion
+    if not await ingest_jobs.wait_for_session(session_id, INGEST_WAIT_S):
+        raise HTTPException(
+            status_code=409,
+            detail="Documents for this session are still being indexed",
+        )
 
     all_chunks = document_store.get_all_chunks(session_id)
 
@@ -25,58 +29,37 @@ async def summarize_uploaded_documents(session_id: str):
             detail="No documents uploaded for this session",
         )
 
-    # 🔥 Multi-level summarization prompt
-    summary_prompt = """
-You are an expert technical analyst. Your task is to provide a multi-level
-summary of the provided document chunks.
+    return all_chunks
 
-Structure your response as follows:
 
-Executive Summary:
-- A high-level 3-sentence overview for stakeholders.
+def _document_count(all_chunks: list[dict]) -> int:
+    return len({c["source_file"] for c in all_chunks})
 
-Key Technical Pillars:
-- Identify the 3–5 main themes or arguments.
 
-Deep-Dive Analysis:
-- One detailed paragraph per pillar.
+@router.post("/upload")
+async def summarize_uploaded_documents(session_id: str):
+    """
+    Multi-level, citation-grounded document summarization.
 
-Data & Evidence:
-- Specific metrics, dates, certifications, IDs, clauses.
+    Map-reduce over every section of every document; per-document
+    summaries are cached by content hash (usually precomputed at ingest).
+    """
 
-STRICT RULES:
-- Use ONLY the provided context.
-- Every factual sentence MUST end with a citation like [Source X].
-- If data is missing, say "Information not available in provided documents."
-- Maintain a professional, objective tone.
-"""
+    all_chunks = await _session_chunks(session_id)
 
     try:
-        # 🔍 Retrieve representative chunks (critical)
-        retriever = HybridRetriever(all_chunks)
-        representative_chunks = retriever.search(
-            query="document summary main topics technical details evidence",
-            top_k=15,
+        summary = await summarizer.summarize_session(
+            all_chunks, document_store.document_hashes(session_id)
         )
 
         logger.info(
-            f"[{session_id}] Summarizing {len(representative_chunks)} chunks"
+            f"[{session_id}] Summary with {len(summary['citations'])} sources"
         )
 
-        summary = generate_answer(
-            prompt=summary_prompt,
-            evidence_chunks=representative_chunks,
-            mode="summary",
-        )
-
-        citations = build_citations(representative_chunks)
-
         return {
-            "summary": summary,
-            "citations": citations,
-            "document_count": len(
-                {c["source_file"] for c in all_chunks}
-            ),
+            "summary": summary["summary"],
+            "citations": summary["citations"],
+            "document_count": _document_count(all_chunks),
         }
 
     except Exception:
@@ -85,3 +68,27 @@ STRICT RULES:
             status_code=500,
             detail="Failed to generate summary",
         )
+
+
+@router.post("/upload/stream")
+async def stream_summarize_uploaded_documents(session_id: str):
+    """
+    /summarize/upload as Server-Sent Events: "token" events while the
+    final reduce call is generated (one event for a cached summary),
+    then a final "citations" event (with document_count), or an "error"
+    event.
+    """
+
+    all_chunks = await _session_chunks(session_id)
+    doc_hashes = document_store.document_hashes(session_id)
+
+    async def events():
+        async for text in summarizer.stream_session(all_chunks, doc_hashes):
+            yield "token", {"text": text}
+
+        yield "citations", {
+            "citations": summarizer.session_citations(all_chunks, doc_hashes),
+            "document_count": _document_count(all_chunks),
+        }
+
+    return sse_response(events(), error_detail="Failed to generate summary")
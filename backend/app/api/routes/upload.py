@@ -1,14 +1,16 @@
 # backend/app/routes/upload.py
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Response
+import asyncio
+import hashlib
 import os
 import uuid
-import shutil
+from typing import Optional
 from loguru import logger
 
-from app.services.pdf_loader import load_pdf
-from app.services.chunker import chunk_pages
-from app.services.indexer import index_chunks
+from app.services.ingest_jobs import ingest_jobs
+from app.services.pdf_loader import ENGINES
+from app.state.document_registry import document_registry
 from app.state.document_store import document_store
 
 router = APIRouter()
@@ -16,24 +18,63 @@ router = APIRouter()
 UPLOAD_DIR = "uploaded_docs"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+
+async def _save_upload(file: UploadFile, file_path: str) -> str:
+    """
+    Streams an upload to disk and returns the SHA-256 of its bytes.
+    """
+
+    digest = hashlib.sha256()
+
+    with open(file_path, "wb") as f:
+        while True:
+            block = await file.read(STREAM_BLOCK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+            f.write(block)
+
+    return digest.hexdigest()
+
 
 @router.post("/upload")  # ✅ FIXED: NO trailing slash
 async def upload_documents(
+    response: Response,
     session_id: str,
-    files: list[UploadFile] = File(...)
+    files: list[UploadFile] = File(...),
+    engine: Optional[str] = None,
+    wait: bool = True,
 ):
     """
-    Uploads multiple PDFs, processes them, and indexes them.
+    Uploads multiple PDFs and indexes them in the background job pool.
     Session-safe.
+
+    engine: optional PDF extraction engine override (auto | pypdf | pdfplumber).
+    wait: block until the ingestion job finishes (default). With
+    wait=false the response is 202 and /upload/jobs/{job_id} reports
+    progress.
     """
 
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
 
-    # Clear old session data
-    document_store.clear_session(session_id)
+    if engine is not None and engine not in ENGINES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid extraction engine: {engine}",
+        )
+
+    # Stop in-flight ingestion for this session, then clear old data
+    ingest_jobs.cancel_session(session_id)
+    generation = document_store.clear_session(session_id)
 
     processed_files = []
+    dedup_hits = 0
+    # doc hash -> source file it is attached (or being ingested) as
+    attached: dict[str, str] = {}
+    pending: list[dict] = []
 
     for file in files:
         if not file.filename.lower().endswith(".pdf"):
@@ -45,21 +86,125 @@ async def upload_documents(
         safe_name = f"{uuid.uuid4()}-{file.filename}"
         file_path = os.path.join(UPLOAD_DIR, safe_name)
 
-        with open(file_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
-
-        pages = load_pdf(file_path)
-        chunks = chunk_pages(pages)
-
-        index_chunks(chunks)
-        document_store.add_chunks(session_id, chunks)
+        doc_hash = await _save_upload(file, file_path)
+
+        duplicate = attached.get(doc_hash)
+        if duplicate is not None:
+            # The same bytes twice in one upload: one copy is enough
+            os.remove(file_path)
+            dedup_hits += 1
+            processed_files.append(duplicate)
+            continue
+
+        known = document_registry.get(doc_hash)
+        if known is not None:
+            # Byte-identical to an already-processed PDF: reuse its
+            # chunks and vectors instead of parsing and indexing again
+            os.remove(file_path)
+            dedup_hits += 1
+
+            document_store.add_chunks(
+                session_id,
+                known["chunks"],
+                known["vectors"],
+                generation,
+                doc_hash=doc_hash,
+            )
+            attached[doc_hash] = known["source_file"]
 
-        processed_files.append(safe_name)
-        logger.info(f"[{session_id}] Processed {safe_name}")
+            processed_files.append(known["source_file"])
+            logger.info(
+                f"[{session_id}] Dedup hit for {file.filename} "
+                f"-> {known['source_file']}"
+            )
+            continue
+
+        pending.append(
+            {
+                "filename": file.filename,
+                "source_file": safe_name,
+                "file_path": file_path,
+                "doc_hash": doc_hash,
+            }
+        )
+        attached[doc_hash] = safe_name
+
+    # Parsing, embedding and upserting run in the background job pool;
+    # the event loop stays free for chat on already-indexed documents
+    job = (
+        ingest_jobs.submit(session_id, pending, engine, generation)
+        if pending
+        else None
+    )
+
+    failed = []
+    processed_files.extend(spec["source_file"] for spec in pending)
+
+    if job is not None:
+        if wait:
+            try:
+                await asyncio.wrap_future(job.future)
+            except asyncio.CancelledError:
+                if not job.future.cancelled():
+                    raise
+                # Still queued when a newer upload cancelled it
+
+            if job.status == "cancelled":
+                raise HTTPException(
+                    status_code=409,
+                    detail="Upload superseded by a newer upload for this session",
+                )
+
+            failed = [p for p in job.progress if p.status == "failed"]
+            if failed and len(failed) == len(job.progress):
+                raise HTTPException(status_code=500, detail=job.error)
+
+            # Partial failure: report the failed files, keep the rest
+            failed_files = {p.source_file for p in failed}
+            processed_files = [
+                f for f in processed_files if f not in failed_files
+            ]
+        else:
+            response.status_code = 202
 
     return {
-        "message": "Documents uploaded and indexed successfully",
+        "message": (
+            "Some documents failed to index"
+            if failed
+            else "Documents uploaded and indexed successfully"
+            if job is None or job.done
+            else "Documents uploaded, indexing in background"
+        ),
         "files": processed_files,
         "document_count": len(processed_files),
+        "failed": [
+            {"filename": p.filename, "error": p.error} for p in failed
+        ],
+        "dedup_hits": dedup_hits,
+        "session_id": session_id,
+        "job": job.to_dict() if job is not None else None,
+        "status_url": (
+            f"/upload/jobs/{job.job_id}" if job is not None else None
+        ),
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    """
+    Per-file, per-stage progress of a background ingestion job.
+    """
+
+    job = ingest_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+
+    return job.to_dict()
+
+
+@router.get("/jobs")
+async def list_ingest_jobs(session_id: str):
+    return {
         "session_id": session_id,
+        "jobs": [job.to_dict() for job in ingest_jobs.list_session(session_id)],
     }
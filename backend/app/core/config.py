@@ -8,17 +8,117 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+BACKEND_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+# =========================
+# Local data
+# =========================
+# Embedding cache and local vector index; anchored to the backend, not
+# to the directory the server happens to be started from
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(BACKEND_ROOT, "data"))
+
 # =========================
 # Groq LLM
 # =========================
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+# Optional API endpoint override (proxies, local stubs); "" -> Groq default
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "")
+
+# Shared keep-alive HTTP pool for every LLM call
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "20"))
+LLM_KEEPALIVE_S = float(os.getenv("LLM_KEEPALIVE_S", "60"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "60"))
+LLM_CONNECT_TIMEOUT_S = float(os.getenv("LLM_CONNECT_TIMEOUT_S", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+# Evidence tokens packed into a prompt; per-model overrides as
+# "model=tokens,model=tokens"
+LLM_CONTEXT_BUDGET = int(os.getenv("LLM_CONTEXT_BUDGET", "3000"))
+LLM_CONTEXT_BUDGETS = os.getenv("LLM_CONTEXT_BUDGETS", "")
+# tiktoken encoding used to count context tokens
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "cl100k_base")
+# Word-set Jaccard similarity above which evidence blocks are duplicates
+CONTEXT_DEDUP_THRESHOLD = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", "0.85"))
+# Missing keys fail on first use (see llm.py / pinecone_client.py), not
+# at import, so /health answers while secrets are being configured
+
+# =========================
+# Embeddings
+# =========================
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# torch (fp32) | torch-int8 (dynamic quantization) | onnx (ONNX Runtime)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Optional ONNX file inside the model repo, e.g. a quantized export:
+# onnx/model_qint8_avx512_vnni.onnx ("" -> onnx/model.onnx)
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "")
+# SQLite file for the persistent embedding cache ("" disables the disk tier)
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH", os.path.join(DATA_DIR, "cache", "embeddings.sqlite3")
+)
+EMBEDDING_CACHE_MEMORY_ITEMS = int(
+    os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "50000")
+)
+# Micro-batching: concurrent encode requests arriving within the window
+# (or until EMBEDDING_MAX_BATCH texts) share one forward pass
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "64"))
+# Padded tokens (texts x longest text) per forward pass
+EMBEDDING_TOKEN_BUDGET = int(os.getenv("EMBEDDING_TOKEN_BUDGET", "8192"))
 
-if not GROQ_API_KEY:
-    raise RuntimeError(
-        "GROQ_API_KEY is not set. "
-        "Add it to HF Spaces Secrets or .env file"
-    )
+# =========================
+# Ingestion
+# =========================
+# Byte-identical uploads kept for O(1) re-attachment
+DOCUMENT_REGISTRY_MAX_DOCS = int(os.getenv("DOCUMENT_REGISTRY_MAX_DOCS", "256"))
+
+# Page-sharded PDF extraction (workers <= 1 keeps the serial path)
+PDF_EXTRACT_WORKERS = int(
+    os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+# auto (pypdf + pdfplumber fallback) | pypdf | pdfplumber
+PDF_EXTRACT_ENGINE = os.getenv("PDF_EXTRACT_ENGINE", "auto")
+
+# Streaming ingestion: chunks per embed/upsert batch, and how many
+# batches extraction may run ahead of embedding
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "50"))
+INGEST_QUEUE_BATCHES = int(os.getenv("INGEST_QUEUE_BATCHES", "4"))
+
+# Multi-file uploads: PDFs extracted at once, texts per shared encode
+# call, and concurrent vector store upserts
+INGEST_CONCURRENT_FILES = int(os.getenv("INGEST_CONCURRENT_FILES", "4"))
+INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "256"))
+INGEST_UPSERT_WORKERS = int(os.getenv("INGEST_UPSERT_WORKERS", "4"))
+
+# Background upload jobs: concurrent ingestion threads and how many
+# finished jobs stay pollable
+INGEST_JOB_WORKERS = int(os.getenv("INGEST_JOB_WORKERS", "2"))
+INGEST_JOB_HISTORY = int(os.getenv("INGEST_JOB_HISTORY", "200"))
+# How long /chat and /summarize wait for a session that is still being
+# indexed before answering 409
+INGEST_WAIT_S = float(os.getenv("INGEST_WAIT_S", "30"))
+
+# =========================
+# Vector store
+# =========================
+# pinecone | local (on-disk IVF-flat, no network)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone")
+LOCAL_VECTOR_STORE_DIR = os.getenv(
+    "LOCAL_VECTOR_STORE_DIR", os.path.join(DATA_DIR, "vector_store")
+)
+# Local store persists deltas; it rewrites a compacted snapshot once
+# deleted / overwritten vectors exceed this fraction of its rows
+LOCAL_VECTOR_STORE_COMPACT_RATIO = float(
+    os.getenv("LOCAL_VECTOR_STORE_COMPACT_RATIO", "0.25")
+)
+
+# IVF-flat tuning (local store and large in-session dense search)
+ANN_NLIST = int(os.getenv("ANN_NLIST", "0"))  # 0 -> ~4*sqrt(n)
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "8"))
+ANN_TRAIN_THRESHOLD = int(os.getenv("ANN_TRAIN_THRESHOLD", "20000"))
 
 # =========================
 # Pinecone
@@ -27,11 +127,62 @@ PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENV = os.getenv("PINECONE_ENV", "us-east-1-aws")
 PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "document-rag")
 
-if not PINECONE_API_KEY:
-    raise RuntimeError(
-        "PINECONE_API_KEY is not set. "
-        "Add it to HF Spaces Secrets or .env file"
-    )
+# =========================
+# Query rewriting
+# =========================
+# Skip the rewrite LLM call when a follow-up is already standalone
+QUERY_REWRITE_BYPASS = os.getenv("QUERY_REWRITE_BYPASS", "true").lower() == "true"
+# Retrieve with the raw question while the rewrite runs; the result is
+# used if the rewrite leaves the question unchanged
+QUERY_REWRITE_SPECULATIVE = (
+    os.getenv("QUERY_REWRITE_SPECULATIVE", "false").lower() == "true"
+)
+
+# =========================
+# Retrieval
+# =========================
+RETRIEVER_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVER_CACHE_MAX_ENTRIES", "32"))
+RETRIEVER_CACHE_MAX_BYTES = int(
+    os.getenv("RETRIEVER_CACHE_MAX_BYTES", str(512 * 1024 * 1024))
+)
+
+# Hybrid fusion defaults (overridable per request)
+RETRIEVAL_FUSION = os.getenv("RETRIEVAL_FUSION", "rrf")  # rrf | weighted
+RETRIEVAL_DENSE_WEIGHT = float(os.getenv("RETRIEVAL_DENSE_WEIGHT", "1.0"))
+RETRIEVAL_SPARSE_WEIGHT = float(os.getenv("RETRIEVAL_SPARSE_WEIGHT", "1.0"))
+RETRIEVAL_RRF_K = int(os.getenv("RETRIEVAL_RRF_K", "60"))
+
+# Executor threads for retrieval work of async routes
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "8"))
+
+# =========================
+# Answer cache
+# =========================
+# Answers keyed by (document-set fingerprint, normalized standalone query)
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1024"))
+ANSWER_CACHE_TTL_S = float(os.getenv("ANSWER_CACHE_TTL_S", "3600"))
+# Cosine similarity for paraphrase hits (0 -> exact matches only)
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0"))
+
+# =========================
+# Summaries
+# =========================
+# Map-reduce document summaries, cached per document hash
+SUMMARY_SECTION_CHARS = int(os.getenv("SUMMARY_SECTION_CHARS", "6000"))
+SUMMARY_REDUCE_FANIN = int(os.getenv("SUMMARY_REDUCE_FANIN", "8"))
+# Section / merge LLM calls in flight at once (Groq rate limits)
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "512"))
+# Summarize each document in the background once it is ingested (off:
+# the first /summarize request computes it, sparing the chat rate limit)
+SUMMARY_ON_INGEST = os.getenv("SUMMARY_ON_INGEST", "false").lower() == "true"
+
+# =========================
+# Startup
+# =========================
+# Load the embedding model and vector store in the background at startup
+# (/health/ready turns 200 once done); off -> load on first use
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
 
 # =========================
 # Backend URL (for CORS)
@@ -0,0 +1,294 @@
+"""
+ivf_index.py
+
+Why:
+-----
+Brute-force cosine search is fine for a few thousand chunks but
+multi-document sessions reach hundreds of thousands.
+
+How:
+-----
+- IVF-flat: spherical k-means centroids partition the rows into lists
+- A query scans only the `nprobe` closest lists (recall/latency knob)
+- Exact brute-force search until `train_threshold` rows exist, and
+  for masked searches selecting fewer rows than that
+- Incremental insertion assigns new rows to their nearest centroid;
+  centroids are retrained when the index grows `retrain_growth`-fold
+- Persists to a directory of .npy files
+"""
+
+import json
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from app.services.dense_index import DenseIndex
+
+
+def _spherical_kmeans(
+    data: np.ndarray,
+    k: int,
+    iterations: int,
+    seed: int,
+) -> np.ndarray:
+    """
+    Lloyd's k-means on unit vectors with cosine assignment.
+    """
+
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+
+    for _ in range(iterations):
+        assign = np.argmax(data @ centroids.T, axis=1)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        counts = np.bincount(assign, minlength=k)
+
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty clusters with random points
+            sums[empty] = data[rng.choice(len(data), size=int(empty.sum()))]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+
+    return centroids
+
+
+class IVFFlatIndex(DenseIndex):
+    """
+    Inverted-file index over a contiguous float32 matrix.
+
+    Row ids, add/clear_rows semantics and search() output match
+    DenseIndex, so it can be swapped in transparently.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        capacity: int = 1024,
+        nlist: int = 0,
+        nprobe: int = 8,
+        train_threshold: int = 20_000,
+        retrain_growth: float = 4.0,
+        kmeans_iterations: int = 10,
+        max_train_points: int = 100_000,
+        seed: int = 0,
+    ) -> None:
+        super().__init__(dim, capacity)
+
+        self.nlist = nlist  # 0 -> ~4 * sqrt(n) at training time
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.retrain_growth = retrain_growth
+        self.kmeans_iterations = kmeans_iterations
+        self.max_train_points = max_train_points
+        self.seed = seed
+
+        self.centroids: Optional[np.ndarray] = None
+        # row id -> list id (-1 while untrained)
+        self._assign = np.full(max(capacity, 1), -1, dtype=np.int32)
+        # list id -> row ids, rebuilt lazily from _assign
+        self._lists: Optional[List[np.ndarray]] = None
+        self._trained_size = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    # -----------------------------
+    # Build
+    # -----------------------------
+    def add(self, vectors: np.ndarray) -> None:
+        start = len(self)
+        super().add(vectors)
+
+        if len(self._assign) < len(self._matrix):
+            grown = np.full(len(self._matrix), -1, dtype=np.int32)
+            grown[: len(self._assign)] = self._assign
+            self._assign = grown
+
+        if not self.is_trained:
+            if len(self) >= self.train_threshold:
+                self.train()
+        elif len(self) >= self._trained_size * self.retrain_growth:
+            self.train()
+        else:
+            rows = self.matrix[start:]
+            self._assign[start : len(self)] = np.argmax(
+                rows @ self.centroids.T, axis=1
+            )
+            self._lists = None
+
+    def train(self) -> None:
+        """
+        (Re)compute centroids and reassign every row.
+        """
+
+        n = len(self)
+        if n == 0:
+            return
+
+        nlist = self.nlist or int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+
+        rng = np.random.default_rng(self.seed)
+        sample = self.matrix
+        if n > self.max_train_points:
+            sample = sample[rng.choice(n, self.max_train_points, replace=False)]
+
+        self.centroids = _spherical_kmeans(
+            sample, nlist, self.kmeans_iterations, self.seed
+        )
+        self._reassign_all()
+        self._trained_size = n
+
+        logger.info(f"IVF index trained: {n} vectors, {nlist} lists")
+
+    def compacted(self, rows) -> "IVFFlatIndex":
+        """
+        Copy holding only `rows` (renumbered in the given order); keeps
+        the trained centroids and row assignments.
+        """
+
+        rows = np.asarray(rows, dtype=np.int64)
+        index = IVFFlatIndex(
+            self.dim,
+            capacity=max(len(rows), 1),
+            nlist=self.nlist,
+            nprobe=self.nprobe,
+            train_threshold=self.train_threshold,
+            retrain_growth=self.retrain_growth,
+            kmeans_iterations=self.kmeans_iterations,
+            max_train_points=self.max_train_points,
+            seed=self.seed,
+        )
+        index._matrix[: len(rows)] = self._matrix[rows]
+        index._assign[: len(rows)] = self._assign[rows]
+        index._size = len(rows)
+        index.centroids = self.centroids
+        index._trained_size = self._trained_size
+        return index
+
+    def _reassign_all(self, batch: int = 65_536) -> None:
+        for i in range(0, len(self), batch):
+            rows = self.matrix[i : i + batch]
+            self._assign[i : i + len(rows)] = np.argmax(
+                rows @ self.centroids.T, axis=1
+            )
+        self._lists = None
+
+    def _inverted_lists(self) -> List[np.ndarray]:
+        if self._lists is None:
+            assign = self._assign[: len(self)]
+            order = np.argsort(assign, kind="stable")
+            bounds = np.searchsorted(
+                assign[order], np.arange(len(self.centroids) + 1)
+            )
+            self._lists = [
+                order[bounds[i] : bounds[i + 1]]
+                for i in range(len(self.centroids))
+            ]
+        return self._lists
+
+    # -----------------------------
+    # Query
+    # -----------------------------
+    def search(
+        self,
+        query_vector: np.ndarray,
+        k: int,
+        nprobe: Optional[int] = None,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.is_trained:
+            return super().search(query_vector, k, mask)
+
+        if (
+            mask is not None
+            and np.count_nonzero(mask[: len(self)]) < self.train_threshold
+        ):
+            # A small document subset is cheaper (and exact) to scan
+            return super().search(query_vector, k, mask)
+
+        if not len(self) or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        query = np.asarray(query_vector, dtype=np.float32).reshape(self.dim)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        nprobe = max(1, min(nprobe or self.nprobe, len(self.centroids)))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(centroid_scores, -nprobe)[-nprobe:]
+
+        lists = self._inverted_lists()
+        candidates = np.concatenate([lists[i] for i in probe])
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        if not len(candidates):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = self._matrix[candidates] @ query
+
+        if len(scores) > k:
+            best = np.argpartition(scores, -k)[-k:]
+        else:
+            best = np.arange(len(scores))
+
+        order = best[np.argsort(scores[best])[::-1]]
+        return candidates[order].astype(np.int64), scores[order]
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+
+        np.save(os.path.join(directory, "vectors.npy"), self.matrix)
+        np.save(
+            os.path.join(directory, "assign.npy"), self._assign[: len(self)]
+        )
+        if self.is_trained:
+            np.save(os.path.join(directory, "centroids.npy"), self.centroids)
+
+        params = {
+            "dim": self.dim,
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "train_threshold": self.train_threshold,
+            "retrain_growth": self.retrain_growth,
+            "trained_size": self._trained_size,
+        }
+        with open(os.path.join(directory, "ivf.json"), "w") as f:
+            json.dump(params, f)
+
+    @classmethod
+    def load(cls, directory: str, **overrides) -> "IVFFlatIndex":
+        with open(os.path.join(directory, "ivf.json")) as f:
+            params = json.load(f)
+
+        trained_size = params.pop("trained_size")
+        params.update(overrides)
+
+        vectors = np.load(os.path.join(directory, "vectors.npy"))
+        index = cls(capacity=max(len(vectors), 1), **params)
+
+        # Restore rows verbatim (they were normalized on first insert)
+        index._matrix[: len(vectors)] = vectors
+        index._size = len(vectors)
+        index._assign[: len(vectors)] = np.load(
+            os.path.join(directory, "assign.npy")
+        )
+
+        centroids_path = os.path.join(directory, "centroids.npy")
+        if os.path.exists(centroids_path):
+            index.centroids = np.load(centroids_path)
+            index._trained_size = trained_size
+
+        return index
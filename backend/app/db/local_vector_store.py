@@ -0,0 +1,328 @@
+"""
+local_vector_store.py
+
+On-disk VectorStore backed by an IVF-flat index.
+No network, no managed service: used for dev/CI and air-gapped runs.
+
+Persistence:
+- A snapshot (IVF index files + records.json) plus an append-only log
+  of deltas: each persist writes only the rows added since the last
+  one (one .npy shard) and the rows retired since then
+- Once the log outgrows the snapshot, or retired rows exceed
+  `compact_ratio` of all rows, persist compacts: retired rows are
+  dropped and a new snapshot generation replaces the old files
+"""
+
+import json
+import os
+import re
+import shutil
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from app.db.ivf_index import IVFFlatIndex
+from app.db.vector_store import VectorRecord, VectorStore
+
+RECORDS_FILE = "records.json"
+
+# Files of a snapshot generation: its index directory, delta log, shards
+_GENERATION_FILE = re.compile(r"^(?:snapshot|deltas|delta)-(\d+)")
+# Index files of the original single-snapshot layout (generation 0,
+# stored directly in the store directory)
+_LEGACY_FILES = ("vectors.npy", "assign.npy", "centroids.npy", "ivf.json")
+
+
+class LocalVectorStore(VectorStore):
+    def __init__(
+        self,
+        directory: str,
+        dim: int = 384,
+        nlist: int = 0,
+        nprobe: int = 8,
+        train_threshold: int = 20_000,
+        compact_ratio: float = 0.25,
+    ) -> None:
+        self.directory = directory
+        self.compact_ratio = compact_ratio
+        self._lock = threading.Lock()
+
+        # row id -> vector id (None once deleted)
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._metadata: Dict[str, Dict] = {}
+
+        # On-disk state: snapshot generation and size, rows already
+        # written (snapshot + deltas), persisted rows retired since
+        self._generation = 0
+        self._snapshot_rows = 0
+        self._persisted = 0
+        self._retired: List[int] = []
+        self._deltas = 0
+        self._dead = 0
+
+        records_path = os.path.join(directory, RECORDS_FILE)
+        if os.path.exists(records_path):
+            self._load(records_path, nprobe)
+            logger.info(
+                f"Loaded local vector store: {len(self._rows)} vectors "
+                f"({self._deltas} deltas)"
+            )
+        else:
+            self._index = IVFFlatIndex(
+                dim,
+                nlist=nlist,
+                nprobe=nprobe,
+                train_threshold=train_threshold,
+            )
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def upsert(self, vectors: List[VectorRecord]) -> None:
+        if not vectors:
+            return
+
+        with self._lock:
+            # Overwrites retire the old row and append a fresh one
+            self._retire([vid for vid, _, _ in vectors])
+
+            start = len(self._ids)
+            self._index.add(np.asarray([v for _, v, _ in vectors]))
+
+            for offset, (vid, _, metadata) in enumerate(vectors):
+                self._ids.append(vid)
+                self._rows[vid] = start + offset
+                self._metadata[vid] = dict(metadata or {})
+
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        include_metadata: bool = True,
+        nprobe: Optional[int] = None,
+    ) -> List[Dict]:
+        with self._lock:
+            # Over-fetch a little so retired rows do not shrink results
+            rows, scores = self._index.search(
+                np.asarray(vector), top_k * 2, nprobe=nprobe
+            )
+
+            matches: List[Dict] = []
+            for row, score in zip(rows, scores):
+                vid = self._ids[row]
+                if vid is None:
+                    continue
+                matches.append(
+                    {
+                        "id": vid,
+                        "score": float(score),
+                        "metadata": (
+                            self._metadata.get(vid, {})
+                            if include_metadata
+                            else {}
+                        ),
+                    }
+                )
+                if len(matches) == top_k:
+                    break
+
+            return matches
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            self._retire(ids)
+
+    def _retire(self, ids: List[str]) -> None:
+        rows = []
+        for vid in ids:
+            row = self._rows.pop(vid, None)
+            if row is not None:
+                self._ids[row] = None
+                self._metadata.pop(vid, None)
+                rows.append(row)
+                if row < self._persisted:
+                    self._retired.append(row)
+        if rows:
+            self._index.clear_rows(rows)
+            self._dead += len(rows)
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def persist(self) -> None:
+        with self._lock:
+            if self._persisted == len(self._ids) and not self._retired:
+                return
+
+            os.makedirs(self.directory, exist_ok=True)
+
+            if (
+                len(self._ids) - self._snapshot_rows > self._snapshot_rows
+                or self._dead > self.compact_ratio * len(self._ids)
+            ):
+                self._compact()
+            else:
+                self._append_delta()
+
+    def _append_delta(self) -> None:
+        start = self._persisted
+        seq = self._deltas + 1
+
+        shard = None
+        if len(self._ids) > start:
+            shard = f"delta-{self._generation:06d}-{seq:06d}.npy"
+            np.save(
+                os.path.join(self.directory, shard),
+                self._index.matrix[start:],
+            )
+
+        ids = self._ids[start:]
+        entry = {
+            "shard": shard,
+            "start": start,
+            "ids": ids,
+            "metadata": {
+                vid: self._metadata[vid] for vid in ids if vid is not None
+            },
+            "retired": self._retired,
+        }
+
+        # The shard is complete before the log line that references it
+        with open(self._log_path(self._generation), "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._deltas = seq
+        self._persisted = len(self._ids)
+        self._retired = []
+
+    def _compact(self) -> None:
+        live = [row for row, vid in enumerate(self._ids) if vid is not None]
+        if len(live) < len(self._ids):
+            self._index = self._index.compacted(live)
+            self._ids = [self._ids[row] for row in live]
+            self._rows = {vid: row for row, vid in enumerate(self._ids)}
+            self._dead = 0
+
+        generation = self._generation + 1
+        snapshot = f"snapshot-{generation:06d}"
+        self._index.save(os.path.join(self.directory, snapshot))
+
+        # records.json switches generations atomically; files of the
+        # old one are only removed afterwards
+        tmp_path = os.path.join(self.directory, RECORDS_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "generation": generation,
+                    "snapshot": snapshot,
+                    "ids": self._ids,
+                    "metadata": self._metadata,
+                },
+                f,
+            )
+        os.replace(tmp_path, os.path.join(self.directory, RECORDS_FILE))
+
+        self._generation = generation
+        self._snapshot_rows = self._persisted = len(self._ids)
+        self._retired = []
+        self._deltas = 0
+        self._remove_stale()
+
+        logger.info(
+            f"Compacted local vector store: {len(self._ids)} vectors"
+        )
+
+    def _load(self, records_path: str, nprobe: int) -> None:
+        with open(records_path) as f:
+            records = json.load(f)
+
+        self._generation = records.get("generation", 0)
+        self._index = IVFFlatIndex.load(
+            os.path.join(self.directory, records.get("snapshot", "")),
+            nprobe=nprobe,
+        )
+        self._ids = records["ids"]
+        self._metadata = records["metadata"]
+        self._snapshot_rows = len(self._ids)
+
+        log_path = self._log_path(self._generation)
+        if os.path.exists(log_path):
+            valid = 0
+            with open(log_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n") or not self._replay(line):
+                        break
+                    valid += len(line)
+                    self._deltas += 1
+
+            if valid < os.path.getsize(log_path):
+                # Torn tail of a crashed persist: cut it, so later deltas
+                # are appended after the last complete one
+                logger.warning(
+                    f"Truncating local vector store log after "
+                    f"delta {self._deltas}"
+                )
+                os.truncate(log_path, valid)
+
+        self._rows = {
+            vid: row for row, vid in enumerate(self._ids) if vid is not None
+        }
+        self._metadata = {
+            vid: meta for vid, meta in self._metadata.items()
+            if vid in self._rows
+        }
+        self._dead = len(self._ids) - len(self._rows)
+        self._persisted = len(self._ids)
+
+    def _replay(self, line: bytes) -> bool:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return False
+        if entry["start"] != len(self._ids):
+            return False
+
+        if entry["shard"] is not None:
+            shard_path = os.path.join(self.directory, entry["shard"])
+            if not os.path.exists(shard_path):
+                return False
+            vectors = np.load(shard_path)
+            if len(vectors) != len(entry["ids"]):
+                return False
+            self._index.add(vectors)
+
+        self._ids.extend(entry["ids"])
+        self._metadata.update(entry["metadata"])
+
+        retired = entry["retired"]
+        if retired:
+            for row in retired:
+                self._ids[row] = None
+            self._index.clear_rows(retired)
+        return True
+
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"deltas-{generation:06d}.jsonl")
+
+    def _remove_stale(self) -> None:
+        for name in os.listdir(self.directory):
+            match = _GENERATION_FILE.match(name)
+            if match is None:
+                if name not in _LEGACY_FILES:
+                    continue
+            elif int(match.group(1)) == self._generation:
+                continue
+
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError:
+                logger.warning(f"Could not remove stale {path}")
@@ -1,4 +1,5 @@
-from pinecone import Pinecone, ServerlessSpec
+import threading
+
 from loguru import logger
 
 from app.core.config import (
@@ -7,7 +8,32 @@ from app.core.config import (
     PINECONE_INDEX_NAME,
 )
 
-pc = Pinecone(api_key=PINECONE_API_KEY)
+# Created on first use: importing this module stays cheap and works
+# without a key
+_pc = None
+_pc_lock = threading.Lock()
+
+
+def get_pinecone_client():
+    """
+    Returns the process-wide Pinecone client.
+    """
+
+    global _pc
+
+    with _pc_lock:
+        if _pc is None:
+            if not PINECONE_API_KEY:
+                raise RuntimeError(
+                    "PINECONE_API_KEY is not set. "
+                    "Add it to HF Spaces Secrets or .env file"
+                )
+
+            from pinecone import Pinecone
+
+            _pc = Pinecone(api_key=PINECONE_API_KEY)
+
+        return _pc
 
 
 def get_pinecone_index():
@@ -15,6 +41,10 @@ def get_pinecone_index():
     Initializes and returns a Pinecone index.
     """
 
+    from pinecone import ServerlessSpec
+
+    pc = get_pinecone_client()
+
     try:
         if PINECONE_INDEX_NAME not in pc.list_indexes().names():
             pc.create_index(
@@ -0,0 +1,128 @@
+"""
+vector_store.py
+
+Why:
+-----
+Indexing and retrieval should not be hard-wired to Pinecone:
+dev/CI and air-gapped deployments need the same path locally.
+
+How:
+-----
+- VectorStore interface (upsert / query / delete / persist)
+- PineconeVectorStore: thin wrapper over the managed index
+- LocalVectorStore (local_vector_store.py): on-disk IVF-flat
+- Backend chosen by VECTOR_STORE_BACKEND
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import (
+    ANN_NLIST,
+    ANN_NPROBE,
+    ANN_TRAIN_THRESHOLD,
+    LOCAL_VECTOR_STORE_COMPACT_RATIO,
+    LOCAL_VECTOR_STORE_DIR,
+    VECTOR_STORE_BACKEND,
+)
+
+# (id, values, metadata) - the Pinecone upsert tuple format
+VectorRecord = Tuple[str, Sequence[float], Dict]
+
+
+class VectorStore(ABC):
+    """
+    Minimal vector store contract used by the indexer.
+    """
+
+    @abstractmethod
+    def upsert(self, vectors: List[VectorRecord]) -> None:
+        ...
+
+    @abstractmethod
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        include_metadata: bool = True,
+    ) -> List[Dict]:
+        """
+        Returns matches as {"id", "score", "metadata"}, best first.
+        """
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        ...
+
+    def persist(self) -> None:
+        """
+        Flush to durable storage (no-op for managed backends).
+        """
+
+
+class PineconeVectorStore(VectorStore):
+    def __init__(self) -> None:
+        # Imported lazily so local deployments do not need Pinecone
+        from app.db.pinecone_client import get_pinecone_index
+
+        self._index = get_pinecone_index()
+
+    def upsert(self, vectors: List[VectorRecord]) -> None:
+        self._index.upsert(vectors=vectors)
+
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int,
+        include_metadata: bool = True,
+    ) -> List[Dict]:
+        result = self._index.query(
+            vector=list(vector),
+            top_k=top_k,
+            include_metadata=include_metadata,
+        )
+        return [
+            {
+                "id": m["id"],
+                "score": m["score"],
+                "metadata": m.get("metadata") or {},
+            }
+            for m in result["matches"]
+        ]
+
+    def delete(self, ids: List[str]) -> None:
+        self._index.delete(ids=ids)
+
+
+_store: Optional[VectorStore] = None
+_store_lock = threading.Lock()
+
+
+def get_vector_store() -> VectorStore:
+    """
+    Returns the process-wide vector store for the configured backend.
+    """
+
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            if VECTOR_STORE_BACKEND == "local":
+                from app.db.local_vector_store import LocalVectorStore
+
+                _store = LocalVectorStore(
+                    LOCAL_VECTOR_STORE_DIR,
+                    nlist=ANN_NLIST,
+                    nprobe=ANN_NPROBE,
+                    train_threshold=ANN_TRAIN_THRESHOLD,
+                    compact_ratio=LOCAL_VECTOR_STORE_COMPACT_RATIO,
+                )
+            elif VECTOR_STORE_BACKEND == "pinecone":
+                _store = PineconeVectorStore()
+            else:
+                raise RuntimeError(
+                    f"Unknown VECTOR_STORE_BACKEND: {VECTOR_STORE_BACKEND}"
+                )
+
+        return _store
@@ -4,11 +4,24 @@ FastAPI application entry point.
 Compatible with Hugging Face Spaces.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.router import api_router
 from app.core.logger import setup_logging
+from app.services.llm import close_llm_clients
+from app.services.warmup import warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Model / vector store load in the background: the server accepts
+    # requests (and answers /health) right away
+    warmup.start()
+    yield
+    await close_llm_clients()
 
 
 def create_app() -> FastAPI:
@@ -17,7 +30,8 @@ def create_app() -> FastAPI:
     app = FastAPI(
         title="AI Document RAG System",
         description="Production-grade RAG pipeline for document intelligence",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan,
     )
 
     # ✅ CORS is REQUIRED for browser uploads
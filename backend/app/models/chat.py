@@ -1,3 +1,17 @@
 """
 Pydantic models for chat requests/responses.
 """
+
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class RetrievalOptions(BaseModel):
+    """
+    Per-request hybrid retrieval tuning (None -> server defaults).
+    """
+
+    fusion: Optional[Literal["rrf", "weighted"]] = None
+    dense_weight: Optional[float] = Field(default=None, ge=0)
+    sparse_weight: Optional[float] = Field(default=None, ge=0)
@@ -5,48 +5,50 @@ Groq-based answer & summary generation.
 STRICTLY document-grounded with forced citations.
 """
 
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, NamedTuple, Optional
 from loguru import logger
 
 from langchain_core.messages import SystemMessage, HumanMessage
+from app.services.context_packer import (
+    context_budget,
+    pack_context,
+    render_context,
+)
 from app.services.llm import get_llm
 
 
-def generate_answer(
+NO_CONTENT = "No relevant content found in the uploaded documents."
+LLM_FAILED = "LLM failed while processing the document."
+
+
+class PackedPrompt(NamedTuple):
+    messages: list
+    # Context blocks as sent: blocks[i] is [Source i + 1]
+    blocks: List[Dict]
+
+
+def build_messages(
     prompt: str,
     evidence_chunks: List[Dict],
     mode: str = "qa",
-) -> str:
+) -> Optional[PackedPrompt]:
     """
-    Generate an answer or summary strictly from document evidence.
+    Source-labeled system + user messages and the context blocks they
+    cite (None if there is no evidence).
     """
 
     if not evidence_chunks:
-        return "No relevant content found in the uploaded documents."
+        return None
 
     # -----------------------------
-    # Source-labeled context
+    # Source-labeled context, packed into the model's token budget
     # -----------------------------
-    context_blocks: List[str] = []
+    blocks = pack_context(evidence_chunks, context_budget())
 
-    for idx, chunk in enumerate(evidence_chunks):
-        text = (
-            chunk.get("metadata", {}).get("text")
-            or chunk.get("text", "")
-        )
+    if not blocks:
+        return None
 
-        if text and text.strip():
-            context_blocks.append(
-                f"[Source {idx + 1}]\n{text.strip()}"
-            )
-
-    if not context_blocks:
-        return "No relevant content found in the uploaded documents."
-
-    max_blocks = 15 if mode == "qa" else 60
-    context = "\n\n".join(context_blocks[:max_blocks])
-
-    llm = get_llm()
+    context = render_context(blocks)
 
     # =============================
     # SUMMARY MODE
@@ -90,16 +92,86 @@ CONTEXT:
 """
         user_prompt = prompt
 
+    return PackedPrompt(
+        [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=user_prompt),
+        ],
+        blocks,
+    )
+
+
+def generate_answer(
+    prompt: str,
+    evidence_chunks: List[Dict],
+    mode: str = "qa",
+    packed: Optional[PackedPrompt] = None,
+) -> str:
+    """
+    Generate an answer or summary strictly from document evidence.
+
+    packed: the build_messages result, when the caller needs its blocks.
+    """
+
+    packed = packed or build_messages(prompt, evidence_chunks, mode)
+    if packed is None:
+        return NO_CONTENT
+
     try:
-        response = llm.invoke(
-            [
-                SystemMessage(content=system_prompt),
-                HumanMessage(content=user_prompt),
-            ]
-        )
+        response = get_llm().invoke(packed.messages)
+        return response.content.strip()
 
+    except Exception:
+        logger.exception("Groq LLM failed")
+        return LLM_FAILED
+
+
+async def generate_answer_async(
+    prompt: str,
+    evidence_chunks: List[Dict],
+    mode: str = "qa",
+    packed: Optional[PackedPrompt] = None,
+) -> str:
+    """
+    generate_answer without blocking the event loop (ainvoke).
+    """
+
+    packed = packed or build_messages(prompt, evidence_chunks, mode)
+    if packed is None:
+        return NO_CONTENT
+
+    try:
+        response = await get_llm().ainvoke(packed.messages)
         return response.content.strip()
 
     except Exception:
         logger.exception("Groq LLM failed")
-        return "LLM failed while processing the document."
+        return LLM_FAILED
+
+
+async def stream_answer(
+    prompt: str,
+    evidence_chunks: List[Dict],
+    mode: str = "qa",
+    packed: Optional[PackedPrompt] = None,
+) -> AsyncIterator[str]:
+    """
+    generate_answer as text deltas, yielded as the LLM produces them.
+    """
+
+    packed = packed or build_messages(prompt, evidence_chunks, mode)
+    if packed is None:
+        yield NO_CONTENT
+        return
+
+    streamed = False
+    try:
+        async for chunk in get_llm().astream(packed.messages):
+            if chunk.content:
+                streamed = True
+                yield chunk.content
+
+    except Exception:
+        logger.exception("Groq LLM stream failed")
+        # Tokens already sent cannot be taken back: append the notice
+        yield f"\n\n{LLM_FAILED}" if streamed else LLM_FAILED
@@ -0,0 +1,289 @@
+"""
+bm25_index.py
+
+Why:
+-----
+BM25Okapi must be refitted from scratch whenever the corpus changes,
+and its get_scores walks every document in Python for every query term.
+
+How:
+-----
+- Own postings lists, document frequencies and document lengths
+- Adding a document costs O(its tokens)
+- Removing a source_file subtracts only its statistics
+- Queries touch only the postings of their terms (NumPy-vectorized)
+- Top-k via argpartition instead of a full sort
+- Optional boolean doc-id mask restricts top-k to a document subset
+- Okapi scoring identical to rank_bm25.BM25Okapi (k1, b, epsilon)
+"""
+
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class BM25Index:
+    """
+    Incremental, append-only BM25 (Okapi) index.
+
+    Document ids are assigned sequentially and never reused; removed
+    documents keep their id but no longer contribute to statistics.
+    """
+
+    def __init__(
+        self,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+    ) -> None:
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+
+        # term -> term id
+        self._term_ids: Dict[str, int] = {}
+        # term id -> number of live documents containing it
+        self._df: List[int] = []
+        # term id -> {doc id: term frequency}
+        self._postings: List[Dict[int, int]] = []
+        # term id -> (doc ids, term frequencies), rebuilt lazily
+        self._posting_arrays: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+        # doc id -> token count (0 once removed); grown by doubling
+        self._doc_len = np.zeros(1024, dtype=np.float64)
+        self._num_ids = 0
+        # doc id -> unique term ids (None once removed)
+        self._doc_terms: List[Optional[array]] = []
+        # source_file -> doc ids
+        self._source_docs: Dict[str, List[int]] = {}
+
+        self._live = 0
+        self._total_len = 0
+
+        # term id -> idf, lazily recomputed after every mutation
+        self._idf: Optional[np.ndarray] = None
+
+    # -----------------------------
+    # Statistics
+    # -----------------------------
+    @property
+    def corpus_size(self) -> int:
+        return self._live
+
+    @property
+    def num_ids(self) -> int:
+        """
+        Number of document ids ever assigned (length of score arrays).
+        """
+        return self._num_ids
+
+    @property
+    def avgdl(self) -> float:
+        return self._total_len / self._live if self._live else 0.0
+
+    def is_live(self, doc_id: int) -> bool:
+        return self._doc_terms[doc_id] is not None
+
+    def source_doc_ids(self, source_file: str) -> List[int]:
+        """
+        Live document ids of a source file.
+        """
+        return self._source_docs.get(source_file, [])
+
+    # -----------------------------
+    # Mutation
+    # -----------------------------
+    def add_document(
+        self,
+        tokens: List[str],
+        source_file: Optional[str] = None,
+    ) -> int:
+        """
+        Adds one tokenized document and returns its id.
+        """
+
+        doc_id = self._num_ids
+
+        frequencies: Dict[int, int] = {}
+        for token in tokens:
+            term_id = self._term_ids.get(token)
+            if term_id is None:
+                term_id = len(self._df)
+                self._term_ids[token] = term_id
+                self._df.append(0)
+                self._postings.append({})
+            frequencies[term_id] = frequencies.get(term_id, 0) + 1
+
+        for term_id, tf in frequencies.items():
+            self._postings[term_id][doc_id] = tf
+            self._df[term_id] += 1
+            self._posting_arrays.pop(term_id, None)
+
+        if doc_id == len(self._doc_len):
+            self._doc_len = np.concatenate(
+                [self._doc_len, np.zeros_like(self._doc_len)]
+            )
+        self._doc_len[doc_id] = len(tokens)
+        self._num_ids += 1
+        self._doc_terms.append(array("i", frequencies.keys()))
+
+        if source_file is not None:
+            self._source_docs.setdefault(source_file, []).append(doc_id)
+
+        self._live += 1
+        self._total_len += len(tokens)
+        self._idf = None
+
+        return doc_id
+
+    def remove_document(self, doc_id: int) -> None:
+        terms = self._doc_terms[doc_id]
+        if terms is None:
+            return
+
+        for term_id in terms:
+            del self._postings[term_id][doc_id]
+            self._df[term_id] -= 1
+            self._posting_arrays.pop(term_id, None)
+
+        self._live -= 1
+        self._total_len -= int(self._doc_len[doc_id])
+        self._doc_len[doc_id] = 0
+        self._doc_terms[doc_id] = None
+        self._idf = None
+
+    def remove_source(self, source_file: str) -> List[int]:
+        """
+        Removes every document of a source file; returns their ids.
+        """
+
+        doc_ids = self._source_docs.pop(source_file, [])
+        for doc_id in doc_ids:
+            self.remove_document(doc_id)
+        return doc_ids
+
+    # -----------------------------
+    # Scoring
+    # -----------------------------
+    def _compute_idf(self) -> np.ndarray:
+        """
+        Okapi idf with negative values floored at epsilon * mean idf,
+        matching BM25Okapi._calc_idf over the live vocabulary.
+        """
+
+        df = np.asarray(self._df, dtype=np.float64)
+        live = df > 0
+        n = self._live
+
+        idf = np.zeros_like(df)
+        idf[live] = np.log(n - df[live] + 0.5) - np.log(df[live] + 0.5)
+
+        if live.any():
+            eps = self.epsilon * idf[live].mean()
+            idf[live & (idf < 0)] = eps
+
+        return idf
+
+    def _term_postings(
+        self,
+        term_id: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._posting_arrays.get(term_id)
+        if arrays is None:
+            postings = self._postings[term_id]
+            arrays = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float64, count=len(postings)),
+            )
+            self._posting_arrays[term_id] = arrays
+        return arrays
+
+    def _query_postings(
+        self,
+        query_tokens: List[str],
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Per query term (repeats included): matching doc ids and their
+        BM25 contributions.
+        """
+
+        if not self._live:
+            return []
+
+        if self._idf is None:
+            self._idf = self._compute_idf()
+
+        k1, b, avgdl = self.k1, self.b, self.avgdl
+        parts: List[Tuple[np.ndarray, np.ndarray]] = []
+
+        for token in query_tokens:
+            term_id = self._term_ids.get(token)
+            if term_id is None or not self._idf[term_id]:
+                continue
+
+            doc_ids, tf = self._term_postings(term_id)
+            norm = k1 * (1 - b + b * self._doc_len[doc_ids] / avgdl)
+            parts.append(
+                (doc_ids, self._idf[term_id] * (tf * (k1 + 1) / (tf + norm)))
+            )
+
+        return parts
+
+    def idf(self, term: str) -> float:
+        if self._idf is None:
+            self._idf = self._compute_idf()
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            return 0.0
+        return float(self._idf[term_id])
+
+    def get_scores(self, query_tokens: List[str]) -> np.ndarray:
+        """
+        BM25 score for every document id (removed ids score 0).
+        """
+
+        scores = np.zeros(self.num_ids)
+        for doc_ids, contrib in self._query_postings(query_tokens):
+            # doc ids are unique within one posting list
+            scores[doc_ids] += contrib
+        return scores
+
+    def top_k(
+        self,
+        query_tokens: List[str],
+        k: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ids and scores of the k best documents with a positive score,
+        best first. Cost depends on the query's postings, not the corpus.
+
+        mask: boolean array over doc ids; only True ids are returned.
+        """
+
+        parts = self._query_postings(query_tokens)
+        if not parts or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        if len(parts) == 1:
+            doc_ids, scores = parts[0]
+        else:
+            all_ids = np.concatenate([p[0] for p in parts])
+            doc_ids, inverse = np.unique(all_ids, return_inverse=True)
+            scores = np.bincount(
+                inverse,
+                weights=np.concatenate([p[1] for p in parts]),
+            )
+
+        keep = scores > 0
+        if mask is not None:
+            keep &= mask[doc_ids]
+        doc_ids, scores = doc_ids[keep], scores[keep]
+
+        if len(scores) > k:
+            best = np.argpartition(scores, -k)[-k:]
+            doc_ids, scores = doc_ids[best], scores[best]
+
+        order = np.argsort(scores)[::-1]
+        return doc_ids[order], scores[order]
@@ -37,3 +37,18 @@ def build_citations(chunks: List[Dict]) -> List[Dict]:
 
 
     return citations
+
+
+def block_citations(blocks: List[Dict]) -> List[Dict]:
+    """
+    One citation per packed context block: citations[i] is [Source i + 1].
+    """
+
+    return [
+        {
+            "source_file": block["source_file"],
+            "page_number": block["page_number"],
+            "snippet": block["text"][:200],
+        }
+        for block in blocks
+    ]
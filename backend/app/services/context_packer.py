@@ -0,0 +1,254 @@
+"""
+context_packer.py
+
+Token-budget-aware evidence packing for LLM prompts.
+
+Why:
+-----
+generate_answer cut context by block count (15 / 60) whatever the
+length: long chunks could overflow the model's context, short ones
+wasted it, and overlapping chunk text was sent twice.
+
+How:
+-----
+- Chunks of the same page are merged into one block in chunk order;
+  the splitter's overlap between neighbours is sent once
+- Blocks are ordered by their best relevance score and packed greedily
+  into the model's token budget (LLM_CONTEXT_BUDGET[S]), counted with
+  tiktoken (CONTEXT_TOKENIZER)
+- Near-duplicate blocks (word-set Jaccard >= CONTEXT_DEDUP_THRESHOLD)
+  are dropped
+- The budget covers what is sent: "[Source N]" labels and separators
+  included (render_context); [Source N] is the N-th returned block
+"""
+
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import (
+    CONTEXT_DEDUP_THRESHOLD,
+    CONTEXT_TOKENIZER,
+    GROQ_MODEL,
+    LLM_CONTEXT_BUDGET,
+    LLM_CONTEXT_BUDGETS,
+)
+
+# Longest splitter overlap (chunk_overlap=150) looked for when merging
+MAX_OVERLAP_CHARS = 400
+MIN_OVERLAP_CHARS = 20
+
+SEPARATOR = "\n\n"
+
+_CHUNK_INDEX = re.compile(r"_c(\d+)$")
+_WORD = re.compile(r"\w+")
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _load_encoding():
+    global _encoding
+
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+
+                    _encoding = tiktoken.get_encoding(CONTEXT_TOKENIZER)
+                except Exception as e:
+                    # BPE files are downloaded on first use; offline
+                    # containers fall back to a length estimate
+                    logger.warning(
+                        f"tiktoken {CONTEXT_TOKENIZER} unavailable ({e}); "
+                        "estimating 4 characters per token"
+                    )
+                    _encoding = False
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _load_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def context_budget(model: Optional[str] = None) -> int:
+    """
+    Evidence token budget for a model (LLM_CONTEXT_BUDGETS override).
+    """
+
+    model = model or GROQ_MODEL
+    for item in LLM_CONTEXT_BUDGETS.split(","):
+        name, _, tokens = item.partition("=")
+        if name.strip() == model and tokens.strip():
+            return int(tokens)
+    return LLM_CONTEXT_BUDGET
+
+
+def source_label(n: int) -> str:
+    return f"[Source {n}]\n"
+
+
+def render_context(blocks: List[Dict]) -> str:
+    """
+    The prompt context of packed blocks, labeled [Source 1..N].
+    """
+
+    return SEPARATOR.join(
+        f"{source_label(idx + 1)}{block['text']}"
+        for idx, block in enumerate(blocks)
+    )
+
+
+def _truncate(
+    text: str,
+    label: str,
+    budget: int,
+    count: Callable[[str], int],
+) -> str:
+    """
+    Longest prefix of text whose labeled block fits the budget.
+    """
+
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count(label + text[:mid]) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+def merge_overlapping(first: str, second: str) -> str:
+    """
+    Joins neighbouring chunks, keeping the text they share only once.
+    """
+
+    limit = min(len(first), len(second), MAX_OVERLAP_CHARS)
+    for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return f"{first}\n{second}"
+
+
+def _words(text: str) -> frozenset:
+    return frozenset(w.lower() for w in _WORD.findall(text))
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _chunk_position(chunk: Dict, fallback: int) -> Tuple[int, int]:
+    match = _CHUNK_INDEX.search(str(chunk.get("chunk_id", "")))
+    return (int(match.group(1)) if match else fallback, fallback)
+
+
+def pack_context(
+    evidence_chunks: List[Dict],
+    budget: int,
+    count: Callable[[str], int] = count_tokens,
+    dedup_threshold: float = CONTEXT_DEDUP_THRESHOLD,
+) -> List[Dict]:
+    """
+    Evidence blocks ({"text", "source_file", "page_number", "score",
+    "tokens"}) in relevance order whose total tokens fit the budget.
+
+    Accepts retriever results ({"score", "metadata": chunk}) or plain
+    chunks (ranked by position).
+    """
+
+    # (source_file, page) -> [(position, chunk text)], best score
+    groups: Dict[Tuple, Dict] = {}
+
+    for rank, item in enumerate(evidence_chunks):
+        chunk = item.get("metadata", item)
+        text = (chunk.get("text") or item.get("text") or "").strip()
+        if not text:
+            continue
+
+        # Chunks without a page cannot be merged with anything
+        page = chunk.get("page_number")
+        key = (chunk.get("source_file"), page if page else f"#{rank}")
+        group = groups.setdefault(
+            key,
+            {
+                "source_file": chunk.get("source_file"),
+                "page_number": page,
+                "score": item.get("score", -rank),
+                "rank": rank,
+                "parts": [],
+            },
+        )
+        group["parts"].append((_chunk_position(chunk, rank), text))
+
+    blocks: List[Dict] = []
+    seen: List[frozenset] = []
+    remaining = budget
+    separator = count(SEPARATOR)
+    oversized: Optional[Dict] = None
+
+    # Retrieval order is relevance order
+    for group in sorted(groups.values(), key=lambda g: g["rank"]):
+        parts = sorted(group["parts"])
+        text = parts[0][1]
+        for _, part in parts[1:]:
+            if part not in text:
+                text = merge_overlapping(text, part)
+
+        words = _words(text)
+        if any(_jaccard(words, other) >= dedup_threshold for other in seen):
+            continue
+
+        # Cost as sent: label, text and the separator before it
+        tokens = count(source_label(len(blocks) + 1) + text)
+        cost = tokens + (separator if blocks else 0)
+        if cost > remaining:
+            # Greedy: a smaller, less relevant block may still fit
+            if oversized is None:
+                oversized = dict(group, text=text)
+            continue
+
+        remaining -= cost
+        seen.append(words)
+        blocks.append(
+            {
+                "text": text,
+                "source_file": group["source_file"],
+                "page_number": group["page_number"],
+                "score": group["score"],
+                "tokens": tokens,
+            }
+        )
+
+    # Tokens can merge across block boundaries: check the real total
+    while blocks and count(render_context(blocks)) > budget:
+        blocks.pop()
+
+    if not blocks and oversized is not None:
+        # Nothing fits whole: send the best block cut to the budget
+        label = source_label(1)
+        text = _truncate(oversized["text"], label, budget, count)
+        if text:
+            logger.warning(
+                f"Evidence block truncated to the {budget}-token context budget"
+            )
+            blocks.append(
+                {
+                    "text": text,
+                    "source_file": oversized["source_file"],
+                    "page_number": oversized["page_number"],
+                    "score": oversized["score"],
+                    "tokens": count(label + text),
+                }
+            )
+
+    return blocks
@@ -0,0 +1,101 @@
+"""
+dense_index.py
+
+Why:
+-----
+Chunk embeddings are already computed at ingest time; keeping them
+locally lets the retriever run semantic search without a Pinecone
+round-trip per query.
+
+How:
+-----
+- One contiguous float32 matrix (rows L2-normalized), grown by doubling
+- Cosine similarity as a single matrix-vector product
+- Top-k via argpartition
+- An optional boolean row mask scores only the selected rows
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class DenseIndex:
+    """
+    Append-only brute-force cosine index over float32 vectors.
+    """
+
+    def __init__(self, dim: int, capacity: int = 1024) -> None:
+        self.dim = dim
+        self._matrix = np.zeros((max(capacity, 1), dim), dtype=np.float32)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """
+        Live rows as a contiguous view (no copy).
+        """
+        return self._matrix[: self._size]
+
+    def add(self, vectors: np.ndarray) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors = vectors / norms
+
+        needed = self._size + len(vectors)
+        if needed > len(self._matrix):
+            capacity = len(self._matrix)
+            while capacity < needed:
+                capacity *= 2
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[: self._size] = self._matrix[: self._size]
+            self._matrix = grown
+
+        self._matrix[self._size : needed] = vectors
+        self._size = needed
+
+    def clear_rows(self, row_ids) -> None:
+        """
+        Zero rows so they never match (ids stay stable).
+        """
+        self._matrix[np.asarray(row_ids, dtype=np.int64)] = 0.0
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        k: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row ids and cosine scores of the k nearest rows, best first
+        (only rows whose mask entry is True, when a mask is given).
+        """
+
+        if not self._size or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        query = np.asarray(query_vector, dtype=np.float32).reshape(self.dim)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        if mask is None:
+            rows = None
+            scores = self.matrix @ query
+        else:
+            rows = np.flatnonzero(mask[: self._size])
+            scores = self._matrix[rows] @ query
+
+        if len(scores) > k:
+            best = np.argpartition(scores, -k)[-k:]
+        else:
+            best = np.arange(len(scores))
+
+        best = best[np.argsort(scores[best])[::-1]]
+        ids = best if rows is None else rows[best]
+        return ids, scores[best]
@@ -0,0 +1,159 @@
+"""
+embedding_backends.py
+
+Why:
+-----
+The embedding model was hard-loaded as fp32 PyTorch; on CPU-only
+containers that forward pass dominates ingestion time.
+
+How:
+-----
+- EmbeddingBackend interface (token_lengths / encode)
+- torch: SentenceTransformer, fp32 (baseline)
+- torch-int8: same model with Linear layers dynamically quantized
+  to int8
+- onnx: SentenceTransformer on ONNX Runtime (optional dependency:
+  `pip install "sentence-transformers[onnx]"`); point `onnx_file` at a
+  quantized export (e.g. onnx/model_qint8_avx512_vnni.onnx) for int8
+- Every backend returns L2-normalized float32 rows
+- Backend chosen by EMBEDDING_BACKEND
+"""
+
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+import numpy as np
+from loguru import logger
+
+BACKENDS = ("torch", "torch-int8", "onnx")
+
+
+class EmbeddingBackend(ABC):
+    """
+    Minimal embedding model contract used by the embedding service.
+    """
+
+    name: str = ""
+
+    def __init__(self, model_name: str) -> None:
+        self.model_name = model_name
+
+    @property
+    def cache_namespace(self) -> str:
+        """
+        Embedding cache key prefix: vectors from different backends
+        differ slightly, so they are never mixed in the cache.
+        """
+
+        return self.model_name
+
+    @abstractmethod
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """
+        Tokens per text as the model sees them (special tokens, truncation).
+        """
+
+    @abstractmethod
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        One forward pass over `texts`; normalized float32 rows.
+        """
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    name = "torch"
+
+    def __init__(self, model_name: str) -> None:
+        super().__init__(model_name)
+        self._model = self._load()
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(self.model_name)
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        encoded = self._model.tokenizer(
+            texts,
+            add_special_tokens=True,
+            truncation=True,
+            max_length=self._model.max_seq_length,
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(
+            self._model.encode(
+                texts,
+                batch_size=max(1, len(texts)),
+                normalize_embeddings=True,
+            ),
+            dtype=np.float32,
+        )
+
+
+class QuantizedTorchBackend(SentenceTransformerBackend):
+    name = "torch-int8"
+
+    @property
+    def cache_namespace(self) -> str:
+        return f"{self.model_name}@{self.name}"
+
+    def _load(self):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        # Dynamic quantization is a CPU kernel: never place this on GPU
+        model = SentenceTransformer(self.model_name, device="cpu")
+        # Weights stored as int8, activations quantized on the fly
+        return torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+
+class OnnxBackend(SentenceTransformerBackend):
+    name = "onnx"
+
+    def __init__(
+        self,
+        model_name: str,
+        onnx_file: Optional[str] = None,
+    ) -> None:
+        self.onnx_file = onnx_file
+        super().__init__(model_name)
+
+    @property
+    def cache_namespace(self) -> str:
+        onnx_file = self.onnx_file or "model.onnx"
+        return f"{self.model_name}@{self.name}:{onnx_file}"
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+
+        model_kwargs = (
+            {"file_name": self.onnx_file} if self.onnx_file else None
+        )
+        return SentenceTransformer(
+            self.model_name,
+            device="cpu",
+            backend="onnx",
+            model_kwargs=model_kwargs,
+        )
+
+
+def create_embedding_backend(
+    backend: str,
+    model_name: str,
+    onnx_file: Optional[str] = None,
+) -> EmbeddingBackend:
+    if backend == "torch":
+        instance: EmbeddingBackend = SentenceTransformerBackend(model_name)
+    elif backend == "torch-int8":
+        instance = QuantizedTorchBackend(model_name)
+    elif backend == "onnx":
+        instance = OnnxBackend(model_name, onnx_file)
+    else:
+        raise RuntimeError(f"Unknown EMBEDDING_BACKEND: {backend}")
+
+    logger.info(f"Embedding backend: {backend} ({model_name})")
+    return instance
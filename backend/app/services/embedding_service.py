@@ -0,0 +1,246 @@
+"""
+embedding_service.py
+
+Why:
+-----
+Every caller ran its own forward pass: under concurrent load each chat
+query and each ingestion batch became a separate small encode call,
+and a query could sit behind a 256-text ingestion batch.
+
+How:
+-----
+- One worker thread owns the model; callers submit texts and get a
+  Future back
+- Requests arriving within `window_ms` (or until `max_batch` texts) are
+  merged into a single encode call and the rows fanned back out
+- Two lanes: "interactive" (queries) always goes first and is never
+  merged with "bulk" (ingestion)
+- Large bulk requests are encoded `max_batch` texts at a time, so a
+  query waits for at most one bulk slice; slices are taken in length
+  order so each one pads little
+- pack_by_token_budget splits a batch into length-sorted forward passes
+  bounded by padded tokens instead of a fixed count
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+LANES = ("interactive", "bulk")
+
+
+def pack_by_token_budget(
+    lengths: Sequence[int],
+    token_budget: int,
+) -> List[List[int]]:
+    """
+    Groups indices into batches sorted by length, each keeping
+    len(batch) * longest item <= token_budget (what the model actually
+    computes once a batch is padded). An item longer than the budget
+    gets a batch of its own.
+    """
+
+    batches: List[List[int]] = []
+    current: List[int] = []
+
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Ascending order: the new item is the batch's longest
+        if current and lengths[i] * (len(current) + 1) > token_budget:
+            batches.append(current)
+            current = []
+        current.append(i)
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+class _Request:
+    def __init__(self, texts: Sequence[str]) -> None:
+        self.texts = list(texts)
+        self.future: Future = Future()
+        self.submitted_at = time.perf_counter()
+
+        # Slices are handed out shortest-first (rows map back via order)
+        self.order = sorted(
+            range(len(self.texts)), key=lambda i: len(self.texts[i])
+        )
+
+        self.offset = 0  # next text to hand to a batch
+        self.filled = 0
+        self.rows: List[Optional[np.ndarray]] = [None] * len(self.texts)
+
+
+class EmbeddingService:
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        window_ms: float = 5.0,
+        max_batch: int = 64,
+    ) -> None:
+        self.encode = encode
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+
+        self._lanes: Dict[str, Deque[_Request]] = {
+            lane: deque() for lane in LANES
+        }
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+        self.batches = 0
+        self.texts = 0
+        self.wait_s = {lane: 0.0 for lane in LANES}
+        self.requests = {lane: 0 for lane in LANES}
+
+    def submit(self, texts: Sequence[str], priority: str = "bulk") -> Future:
+        """
+        Queues texts for encoding; the Future resolves to a float32
+        (len(texts), dim) array.
+        """
+
+        if priority not in LANES:
+            raise ValueError(f"Unknown embedding priority: {priority}")
+
+        request = _Request(texts)
+        if not request.texts:
+            request.future.set_result(np.empty((0, 0), dtype=np.float32))
+            return request.future
+
+        with self._cond:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run,
+                    name="embedding-service",
+                    daemon=True,
+                )
+                self._worker.start()
+
+            self._lanes[priority].append(request)
+            self.requests[priority] += 1
+            self._cond.notify()
+
+        return request.future
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {
+                "batches": self.batches,
+                "texts": self.texts,
+                "avg_batch_size": (
+                    self.texts / self.batches if self.batches else 0.0
+                ),
+                "queued": {lane: len(q) for lane, q in self._lanes.items()},
+                "avg_wait_ms": {
+                    lane: 1000 * self.wait_s[lane] / self.requests[lane]
+                    if self.requests[lane]
+                    else 0.0
+                    for lane in LANES
+                },
+            }
+
+    # -----------------------------
+    # Worker
+    # -----------------------------
+    def _run(self) -> None:
+        while True:
+            lane, pieces = self._gather()
+            self._encode(lane, pieces)
+
+    def _queued(self, lane: str) -> int:
+        return sum(len(r.texts) - r.offset for r in self._lanes[lane])
+
+    def _gather(self) -> Tuple[str, List[Tuple[_Request, int, int]]]:
+        """
+        Waits for work, lingers up to `window` for more requests in the
+        chosen lane, then takes up to `max_batch` texts from it.
+        """
+
+        with self._cond:
+            while not any(self._lanes.values()):
+                self._cond.wait()
+
+            lane = "interactive" if self._lanes["interactive"] else "bulk"
+            deadline = time.perf_counter() + self.window
+
+            while self._queued(lane) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+                if lane == "bulk" and self._lanes["interactive"]:
+                    # A query arrived: serve it now, bulk waits its turn
+                    lane = "interactive"
+                    break
+
+            pieces: List[Tuple[_Request, int, int]] = []
+            budget = self.max_batch
+            queue = self._lanes[lane]
+
+            while queue and budget:
+                request = queue[0]
+                if request.future.done():  # an earlier slice failed
+                    queue.popleft()
+                    continue
+
+                start = request.offset
+                end = min(len(request.texts), start + budget)
+                request.offset = end
+                budget -= end - start
+                pieces.append((request, start, end))
+
+                if start == 0:
+                    waited = time.perf_counter() - request.submitted_at
+                    self.wait_s[lane] += waited
+                if end == len(request.texts):
+                    queue.popleft()
+
+            return lane, pieces
+
+    def _encode(
+        self,
+        lane: str,
+        pieces: List[Tuple[_Request, int, int]],
+    ) -> None:
+        texts = [
+            request.texts[i]
+            for request, start, end in pieces
+            for i in request.order[start:end]
+        ]
+
+        try:
+            vectors = np.asarray(self.encode(texts), dtype=np.float32)
+        except Exception as e:
+            logger.exception(
+                f"Embedding batch failed ({lane}, {len(texts)} texts)"
+            )
+            for request, _, _ in pieces:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        with self._cond:
+            self.batches += 1
+            self.texts += len(texts)
+
+        row = 0
+        for request, start, end in pieces:
+            if request.future.done():  # an earlier slice failed
+                row += end - start
+                continue
+
+            for i, vector in zip(
+                request.order[start:end], vectors[row : row + end - start]
+            ):
+                request.rows[i] = vector
+            row += end - start
+            request.filled += end - start
+
+            if request.filled == len(request.texts):
+                request.future.set_result(np.stack(request.rows))
+                request.rows = []
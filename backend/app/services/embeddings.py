@@ -2,20 +2,117 @@
 embeddings.py
 
 Local embedding layer (OpenAI-free).
+
+Vectors are looked up in the content-addressed embedding cache first;
+only unseen texts reach the model forward pass (backend chosen by
+EMBEDDING_BACKEND, see embedding_backends.py), through the
+micro-batching embedding service. Each batch is re-packed by token
+length so short chunks are not padded to the longest one.
 """
 
-from typing import List
-from sentence_transformers import SentenceTransformer
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+
+from app.core.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_WINDOW_MS,
+    EMBEDDING_MAX_BATCH,
+    EMBEDDING_MODEL,
+    EMBEDDING_ONNX_FILE,
+    EMBEDDING_TOKEN_BUDGET,
+)
+from app.services.embedding_backends import (
+    EmbeddingBackend,
+    create_embedding_backend,
+)
+from app.services.embedding_service import (
+    EmbeddingService,
+    pack_by_token_budget,
+)
+from app.state.embedding_cache import cache_key, embedding_cache
 
-_model = SentenceTransformer("all-MiniLM-L6-v2")
+# Loaded on first use (or by the start-up warm-up), not at import
+_backend: Optional[EmbeddingBackend] = None
+_backend_lock = threading.Lock()
 
 
-def embed_texts(texts: List[str]) -> List[list[float]]:
+def get_embedding_backend() -> EmbeddingBackend:
+    """
+    Returns the process-wide embedding backend, loading it once.
+    """
+
+    global _backend
+
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_embedding_backend(
+                    EMBEDDING_BACKEND,
+                    EMBEDDING_MODEL,
+                    onnx_file=EMBEDDING_ONNX_FILE or None,
+                )
+    return _backend
+
+
+def is_loaded() -> bool:
+    return _backend is not None
+
+
+def _encode(texts: List[str]) -> np.ndarray:
+    backend = get_embedding_backend()
+    rows: List[np.ndarray] = [None] * len(texts)
+
+    for batch in pack_by_token_budget(
+        backend.token_lengths(texts), EMBEDDING_TOKEN_BUDGET
+    ):
+        vectors = backend.encode([texts[i] for i in batch])
+        for i, vector in zip(batch, vectors):
+            rows[i] = vector
+
+    return np.stack(rows)
+
+
+# Singleton instance (owns every forward pass)
+embedding_service = EmbeddingService(
+    _encode,
+    window_ms=EMBEDDING_BATCH_WINDOW_MS,
+    max_batch=EMBEDDING_MAX_BATCH,
+)
+
+
+def embed_texts(
+    texts: List[str],
+    priority: str = "bulk",
+) -> List[list[float]]:
     """
     Generates normalized embeddings for a list of texts.
+
+    priority: "interactive" for query-time calls (served ahead of
+    ingestion), "bulk" for indexing.
     """
 
-    return _model.encode(
-        texts,
-        normalize_embeddings=True,
-    ).tolist()
+    namespace = get_embedding_backend().cache_namespace
+    keys = [cache_key(text, namespace) for text in texts]
+    vectors = embedding_cache.get_many(keys)
+
+    # Encode each distinct missing text once
+    missing: Dict[str, int] = {}
+    for i, (key, vector) in enumerate(zip(keys, vectors)):
+        if vector is None and key not in missing:
+            missing[key] = i
+
+    if missing:
+        encoded = embedding_service.submit(
+            [texts[i] for i in missing.values()],
+            priority,
+        ).result()
+        embedding_cache.put_many(list(missing), encoded)
+
+        fresh = dict(zip(missing, encoded))
+        vectors = [
+            fresh[key] if vector is None else vector
+            for key, vector in zip(keys, vectors)
+        ]
+
+    return [vector.tolist() for vector in vectors]
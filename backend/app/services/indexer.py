@@ -3,59 +3,116 @@ indexer.py
 
 Why:
 -----
-Indexes chunk embeddings into Pinecone
-with citation-ready metadata.
+Indexes chunk embeddings into the configured vector store
+(Pinecone or local IVF-flat) with citation-ready metadata.
 
 How:
 -----
-- Batch upserts
+- Batch upserts (iter_index_batches consumes any chunk iterable)
 - Explicit metadata storage
 """
 
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
 from loguru import logger
 
-from app.db.pinecone_client import get_pinecone_index
+from app.db.vector_store import VectorStore, get_vector_store
 from app.services.embeddings import embed_texts
 
 
-def index_chunks(chunks: list[dict], batch_size: int = 50) -> None:
+def upsert_chunks(
+    index: VectorStore,
+    batch: list[dict],
+    vectors: list[list[float]],
+) -> None:
+    """
+    Upserts one batch of embedded chunks with citation metadata.
+    """
+
+    records = [
+        (
+            chunk["chunk_id"],
+            vector,
+            {
+                "source_file": chunk["source_file"],
+                "page_number": chunk["page_number"],
+                "text": chunk["text"],
+            },
+        )
+        for chunk, vector in zip(batch, vectors)
+    ]
+
+    try:
+        index.upsert(records)
+    except Exception:
+        logger.exception("Vector store upsert failed")
+        raise
+
+
+def iter_index_batches(
+    chunks: Iterable[dict],
+    batch_size: int = 50,
+    progress: Optional[Any] = None,
+) -> Iterator[Tuple[list[dict], list[list[float]]]]:
+    """
+    Embeds and upserts chunks batch by batch as they arrive.
+
+    Yields each (batch, vectors) pair once it is upserted, so only one
+    batch of chunks and vectors is held here at a time. `progress`
+    (e.g. ingest_pipeline.FileProgress) gets its chunks_embedded and
+    vectors_upserted counters advanced.
+    """
+
+    index = get_vector_store()
+    iterator = iter(chunks)
+    total = 0
+
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            break
+
+        texts = [c["text"] for c in batch]
+        vectors = embed_texts(texts)
+        if progress is not None:
+            progress.chunks_embedded += len(batch)
+
+        upsert_chunks(index, batch, vectors)
+
+        if progress is not None:
+            progress.vectors_upserted += len(batch)
+
+        total += len(batch)
+        yield batch, vectors
+
+    index.persist()
+    logger.info(f"Indexed {total} chunks")
+
+
+def index_chunks(
+    chunks: list[dict],
+    batch_size: int = 50,
+) -> list[list[float]]:
     """
-    Indexes document chunks into Pinecone.
+    Indexes document chunks into the vector store.
+
+    Returns the embeddings (aligned with `chunks`) so callers can keep
+    them locally for dense retrieval.
 
     Parameters
     ----------
     chunks : list[dict]
         Chunked document data with metadata.
     batch_size : int
-        Number of chunks per Pinecone upsert batch.
+        Number of chunks per upsert batch.
     """
 
-    index = get_pinecone_index()
     logger.info(f"Indexing {len(chunks)} chunks")
 
-    for i in range(0, len(chunks), batch_size):
-        batch = chunks[i : i + batch_size]
-
-        texts = [c["text"] for c in batch]
-        vectors = embed_texts(texts)
-
-        pinecone_vectors = [
-            (
-                chunk["chunk_id"],
-                vector,
-                {
-                    "source_file": chunk["source_file"],
-                    "page_number": chunk["page_number"],
-                    "text": chunk["text"],
-                },
-            )
-            for chunk, vector in zip(batch, vectors)
-        ]
-
-        try:
-            index.upsert(vectors=pinecone_vectors)
-        except Exception:
-            logger.exception("Pinecone upsert failed")
-            raise
+    all_vectors: list[list[float]] = []
+    for _, vectors in iter_index_batches(chunks, batch_size):
+        all_vectors.extend(vectors)
 
     logger.info("Indexing completed successfully")
+    return all_vectors
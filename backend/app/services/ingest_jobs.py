@@ -0,0 +1,292 @@
+"""
+ingest_jobs.py
+
+Why:
+-----
+upload_documents ran pdfplumber, SentenceTransformer and vector store
+calls inline, stalling every other request until a multi-file upload
+finished.
+
+How:
+-----
+- Uploads are saved by the request, then queued as an IngestJob
+- A bounded thread pool runs jobs off the event loop; the files of a
+  job are extracted concurrently and share one embedding batcher
+- Per-file, per-stage counters (pages extracted, chunks embedded,
+  vectors upserted) are exposed for polling
+- A file's batches are staged until it has been fully processed: only
+  complete documents reach the session, and the vectors upserted for a
+  file that fails (extraction or upsert), or that a cancelled job will
+  not add, are deleted again
+- Starting a new upload for a session cancels its running jobs; a job
+  only writes to the session generation it was queued for, so a batch
+  finishing after the re-upload cleared the session is dropped
+- With SUMMARY_ON_INGEST, each registered document starts its
+  map-reduce summary
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from app.core.config import (
+    INGEST_JOB_HISTORY,
+    INGEST_JOB_WORKERS,
+    SUMMARY_ON_INGEST,
+)
+from app.db.vector_store import get_vector_store
+from app.services.ingest_pipeline import FileProgress, stream_ingest_many
+from app.services.summarizer import summarizer
+from app.state.document_registry import document_registry
+from app.state.document_store import document_store
+
+
+class IngestJob:
+    def __init__(
+        self,
+        session_id: str,
+        files: List[Dict[str, str]],
+        engine: Optional[str] = None,
+        generation: Optional[int] = None,
+    ) -> None:
+        self.job_id = str(uuid.uuid4())
+        self.session_id = session_id
+        self.engine = engine
+        # DocumentStore generation the chunks belong to
+        self.generation = generation
+
+        # Each file: {"filename", "source_file", "file_path", "doc_hash"}
+        self.files = files
+        self.progress = [
+            FileProgress(f["filename"], f["source_file"]) for f in files
+        ]
+
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        self.cancelled = threading.Event()
+        self.future: Optional[Future] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "session_id": self.session_id,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "files": [p.to_dict() for p in self.progress],
+        }
+
+
+def _discard_vectors(job: IngestJob, chunks: List[dict]) -> None:
+    """
+    Deletes the vectors already upserted for a file that failed or
+    will not be added to the session.
+    """
+
+    if not chunks:
+        return
+    try:
+        get_vector_store().delete([c["chunk_id"] for c in chunks])
+    except Exception:
+        logger.exception(
+            f"[{job.session_id}] Could not delete the partial vectors "
+            f"of {chunks[0]['source_file']}"
+        )
+
+
+class IngestJobManager:
+    def __init__(
+        self,
+        workers: int = INGEST_JOB_WORKERS,
+        history: int = INGEST_JOB_HISTORY,
+    ) -> None:
+        self.history = history
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="ingest",
+        )
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        session_id: str,
+        files: List[Dict[str, str]],
+        engine: Optional[str] = None,
+        generation: Optional[int] = None,
+    ) -> IngestJob:
+        job = IngestJob(session_id, files, engine, generation)
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._trim()
+
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_session(self, session_id: str) -> List[IngestJob]:
+        with self._lock:
+            return [j for j in self._jobs.values() if j.session_id == session_id]
+
+    def pending_futures(self, session_id: str) -> List[Future]:
+        """
+        Futures of the session's unfinished jobs (to await completion).
+        """
+        return [
+            job.future
+            for job in self.list_session(session_id)
+            if not job.done and job.future is not None
+        ]
+
+    async def wait_for_session(
+        self,
+        session_id: str,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """
+        Waits until the session's queued and running jobs have finished;
+        False if some are still unfinished after `timeout` seconds.
+        """
+        pending = self.pending_futures(session_id)
+        if not pending:
+            return True
+
+        # asyncio.wait never cancels the jobs when the caller gives up
+        # (timeout, or the request itself being cancelled)
+        _, unfinished = await asyncio.wait(
+            [asyncio.wrap_future(f) for f in pending],
+            timeout=timeout,
+        )
+        return not unfinished
+
+    def cancel_session(self, session_id: str) -> None:
+        """
+        Stop every unfinished job of a session (e.g. before re-upload).
+        """
+        for job in self.list_session(session_id):
+            if not job.done:
+                job.cancelled.set()
+                if job.future is not None and job.future.cancel():
+                    job.status = "cancelled"
+
+    def _run(self, job: IngestJob) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+
+        # Per-file staging, released once the file is finished
+        chunks: List[Optional[list]] = [[] for _ in job.files]
+        vectors: List[Optional[list]] = [[] for _ in job.files]
+        failed = 0
+
+        def file_done(idx: int, error: Optional[BaseException]) -> None:
+            nonlocal failed
+            spec, progress = job.files[idx], job.progress[idx]
+
+            if job.cancelled.is_set():
+                # Stopping: nothing more reaches the session
+                _discard_vectors(job, chunks[idx])
+            elif error is not None:
+                failed += 1
+                progress.status = "failed"
+                progress.error = str(error)
+                _discard_vectors(job, chunks[idx])
+            elif chunks[idx] and not document_store.add_chunks(
+                job.session_id,
+                chunks[idx],
+                vectors[idx],
+                job.generation,
+                doc_hash=spec["doc_hash"],
+            ):
+                # The session was cleared (re-upload) meanwhile
+                job.cancelled.set()
+                _discard_vectors(job, chunks[idx])
+            else:
+                registered = document_registry.register(
+                    spec["doc_hash"],
+                    spec["source_file"],
+                    chunks[idx],
+                    vectors[idx],
+                )
+                progress.status = "completed"
+                logger.info(f"[{job.session_id}] Processed {spec['source_file']}")
+
+                if SUMMARY_ON_INGEST and registered:
+                    # Map-reduce summary in the background, cached by hash
+                    summarizer.summarize_document(registered, spec["doc_hash"])
+
+            chunks[idx] = vectors[idx] = None
+
+        for progress in job.progress:
+            progress.status = "processing"
+
+        stream = stream_ingest_many(
+            [spec["file_path"] for spec in job.files],
+            engine=job.engine,
+            progress=job.progress,
+            on_file_done=file_done,
+        )
+
+        try:
+            for idx, batch, batch_vectors in stream:
+                if job.cancelled.is_set():
+                    break
+
+                chunks[idx].extend(batch)
+                vectors[idx].extend(batch_vectors)
+
+            if job.cancelled.is_set():
+                job.status = "cancelled"
+                for progress in job.progress:
+                    if progress.status == "processing":
+                        progress.status = "cancelled"
+            elif failed:
+                job.status = "failed"
+                job.error = f"{failed} of {len(job.files)} files failed"
+            else:
+                job.status = "completed"
+
+        except Exception as e:
+            logger.exception(f"[{job.session_id}] Ingest job {job.job_id} failed")
+            job.status = "failed"
+            job.error = str(e)
+            for progress in job.progress:
+                if progress.status == "processing":
+                    progress.status = "failed"
+
+        finally:
+            # Closing the stream deletes the upserts it still had in
+            # flight; files staged but never finished are deleted here
+            stream.close()
+            for staged in chunks:
+                _discard_vectors(job, staged)
+            job.finished_at = time.time()
+
+    def _trim(self) -> None:
+        # Forget the oldest finished jobs beyond the history limit
+        finished = [k for k, j in self._jobs.items() if j.done]
+        for key in finished[: max(0, len(self._jobs) - self.history)]:
+            del self._jobs[key]
+
+
+# Singleton instance
+ingest_jobs = IngestJobManager()
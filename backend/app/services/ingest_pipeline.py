@@ -0,0 +1,331 @@
+"""
+ingest_pipeline.py
+
+Why:
+-----
+Each ingestion stage used to materialize a full list: every page
+string, every chunk and every vector existed at once, and nothing was
+indexed until extraction had finished.
+
+How:
+-----
+- PDF pages -> chunks -> embeddings -> upsert as composed generators
+- Extraction + chunking run ahead in a producer thread, buffered by a
+  bounded queue (backpressure: the producer blocks when it is full)
+- Embedding of early pages overlaps extraction of later ones
+- Peak pipeline memory is O(queue + batch), not O(document)
+- Multi-file uploads extract concurrently into one shared embedding
+  batcher (stream_ingest_many)
+"""
+
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from loguru import logger
+
+from app.core.config import (
+    INGEST_BATCH_SIZE,
+    INGEST_CONCURRENT_FILES,
+    INGEST_EMBED_BATCH_SIZE,
+    INGEST_QUEUE_BATCHES,
+    INGEST_UPSERT_WORKERS,
+)
+from app.db.vector_store import get_vector_store
+from app.services.chunker import iter_chunks
+from app.services.embeddings import embed_texts
+from app.services.indexer import upsert_chunks
+from app.services.pdf_loader import iter_pdf_pages
+
+T = TypeVar("T")
+
+_DONE = object()
+# Queued by finished upserts so a consumer blocked on the queue hands
+# them back without polling
+_WAKE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def _discard(index: Any, chunks: List[dict]) -> None:
+    """
+    Deletes vectors whose upsert was never handed back (it failed, or
+    the stream was closed first), in case they were written.
+    """
+
+    if not chunks:
+        return
+    try:
+        index.delete([c["chunk_id"] for c in chunks])
+    except Exception:
+        logger.exception(f"Could not delete {len(chunks)} unreported vectors")
+
+
+class FileProgress:
+    """
+    Per-file ingestion counters, updated by the pipeline stages.
+    """
+
+    def __init__(self, filename: str, source_file: str) -> None:
+        self.filename = filename
+        self.source_file = source_file
+        self.status = "queued"
+        self.pages_extracted = 0
+        self.chunks_embedded = 0
+        self.vectors_upserted = 0
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "filename": self.filename,
+            "source_file": self.source_file,
+            "status": self.status,
+            "pages_extracted": self.pages_extracted,
+            "chunks_embedded": self.chunks_embedded,
+            "vectors_upserted": self.vectors_upserted,
+            "error": self.error,
+        }
+
+
+def _count_pages(
+    pages: Iterable[dict],
+    progress: Optional[FileProgress],
+) -> Iterator[dict]:
+    for page in pages:
+        if progress is not None:
+            progress.pages_extracted += 1
+        yield page
+
+
+def _put(buffer: "queue.Queue", stop: threading.Event, item: Any) -> bool:
+    """
+    Blocking put that gives up once the consumer has gone away.
+    """
+
+    while not stop.is_set():
+        try:
+            buffer.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _wake(buffer: "queue.Queue") -> None:
+    try:
+        buffer.put_nowait((None, _WAKE))
+    except queue.Full:
+        # Items are queued: the consumer is not blocked
+        pass
+
+
+def prefetch(iterable: Iterable[T], maxsize: int) -> Iterator[T]:
+    """
+    Runs `iterable` in a background thread, at most `maxsize` items ahead
+    of the consumer. Producer errors are re-raised in the consumer.
+    """
+
+    buffer: "queue.Queue" = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not _put(buffer, stop, item):
+                    return
+            _put(buffer, stop, _DONE)
+        except BaseException as e:
+            _put(buffer, stop, _Failure(e))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        # Consumer finished or bailed out: release a blocked producer
+        stop.set()
+
+
+def stream_ingest_many(
+    file_paths: List[str],
+    engine: Optional[str] = None,
+    batch_size: int = INGEST_BATCH_SIZE,
+    embed_batch_size: int = INGEST_EMBED_BATCH_SIZE,
+    max_pending_batches: int = INGEST_QUEUE_BATCHES,
+    concurrent_files: int = INGEST_CONCURRENT_FILES,
+    upsert_workers: int = INGEST_UPSERT_WORKERS,
+    progress: Optional[List[FileProgress]] = None,
+    on_file_done: Optional[Callable[[int, Optional[BaseException]], None]] = None,
+) -> Iterator[Tuple[int, list[dict], list[list[float]]]]:
+    """
+    Streams several PDFs through one shared embedding batcher.
+
+    - Up to `concurrent_files` PDFs are extracted and chunked at once
+      (their page ranges go to the shared extraction process pool)
+    - All chunks meet in one bounded queue, drained into batches of up
+      to `embed_batch_size` texts: one large encode call per batch,
+      which the model length-sorts into padded minibatches
+    - Embedded chunks are regrouped per file and upserted `batch_size`
+      at a time on `upsert_workers` threads, overlapping the next encode
+
+    Yields (file_index, chunks, vectors) per upserted batch.
+    on_file_done(file_index, error) fires once per file, after its last
+    batch was yielded; error is set if its extraction or one of its
+    upserts failed (the other files go on). Batches that are not yielded
+    (failed, or in flight when the stream is closed early) are deleted
+    from the index again.
+    """
+
+    if not file_paths:
+        return
+
+    buffer: "queue.Queue" = queue.Queue(
+        maxsize=max(1, embed_batch_size * max_pending_batches)
+    )
+    stop = threading.Event()
+
+    def produce(idx: int, file_path: str) -> None:
+        file_progress = progress[idx] if progress is not None else None
+        try:
+            pages = _count_pages(
+                iter_pdf_pages(file_path, engine=engine, offload=True),
+                file_progress,
+            )
+            for chunk in iter_chunks(pages):
+                if not _put(buffer, stop, (idx, chunk)):
+                    return
+            _put(buffer, stop, (idx, _DONE))
+        except BaseException as e:
+            _put(buffer, stop, (idx, _Failure(e)))
+
+    extractors = ThreadPoolExecutor(
+        max_workers=max(1, min(concurrent_files, len(file_paths))),
+        thread_name_prefix="extract",
+    )
+    uploader = ThreadPoolExecutor(
+        max_workers=max(1, upsert_workers),
+        thread_name_prefix="upsert",
+    )
+
+    index = get_vector_store()
+    extracting = set(range(len(file_paths)))
+    errors: Dict[int, Optional[BaseException]] = {}  # extraction finished
+    upsert_errors: Dict[int, BaseException] = {}
+    outstanding = [0] * len(file_paths)  # upserts not yet yielded
+    pending: Deque[Tuple[int, list[dict], list[list[float]], Future]] = deque()
+    total = 0
+
+    def report_finished() -> None:
+        for idx in [i for i in errors if outstanding[i] == 0]:
+            error = errors.pop(idx)
+            upsert_error = upsert_errors.pop(idx, None)
+            error = error or upsert_error
+            if error is not None:
+                logger.error(f"Ingestion failed for {file_paths[idx]}: {error}")
+            if on_file_done is not None:
+                on_file_done(idx, error)
+
+    try:
+        for idx, file_path in enumerate(file_paths):
+            extractors.submit(produce, idx, file_path)
+
+        while extracting or pending:
+            # Block for the first chunk (or a finished upsert), then take
+            # whatever is queued
+            batch: list[Tuple[int, dict]] = []
+            while extracting and len(batch) < embed_batch_size:
+                try:
+                    idx, item = buffer.get(block=not batch)
+                except queue.Empty:
+                    break
+
+                if item is _WAKE:
+                    if not batch:
+                        break
+                elif item is _DONE or isinstance(item, _Failure):
+                    extracting.discard(idx)
+                    errors[idx] = item.error if item is not _DONE else None
+                elif idx not in upsert_errors:
+                    batch.append((idx, item))
+
+            if batch:
+                vectors = embed_texts([chunk["text"] for _, chunk in batch])
+
+                groups: Dict[int, Tuple[list[dict], list[list[float]]]] = {}
+                for (idx, chunk), vector in zip(batch, vectors):
+                    group = groups.setdefault(idx, ([], []))
+                    group[0].append(chunk)
+                    group[1].append(vector)
+
+                for idx, (chunks, chunk_vectors) in groups.items():
+                    if progress is not None:
+                        progress[idx].chunks_embedded += len(chunks)
+
+                    for start in range(0, len(chunks), batch_size):
+                        part = chunks[start : start + batch_size]
+                        part_vectors = chunk_vectors[start : start + batch_size]
+                        future = uploader.submit(
+                            upsert_chunks, index, part, part_vectors
+                        )
+                        future.add_done_callback(lambda _: _wake(buffer))
+                        pending.append((idx, part, part_vectors, future))
+                        outstanding[idx] += 1
+
+            # Hand back finished upserts in order; wait only when too many
+            # are in flight or there is nothing left to embed
+            while pending and (
+                pending[0][3].done()
+                or len(pending) > 2 * upsert_workers
+                or not extracting
+            ):
+                idx, part, part_vectors, future = pending.popleft()
+                outstanding[idx] -= 1
+                error = future.exception()
+                if error is not None:
+                    # Fails this file only: the rest of its chunks are
+                    # no longer embedded
+                    upsert_errors.setdefault(idx, error)
+                    _discard(index, part)
+                    continue
+                if progress is not None:
+                    progress[idx].vectors_upserted += len(part)
+
+                total += len(part)
+                yield idx, part, part_vectors
+
+            report_finished()
+
+        report_finished()
+
+    finally:
+        # Finished, failed or closed early: release blocked producers
+        stop.set()
+        extractors.shutdown(wait=False, cancel_futures=True)
+        uploader.shutdown(wait=True, cancel_futures=True)
+        _discard(index, [c for _, part, _, _ in pending for c in part])
+
+    index.persist()
+    logger.info(f"Indexed {total} chunks from {len(file_paths)} files")
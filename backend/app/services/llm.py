@@ -2,19 +2,114 @@
 llm.py
 
 Groq-only LLM factory.
+
+One ChatGroq per (model, temperature) is cached for the process, and
+all of them share a keep-alive HTTP connection pool (sync + async), so
+chat turns reuse warm TLS connections instead of opening new ones.
 """
 
-from langchain_groq import ChatGroq
-from app.core.config import GROQ_API_KEY, GROQ_MODEL
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from app.core.config import (
+    GROQ_API_KEY,
+    GROQ_BASE_URL,
+    GROQ_MODEL,
+    LLM_CONNECT_TIMEOUT_S,
+    LLM_KEEPALIVE_S,
+    LLM_MAX_RETRIES,
+    LLM_POOL_SIZE,
+    LLM_TIMEOUT_S,
+)
+
+if TYPE_CHECKING:
+    import httpx
+    from langchain_groq import ChatGroq
+
+_llms: Dict[Tuple[str, float], "ChatGroq"] = {}
+_http_client: Optional["httpx.Client"] = None
+_http_async_client: Optional["httpx.AsyncClient"] = None
+_lock = threading.Lock()
+
+
+def _http_settings() -> dict:
+    import httpx
 
+    return {
+        "limits": httpx.Limits(
+            max_connections=LLM_POOL_SIZE,
+            max_keepalive_connections=LLM_POOL_SIZE,
+            keepalive_expiry=LLM_KEEPALIVE_S,
+        ),
+        "timeout": httpx.Timeout(
+            LLM_TIMEOUT_S, connect=LLM_CONNECT_TIMEOUT_S
+        ),
+    }
 
-def get_llm() -> ChatGroq:
+
+def get_llm(
+    model: Optional[str] = None,
+    temperature: float = 0.2,
+) -> "ChatGroq":
     """
-    Returns a Groq-backed chat model.
+    Returns the shared Groq-backed chat model for `model`
+    (default GROQ_MODEL).
     """
 
-    return ChatGroq(
-        api_key=GROQ_API_KEY,
-        model=GROQ_MODEL,
-        temperature=0.2,
-    )
+    model = model or GROQ_MODEL
+    key = (model, temperature)
+
+    llm = _llms.get(key)
+    if llm is not None:
+        return llm
+
+    if not GROQ_API_KEY:
+        raise RuntimeError(
+            "GROQ_API_KEY is not set. "
+            "Add it to HF Spaces Secrets or .env file"
+        )
+
+    global _http_client, _http_async_client
+
+    with _lock:
+        if key not in _llms:
+            # Imported on first use to keep app start-up fast
+            import httpx
+            from langchain_groq import ChatGroq
+
+            settings = _http_settings()
+            if _http_client is None:
+                _http_client = httpx.Client(**settings)
+                _http_async_client = httpx.AsyncClient(**settings)
+
+            _llms[key] = ChatGroq(
+                api_key=GROQ_API_KEY,
+                model=model,
+                temperature=temperature,
+                base_url=GROQ_BASE_URL or None,
+                timeout=settings["timeout"],
+                max_retries=LLM_MAX_RETRIES,
+                http_client=_http_client,
+                http_async_client=_http_async_client,
+            )
+
+        return _llms[key]
+
+
+async def close_llm_clients() -> None:
+    """
+    Closes the pooled connections and forgets cached models
+    (app shutdown; the next get_llm() starts fresh).
+    """
+
+    global _http_client, _http_async_client
+
+    with _lock:
+        http_client, http_async_client = _http_client, _http_async_client
+        _http_client = _http_async_client = None
+        _llms.clear()
+
+    if http_client is not None:
+        http_client.close()
+    if http_async_client is not None:
+        await http_async_client.aclose()
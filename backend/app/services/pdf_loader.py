@@ -2,13 +2,45 @@
 pdf_loader.py
 
 Page-wise PDF text extraction with normalization.
+
+Engines:
+- pdfplumber: accurate layout-aware extraction, slow
+- pypdf: fast extraction for born-digital, text-heavy PDFs
+- auto: pypdf first, pdfplumber only for pages whose fast-path text
+  is empty or looks garbled
+
+Pages are produced one page range at a time (iter_pdf_pages); large
+PDFs have their ranges extracted in parallel by a process pool
+(extraction is pure-Python and CPU-bound) and reassembled in order
+with the same schema as the serial path.
 """
 
+import multiprocessing
 import os
 import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
 import pdfplumber
 from loguru import logger
-from typing import List, Dict
+from pypdf import PdfReader
+
+from app.core.config import (
+    PDF_EXTRACT_ENGINE,
+    PDF_EXTRACT_WORKERS,
+    PDF_PAGES_PER_TASK,
+)
+
+ENGINES = ("auto", "pypdf", "pdfplumber")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+_CID_PATTERN = re.compile(r"\(cid:\d+\)")
 
 
 def _normalize_text(text: str) -> str:
@@ -20,32 +52,295 @@ def _normalize_text(text: str) -> str:
     return text
 
 
-def load_pdf(file_path: str) -> List[Dict]:
+def _looks_garbled(text: str) -> bool:
+    """
+    Cheap quality check on normalized fast-path text.
+
+    Flags empty pages, unmapped glyphs ((cid:N) / U+FFFD), mostly
+    non-alphanumeric output and words glued together by lost spacing.
+    """
+
+    if not text:
+        return True
+
+    if _CID_PATTERN.search(text) or text.count("\ufffd") > 2:
+        return True
+
+    sample = text[:4000]
+    alnum = sum(ch.isalnum() for ch in sample)
+    if alnum / len(sample) < 0.5:
+        return True
+
+    words = sample.split()
+    if len(sample) > 200 and len(sample) / max(len(words), 1) > 20:
+        return True
+
+    return False
+
+
+class _OpenPdf:
+    """
+    pypdf / pdfplumber handles of one file, each opened on first use
+    and then reused for every page range read through it.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self._reader: Optional[PdfReader] = None
+        self._reader_error: Optional[Exception] = None
+        self._plumber = None
+
+    def reader(self) -> PdfReader:
+        if self._reader_error is not None:
+            raise self._reader_error
+        if self._reader is None:
+            try:
+                self._reader = PdfReader(self.file_path)
+            except Exception as e:
+                self._reader_error = e
+                raise
+        return self._reader
+
+    def plumber(self):
+        if self._plumber is None:
+            self._plumber = pdfplumber.open(self.file_path)
+        return self._plumber
+
+    def page_count(self) -> int:
+        try:
+            return len(self.reader().pages)
+        except Exception:
+            return len(self.plumber().pages)
+
+    def close(self) -> None:
+        if self._plumber is not None:
+            self._plumber.close()
+            self._plumber = None
+
+    def __enter__(self) -> "_OpenPdf":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _extract_range(
+    pdf: _OpenPdf,
+    start: int,
+    end: Optional[int] = None,
+    engine: str = "pdfplumber",
+) -> Tuple[List[Dict], Dict[str, float]]:
+    """
+    Extracts pages [start, end) through already opened handles.
+
+    Returns the pages and per-engine timing / fallback counters.
+    """
+
+    source_file = os.path.basename(pdf.file_path)
+    stats = {"pypdf_s": 0.0, "pdfplumber_s": 0.0, "fallbacks": 0}
+    texts: Dict[int, str] = {}
+
+    retry: Optional[List[int]] = None  # None -> pdfplumber on every page
+
+    if engine in ("auto", "pypdf"):
+        began = time.perf_counter()
+        try:
+            reader = pdf.reader()
+            for idx, page in enumerate(reader.pages[start:end], start=start):
+                try:
+                    texts[idx] = _normalize_text(page.extract_text() or "")
+                except Exception:
+                    texts[idx] = ""
+        except Exception:
+            if engine == "pypdf":
+                raise
+            logger.warning(f"pypdf could not read {source_file}")
+            texts = {}
+        stats["pypdf_s"] = time.perf_counter() - began
+
+        if texts and engine == "auto":
+            retry = [idx for idx, text in texts.items() if _looks_garbled(text)]
+        elif texts or engine == "pypdf":
+            retry = []
+
+    if retry is None or retry:
+        began = time.perf_counter()
+        plumber = pdf.plumber()
+        if retry is None:
+            selected = enumerate(plumber.pages[start:end], start=start)
+        else:
+            selected = ((idx, plumber.pages[idx]) for idx in retry)
+
+        for idx, page in selected:
+            texts[idx] = _normalize_text(page.extract_text() or "")
+            # Drop parsed layout objects so memory stays O(range)
+            page.flush_cache()
+
+        stats["pdfplumber_s"] = time.perf_counter() - began
+        stats["fallbacks"] = len(retry) if retry is not None else 0
+
+    pages = [
+        {
+            "text": texts[idx],
+            "page_number": idx + 1,
+            "source_file": source_file,
+        }
+        for idx in sorted(texts)
+    ]
+    return pages, stats
+
+
+def _extract_page_range(
+    file_path: str,
+    start: int,
+    end: Optional[int] = None,
+    engine: str = "pdfplumber",
+) -> Tuple[List[Dict], Dict[str, float]]:
+    """
+    Opens the file and extracts pages [start, end) - runs in worker
+    processes as well.
+    """
+
+    with _OpenPdf(file_path) as pdf:
+        return _extract_range(pdf, start, end, engine)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Shared extraction pool (spawned, so workers never inherit the
+    loaded embedding model or open sockets).
+    """
+
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def iter_pdf_pages(
+    file_path: str,
+    workers: Optional[int] = None,
+    pages_per_task: Optional[int] = None,
+    engine: Optional[str] = None,
+    offload: bool = False,
+) -> Iterator[Dict]:
+    """
+    Yields pages in order, one page range at a time.
+
+    Only a bounded window of page ranges is in flight (and in memory)
+    at once, so downstream stages can start before extraction ends.
+
+    workers: process count for page-sharded extraction (<= 1 -> serial).
+    pages_per_task: pages per range (smaller = better balancing and
+    lower memory, larger = fewer times a worker re-opens the file; the
+    serial path opens it once and reads every range through it).
+    engine: "auto" | "pypdf" | "pdfplumber" (default PDF_EXTRACT_ENGINE).
+    offload: use the pool even for single-range PDFs, so several files
+    extracted from concurrent threads do not contend for the GIL.
+    """
+
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"PDF not found: {file_path}")
 
-    pages: List[Dict] = []
+    workers = PDF_EXTRACT_WORKERS if workers is None else workers
+    pages_per_task = pages_per_task or PDF_PAGES_PER_TASK
+    engine = engine or PDF_EXTRACT_ENGINE
+
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown PDF extraction engine: {engine}")
 
+    pdf = _OpenPdf(file_path)
     try:
-        with pdfplumber.open(file_path) as pdf:
-            for idx, page in enumerate(pdf.pages):
-                raw_text = page.extract_text() or ""
-                clean_text = _normalize_text(raw_text)
-
-                pages.append(
-                    {
-                        "text": clean_text,
-                        "page_number": idx + 1,
-                        "source_file": os.path.basename(file_path),
-                    }
-                )
+        page_count = pdf.page_count()
+        ranges = [
+            (start, min(start + pages_per_task, page_count))
+            for start in range(0, page_count, pages_per_task)
+        ]
+
+        if workers > 1 and (len(ranges) > 1 or offload):
+            pdf.close()
+            results = _map_window(
+                _get_pool(workers), workers, file_path, ranges, engine
+            )
+        else:
+            results = (
+                _extract_range(pdf, start, end, engine)
+                for start, end in ranges
+            )
+
+        count = 0
+        totals = {"pypdf_s": 0.0, "pdfplumber_s": 0.0, "fallbacks": 0}
+        for part, stats in results:
+            for key, value in stats.items():
+                totals[key] += value
+            count += len(part)
+            yield from part
 
         logger.info(
-            f"Loaded and normalized {len(pages)} pages from {file_path}"
+            f"Loaded and normalized {count} pages from {file_path} "
+            f"[engine={engine} pypdf={totals['pypdf_s']:.2f}s "
+            f"pdfplumber={totals['pdfplumber_s']:.2f}s "
+            f"fallbacks={totals['fallbacks']}]"
         )
 
     except Exception as e:
         logger.exception("PDF loading failed")
         raise RuntimeError("Failed to load PDF") from e
 
-    return pages
+    finally:
+        pdf.close()
+
+
+def _map_window(
+    pool: ProcessPoolExecutor,
+    workers: int,
+    file_path: str,
+    ranges: List[Tuple[int, int]],
+    engine: str,
+) -> Iterator[Tuple[List[Dict], Dict[str, float]]]:
+    """
+    Ordered pool.map with at most 2 * workers ranges in flight.
+    """
+
+    remaining = iter(ranges)
+    pending: Deque[Future] = deque()
+
+    def submit_next() -> None:
+        item = next(remaining, None)
+        if item is not None:
+            pending.append(
+                pool.submit(_extract_page_range, file_path, *item, engine)
+            )
+
+    for _ in range(2 * workers):
+        submit_next()
+
+    try:
+        while pending:
+            result = pending.popleft().result()
+            submit_next()
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def load_pdf(
+    file_path: str,
+    workers: Optional[int] = None,
+    pages_per_task: Optional[int] = None,
+    engine: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Extracts every page of a PDF (see iter_pdf_pages for parameters).
+    """
+
+    return list(iter_pdf_pages(file_path, workers, pages_per_task, engine))
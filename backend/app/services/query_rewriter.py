@@ -1,23 +1,131 @@
 # backend/app/services/query_rewriter.py
+"""
+query_rewriter.py
+
+Why:
+-----
+Follow-ups like "what about its price?" need the history folded in
+before retrieval, but the rewrite is a full LLM round-trip in front of
+retrieval on every turn with history.
+
+How:
+-----
+- is_standalone: cheap anaphora / ellipsis heuristics; standalone
+  questions skip the LLM call (QUERY_REWRITE_BYPASS)
+- rewrite_stats records bypass rate and latency saved (/health/cache)
+"""
+
+import re
+import threading
+import time
+from typing import Dict, List
 
-from typing import List, Dict
-from app.services.llm import get_llm
 from langchain_core.messages import SystemMessage, HumanMessage
 
+from app.core.config import QUERY_REWRITE_BYPASS
+from app.services.llm import get_llm
 
-def rewrite_query(
-    history: List[Dict],
-    question: str,
-) -> str:
+# References that only resolve against earlier turns
+_ANAPHORA = re.compile(
+    r"\b(it|its|it's|itself|they|them|their|theirs|themselves|this|that|"
+    r"these|those|he|him|his|she|her|hers|former|latter|above|"
+    r"aforementioned|same|previous|previously|earlier|mentioned)\b",
+    re.IGNORECASE,
+)
+
+# Elliptical follow-ups ("and the second one?", "why?", "more details")
+_ELLIPSIS = re.compile(
+    r"^\s*(and|or|but|also|so|then|what about|how about|what else|"
+    r"why|how come|more|elaborate|explain|continue|go on|tell me more|"
+    r"really|which one)\b",
+    re.IGNORECASE,
+)
+
+# Shorter questions rarely carry their own subject
+MIN_STANDALONE_WORDS = 4
+
+
+def is_standalone(question: str) -> bool:
     """
-    Rewrites a follow-up question into a standalone query.
+    True if the question can be retrieved as-is, without chat history.
+
+    Errs towards rewriting: a false "standalone" costs retrieval
+    quality, a false "needs rewrite" only the LLM round-trip.
     """
 
+    if len(question.split()) < MIN_STANDALONE_WORDS:
+        return False
+    if _ELLIPSIS.search(question):
+        return False
+    return not _ANAPHORA.search(question)
+
+
+def needs_rewrite(history: List[Dict], question: str) -> bool:
     if not history:
-        return question
+        return False
+    return not (QUERY_REWRITE_BYPASS and is_standalone(question))
+
+
+class RewriteStats:
+    """
+    Bypass rate and LLM latency saved by skipping / overlapping rewrites.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.first_turns = 0
+        self.bypassed = 0
+        self.rewritten = 0
+        self.rewrite_seconds = 0.0
+        self.speculative = 0
+        self.speculative_hits = 0
+        self.speculative_saved_seconds = 0.0
+
+    def record_first_turn(self) -> None:
+        with self._lock:
+            self.first_turns += 1
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self.bypassed += 1
+
+    def record_rewrite(self, seconds: float) -> None:
+        with self._lock:
+            self.rewritten += 1
+            self.rewrite_seconds += seconds
+
+    def record_speculation(self, hit: bool, saved_seconds: float) -> None:
+        with self._lock:
+            self.speculative += 1
+            if hit:
+                self.speculative_hits += 1
+                self.speculative_saved_seconds += saved_seconds
 
-    llm = get_llm()
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            follow_ups = self.bypassed + self.rewritten
+            avg_rewrite = (
+                self.rewrite_seconds / self.rewritten if self.rewritten else 0.0
+            )
+            return {
+                "first_turns": self.first_turns,
+                "bypassed": self.bypassed,
+                "rewritten": self.rewritten,
+                "bypass_rate": self.bypassed / follow_ups if follow_ups else 0.0,
+                "avg_rewrite_ms": avg_rewrite * 1000,
+                # Each bypass saves one rewrite round-trip (on average)
+                "bypass_saved_ms": self.bypassed * avg_rewrite * 1000,
+                "speculative": self.speculative,
+                "speculative_hits": self.speculative_hits,
+                "speculative_saved_ms": self.speculative_saved_seconds * 1000,
+            }
 
+
+# Singleton instance
+rewrite_stats = RewriteStats()
+
+
+def _rewrite_messages(history: List[Dict], question: str) -> list:
     history_text = "\n".join(
         f"{m['role']}: {m['content']}" for m in history[-6:]
     )
@@ -32,11 +140,10 @@ RULES:
 - Output ONLY the rewritten question
 """
 
-    response = llm.invoke(
-        [
-            SystemMessage(content=system_prompt),
-            HumanMessage(
-                content=f"""
+    return [
+        SystemMessage(content=system_prompt),
+        HumanMessage(
+            content=f"""
 CHAT HISTORY:
 {history_text}
 
@@ -45,8 +152,49 @@ FOLLOW-UP QUESTION:
 
 REWRITTEN QUESTION:
 """
-            ),
-        ]
-    )
+        ),
+    ]
+
+
+def _skip_rewrite(history: List[Dict], question: str) -> bool:
+    if not history:
+        rewrite_stats.record_first_turn()
+        return True
+    if not needs_rewrite(history, question):
+        rewrite_stats.record_bypass()
+        return True
+    return False
+
+
+def rewrite_query(
+    history: List[Dict],
+    question: str,
+) -> str:
+    """
+    Rewrites a follow-up question into a standalone query.
+    """
+
+    if _skip_rewrite(history, question):
+        return question
+
+    began = time.perf_counter()
+    response = get_llm().invoke(_rewrite_messages(history, question))
+    rewrite_stats.record_rewrite(time.perf_counter() - began)
+    return response.content.strip()
+
+
+async def rewrite_query_async(
+    history: List[Dict],
+    question: str,
+) -> str:
+    """
+    rewrite_query without blocking the event loop (ainvoke).
+    """
+
+    if _skip_rewrite(history, question):
+        return question
 
+    began = time.perf_counter()
+    response = await get_llm().ainvoke(_rewrite_messages(history, question))
+    rewrite_stats.record_rewrite(time.perf_counter() - began)
     return response.content.strip()
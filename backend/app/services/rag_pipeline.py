@@ -1,18 +1,303 @@
 # backend/app/services/rag_pipeline.py
 
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import QUERY_REWRITE_SPECULATIVE, RETRIEVAL_WORKERS
+from app.models.chat import RetrievalOptions
 from app.services.retriever import HybridRetriever
-from app.services.citation import build_citations
-from app.services.answer_generator import generate_answer
+from app.services.citation import block_citations
+from app.services.answer_generator import (
+    LLM_FAILED,
+    PackedPrompt,
+    build_messages,
+    generate_answer,
+    generate_answer_async,
+    stream_answer,
+)
+from app.services.embeddings import embed_texts
 from app.services.memory import ChatMemory
-from app.services.query_rewriter import rewrite_query
+from app.services.query_rewriter import (
+    needs_rewrite,
+    rewrite_query,
+    rewrite_query_async,
+    rewrite_stats,
+)
+from app.state.answer_cache import AnswerGroup, answer_cache, normalize_query
+from app.state.document_store import document_store
+from app.state.retriever_cache import fingerprint_chunks, retriever_cache
+
+T = TypeVar("T")
 
 memory = ChatMemory()
 
+# Retriever builds, BM25 scoring and query embedding (CPU-bound) run
+# here so async routes never block the event loop
+_executor = ThreadPoolExecutor(
+    max_workers=RETRIEVAL_WORKERS,
+    thread_name_prefix="retrieval",
+)
+
+NOT_FOUND = "I could not find this information in the uploaded documents."
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Runs a blocking / CPU-bound call on the retrieval executor.
+    """
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, functools.partial(fn, *args, **kwargs)
+    )
+
+
+def _fingerprint(session_id: str, all_chunks: list[dict]) -> str:
+    fingerprint = document_store.fingerprint(session_id)
+    if fingerprint is None:
+        # Chunks were not registered in the session store (e.g. scripts)
+        fingerprint = fingerprint_chunks(all_chunks)
+    return fingerprint
+
+
+def get_retriever(
+    session_id: str,
+    all_chunks: list[dict],
+    documents: Optional[List[str]] = None,
+) -> HybridRetriever:
+    """
+    Returns a cached retriever for the session's current chunk set.
+    """
+
+    fingerprint = _fingerprint(session_id, all_chunks)
+
+    def load():
+        # Chunks, vectors and fingerprint cut together: add_chunks may
+        # be growing the session's table meanwhile
+        chunks, vectors, current = document_store.snapshot(
+            session_id, all_chunks
+        )
+        return chunks, vectors, current or fingerprint
+
+    return retriever_cache.get_or_build(
+        session_id, all_chunks, fingerprint, documents, load=load
+    )
+
+
+def retrieve(
+    session_id: str,
+    query: str,
+    all_chunks: list[dict],
+    documents: Optional[List[str]] = None,
+    retrieval: Optional[RetrievalOptions] = None,
+    top_k: int = 12,
+) -> List[Dict]:
+    """
+    Hybrid retrieval over the session's (cached) retriever.
+    """
+
+    session_chunks = document_store.get_all_chunks(session_id)
+    if documents and session_chunks:
+        # One retriever over the whole session; the document subset is
+        # a search mask instead of a retriever over copied chunk lists
+        retriever = get_retriever(session_id, session_chunks)
+    else:
+        retriever = get_retriever(session_id, all_chunks, documents)
+        documents = None
+
+    retrieval = retrieval or RetrievalOptions()
+    return retriever.search(
+        query=query,
+        top_k=top_k,
+        fusion=retrieval.fusion,
+        dense_weight=retrieval.dense_weight,
+        sparse_weight=retrieval.sparse_weight,
+        documents=documents,
+    )
+
+
+# -----------------------------
+# Answer cache
+# -----------------------------
+class _CacheLookup(NamedTuple):
+    group: AnswerGroup
+    query: str
+    vector: Optional[np.ndarray]
+    result: Optional[dict]
+
+
+def _lookup_answer(
+    session_id: str,
+    query: str,
+    all_chunks: list[dict],
+    documents: Optional[List[str]],
+    retrieval: Optional[RetrievalOptions],
+) -> _CacheLookup:
+    retrieval = retrieval or RetrievalOptions()
+    group = (
+        _fingerprint(session_id, all_chunks),
+        tuple(sorted(set(documents))) if documents else None,
+        (retrieval.fusion, retrieval.dense_weight, retrieval.sparse_weight),
+    )
+
+    # Paraphrase matching needs the query embedding (cached for retrieval)
+    vector = (
+        embed_texts([query], priority="interactive")[0]
+        if answer_cache.semantic
+        else None
+    )
+    return _CacheLookup(group, query, vector, answer_cache.get(group, query, vector))
+
+
+async def _lookup_answer_async(*args: Any) -> _CacheLookup:
+    if answer_cache.semantic:
+        return await run_blocking(_lookup_answer, *args)
+    return _lookup_answer(*args)
+
+
+def _store_answer(lookup: _CacheLookup, result: dict, began: float) -> None:
+    if LLM_FAILED in result["answer"]:
+        return
+    answer_cache.put(
+        lookup.group,
+        lookup.query,
+        result,
+        cost_s=time.perf_counter() - began,
+        vector=lookup.vector,
+    )
+
+
+# -----------------------------
+# Query rewriting
+# -----------------------------
+async def _rewrite(
+    session_id: str,
+    question: str,
+    all_chunks: list[dict],
+    documents: Optional[List[str]],
+    retrieval: Optional[RetrievalOptions],
+) -> Tuple[str, Optional["asyncio.Future[List[Dict]]"]]:
+    """
+    Standalone query, plus candidates to reuse if any. With
+    QUERY_REWRITE_SPECULATIVE, the raw question is retrieved while the
+    rewrite LLM call runs and reused if the rewrite did not change it.
+    """
+
+    history = memory.get_history(session_id)
+
+    if not (QUERY_REWRITE_SPECULATIVE and needs_rewrite(history, question)):
+        return await rewrite_query_async(history, question), None
+
+    began = time.perf_counter()
+    finished = {}
+    speculative = asyncio.ensure_future(
+        run_blocking(
+            retrieve, session_id, question, all_chunks, documents, retrieval
+        )
+    )
+    speculative.add_done_callback(
+        lambda _: finished.setdefault("at", time.perf_counter())
+    )
+    speculative.add_done_callback(_consume_outcome)
+
+    try:
+        standalone_query = await rewrite_query_async(history, question)
+    except BaseException:
+        speculative.cancel()
+        raise
+    rewritten_at = time.perf_counter()
+
+    if normalize_query(standalone_query) == normalize_query(question):
+        # Retrieval time hidden behind the rewrite
+        saved = min(rewritten_at, finished.get("at", rewritten_at)) - began
+        rewrite_stats.record_speculation(True, saved)
+        return question, speculative
+
+    # Miss: drop the search unless a worker already runs it (then it
+    # still warms the session's retriever)
+    speculative.cancel()
+    rewrite_stats.record_speculation(False, 0.0)
+    return standalone_query, None
+
+
+def _consume_outcome(future: "asyncio.Future[List[Dict]]") -> None:
+    """
+    Retrieves the error of a speculative search nobody awaits (miss or
+    failed rewrite), so it is not reported as never retrieved.
+    """
+
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logger.debug(f"Discarded speculative retrieval failed: {error!r}")
+
+
+async def _retrieve_async(
+    session_id: str,
+    query: str,
+    all_chunks: list[dict],
+    documents: Optional[List[str]],
+    retrieval: Optional[RetrievalOptions],
+    speculative: Optional["asyncio.Future[List[Dict]]"],
+) -> List[Dict]:
+    if speculative is not None:
+        return await speculative
+    return await run_blocking(
+        retrieve, session_id, query, all_chunks, documents, retrieval
+    )
+
+
+def _citations(packed: Optional[PackedPrompt]) -> List[Dict]:
+    # [Source N] in the answer is the N-th block the LLM was sent
+    return block_citations(packed.blocks) if packed is not None else []
+
+
+def _finish_turn(
+    session_id: str,
+    question: str,
+    answer: str,
+    packed: Optional[PackedPrompt],
+) -> dict:
+    citations = _citations(packed)
+
+    memory.add_message(session_id, "user", question)
+    memory.add_message(session_id, "assistant", answer)
+
+    return {
+        "answer": answer,
+        "citations": citations,
+    }
+
+
+def _finish_cached_turn(session_id: str, question: str, result: dict) -> dict:
+    memory.add_message(session_id, "user", question)
+    memory.add_message(session_id, "assistant", result["answer"])
+    return result
+
 
 def answer_question(
     session_id: str,
     question: str,
     all_chunks: list[dict],
+    documents: Optional[List[str]] = None,
+    retrieval: Optional[RetrievalOptions] = None,
 ) -> dict:
     """
     Full RAG pipeline with memory, retrieval, QA, and citations.
@@ -21,30 +306,135 @@ def answer_question(
     history = memory.get_history(session_id)
     standalone_query = rewrite_query(history, question)
 
-    retriever = HybridRetriever(all_chunks)
-    candidate_chunks = retriever.search(
-        query=standalone_query,
-        top_k=12,
+    began = time.perf_counter()
+    lookup = _lookup_answer(
+        session_id, standalone_query, all_chunks, documents, retrieval
+    )
+    if lookup.result is not None:
+        return _finish_cached_turn(session_id, question, lookup.result)
+
+    candidate_chunks = retrieve(
+        session_id, standalone_query, all_chunks, documents, retrieval
     )
 
     if not candidate_chunks:
-        return {
-            "answer": "I could not find this information in the uploaded documents.",
-            "citations": [],
-        }
+        return {"answer": NOT_FOUND, "citations": []}
 
+    packed = build_messages(standalone_query, candidate_chunks, mode="qa")
     answer = generate_answer(
         prompt=standalone_query,
         evidence_chunks=candidate_chunks,
         mode="qa",
+        packed=packed,
     )
 
-    citations = build_citations(candidate_chunks)
+    result = _finish_turn(session_id, question, answer, packed)
+    _store_answer(lookup, result, began)
+    return result
 
-    memory.add_message(session_id, "user", question)
-    memory.add_message(session_id, "assistant", answer)
 
-    return {
-        "answer": answer,
-        "citations": citations,
-    }
+async def answer_question_async(
+    session_id: str,
+    question: str,
+    all_chunks: list[dict],
+    documents: Optional[List[str]] = None,
+    retrieval: Optional[RetrievalOptions] = None,
+) -> dict:
+    """
+    answer_question for async routes: LLM calls use ainvoke, retrieval
+    runs on the executor, so the event loop only waits.
+    """
+
+    standalone_query, speculative = await _rewrite(
+        session_id, question, all_chunks, documents, retrieval
+    )
+
+    began = time.perf_counter()
+    lookup = await _lookup_answer_async(
+        session_id, standalone_query, all_chunks, documents, retrieval
+    )
+    if lookup.result is not None:
+        if speculative is not None:
+            speculative.cancel()
+        return _finish_cached_turn(session_id, question, lookup.result)
+
+    candidate_chunks = await _retrieve_async(
+        session_id, standalone_query, all_chunks, documents, retrieval, speculative
+    )
+
+    if not candidate_chunks:
+        return {"answer": NOT_FOUND, "citations": []}
+
+    # Token counting and truncation are CPU-bound: off the event loop
+    packed = await run_blocking(
+        build_messages, standalone_query, candidate_chunks, mode="qa"
+    )
+    answer = await generate_answer_async(
+        prompt=standalone_query,
+        evidence_chunks=candidate_chunks,
+        mode="qa",
+        packed=packed,
+    )
+
+    result = _finish_turn(session_id, question, answer, packed)
+    _store_answer(lookup, result, began)
+    return result
+
+
+async def stream_answer_question(
+    session_id: str,
+    question: str,
+    all_chunks: list[dict],
+    documents: Optional[List[str]] = None,
+    retrieval: Optional[RetrievalOptions] = None,
+) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    answer_question_async as (event, data) pairs: "token" deltas while the
+    LLM generates, then one final "citations" event.
+    """
+
+    standalone_query, speculative = await _rewrite(
+        session_id, question, all_chunks, documents, retrieval
+    )
+
+    began = time.perf_counter()
+    lookup = await _lookup_answer_async(
+        session_id, standalone_query, all_chunks, documents, retrieval
+    )
+    if lookup.result is not None:
+        if speculative is not None:
+            speculative.cancel()
+        # Cached answers arrive as a single token event
+        result = _finish_cached_turn(session_id, question, lookup.result)
+        yield "token", {"text": result["answer"]}
+        yield "citations", {"citations": result["citations"]}
+        return
+
+    candidate_chunks = await _retrieve_async(
+        session_id, standalone_query, all_chunks, documents, retrieval, speculative
+    )
+
+    if not candidate_chunks:
+        yield "token", {"text": NOT_FOUND}
+        yield "citations", {"citations": []}
+        return
+
+    # Token counting and truncation are CPU-bound: off the event loop
+    packed = await run_blocking(
+        build_messages, standalone_query, candidate_chunks, mode="qa"
+    )
+    parts: List[str] = []
+    async for text in stream_answer(
+        prompt=standalone_query,
+        evidence_chunks=candidate_chunks,
+        mode="qa",
+        packed=packed,
+    ):
+        parts.append(text)
+        yield "token", {"text": text}
+
+    result = _finish_turn(
+        session_id, question, "".join(parts).strip(), packed
+    )
+    _store_answer(lookup, result, began)
+    yield "citations", {"citations": result["citations"]}
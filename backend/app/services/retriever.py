@@ -1,17 +1,73 @@
 """
 retriever.py
 
-Hybrid retrieval (BM25-only):
+Hybrid retrieval (BM25 + dense):
 
-- Keyword-based retrieval using BM25
+- Keyword-based retrieval using an incremental BM25 index
+- Semantic retrieval over the session's local embedding matrix
+  (exact, switching to IVF-flat once a session is large)
+- Reciprocal-rank or weighted-score fusion of both rankings
+- Optional document filter applied as a doc-id mask inside both
+  rankings (one retriever serves every document subset of a session)
 - Session-safe (in-memory chunks only)
 - Schema-consistent output for downstream RAG
 """
 
-from typing import List, Dict
+import threading
+from typing import List, Dict, Optional, Tuple
 import numpy as np
 from loguru import logger
-from rank_bm25 import BM25Okapi
+
+from app.core.config import (
+    ANN_NLIST,
+    ANN_NPROBE,
+    ANN_TRAIN_THRESHOLD,
+    RETRIEVAL_DENSE_WEIGHT,
+    RETRIEVAL_FUSION,
+    RETRIEVAL_RRF_K,
+    RETRIEVAL_SPARSE_WEIGHT,
+)
+from app.db.ivf_index import IVFFlatIndex
+from app.services.bm25_index import BM25Index
+from app.services.dense_index import DenseIndex
+from app.services.embeddings import embed_texts
+
+FUSION_MODES = ("rrf", "weighted")
+
+
+def _rrf(
+    rankings: List[Tuple[np.ndarray, float]],
+    k: int,
+) -> Dict[int, float]:
+    """
+    Weighted reciprocal-rank fusion: sum(w / (k + rank)).
+    """
+
+    fused: Dict[int, float] = {}
+    for ids, weight in rankings:
+        for rank, idx in enumerate(ids, start=1):
+            fused[int(idx)] = fused.get(int(idx), 0.0) + weight / (k + rank)
+    return fused
+
+
+def _weighted_scores(
+    rankings: List[Tuple[np.ndarray, np.ndarray, float]],
+) -> Dict[int, float]:
+    """
+    Weighted sum of per-ranking scores min-max scaled to [0, 1], so
+    negative (cosine) scores keep their order.
+    """
+
+    fused: Dict[int, float] = {}
+    for ids, scores, weight in rankings:
+        if not len(scores):
+            continue
+        low = float(scores.min())
+        spread = float(scores.max()) - low
+        for idx, score in zip(ids, scores):
+            scaled = (float(score) - low) / spread if spread > 0 else 1.0
+            fused[int(idx)] = fused.get(int(idx), 0.0) + weight * scaled
+    return fused
 
 
 class HybridRetriever:
@@ -23,45 +79,183 @@ class HybridRetriever:
     - metadata: FULL chunk dict
     """
 
-    def __init__(self, chunks: List[Dict]):
+    def __init__(
+        self,
+        chunks: List[Dict],
+        vectors: Optional[np.ndarray] = None,
+    ):
         if not chunks:
             raise ValueError("HybridRetriever initialized with empty chunks")
 
-        self.chunks = chunks
-        self.texts = [c.get("text", "") for c in chunks]
+        # doc id -> chunk (None once its source file is removed)
+        self.chunks: List[Optional[Dict]] = []
+        self.bm25 = BM25Index()
+        # Row ids are aligned with BM25 doc ids
+        self.dense: Optional[DenseIndex] = None
+        self._lock = threading.RLock()
 
-        self.bm25 = BM25Okapi(
-            [text.split() for text in self.texts]
-        )
+        self.add_chunks(chunks, vectors)
+
+    def add_chunks(
+        self,
+        chunks: List[Dict],
+        vectors: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Absorb new chunks without refitting the existing corpus.
+
+        Dense search stays enabled only while every chunk has a vector.
+        """
+
+        with self._lock:
+            if vectors is not None and len(vectors) != len(chunks):
+                raise ValueError("vectors must align with chunks")
+
+            if vectors is not None and len(vectors):
+                vectors = np.asarray(vectors, dtype=np.float32)
+                if not self.chunks:
+                    self.dense = IVFFlatIndex(
+                        vectors.shape[1],
+                        len(chunks),
+                        nlist=ANN_NLIST,
+                        nprobe=ANN_NPROBE,
+                        train_threshold=ANN_TRAIN_THRESHOLD,
+                    )
+                if self.dense is not None:
+                    self.dense.add(vectors)
+            elif chunks:
+                self.dense = None
+
+            for c in chunks:
+                self.bm25.add_document(
+                    c.get("text", "").split(),
+                    c.get("source_file"),
+                )
+                self.chunks.append(c)
 
-    def search(self, query: str, top_k: int = 8) -> List[Dict]:
+    def remove_source(self, source_file: str) -> int:
         """
-        Perform keyword-based retrieval using BM25.
+        Drop every chunk of a source file; returns how many were removed.
+        """
+
+        with self._lock:
+            doc_ids = self.bm25.remove_source(source_file)
+            for doc_id in doc_ids:
+                self.chunks[doc_id] = None
+            if self.dense is not None and doc_ids:
+                self.dense.clear_rows(doc_ids)
+            return len(doc_ids)
+
+    def document_mask(self, documents: List[str]) -> np.ndarray:
+        """
+        Boolean doc-id mask selecting the chunks of the given files.
+        """
+
+        with self._lock:
+            mask = np.zeros(self.bm25.num_ids, dtype=bool)
+            for source_file in set(documents):
+                mask[self.bm25.source_doc_ids(source_file)] = True
+            return mask
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 8,
+        fusion: Optional[str] = None,
+        dense_weight: Optional[float] = None,
+        sparse_weight: Optional[float] = None,
+        documents: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        """
+        Perform hybrid retrieval (BM25-only when no vectors are loaded).
+
+        fusion: "rrf" (reciprocal-rank) or "weighted" (min-max scaled scores).
+        Weights default to the RETRIEVAL_* settings; a weight of 0
+        disables that side.
+        documents: only return chunks of these source files.
         """
 
         if not query.strip():
             logger.warning("Empty query passed to retriever")
             return []
 
-        scores = self.bm25.get_scores(query.split())
-        top_indices = np.argsort(scores)[::-1][:top_k]
+        fusion = fusion or RETRIEVAL_FUSION
+        if fusion not in FUSION_MODES:
+            raise ValueError(f"Unknown fusion mode: {fusion}")
+
+        dense_weight = (
+            RETRIEVAL_DENSE_WEIGHT if dense_weight is None else dense_weight
+        )
+        sparse_weight = (
+            RETRIEVAL_SPARSE_WEIGHT if sparse_weight is None else sparse_weight
+        )
+
+        use_dense = self.dense is not None and dense_weight > 0
+        query_vector = (
+            embed_texts([query], priority="interactive")[0]
+            if use_dense
+            else None
+        )
+
+        # Fuse over a deeper candidate pool than we return
+        depth = max(top_k * 4, 50) if use_dense else top_k
+
+        with self._lock:
+            chunks = self.chunks
+            mask = self.document_mask(documents) if documents else None
+            if mask is not None and not mask.any():
+                return []
+
+            sparse_ids, sparse_scores = (
+                self.bm25.top_k(query.split(), depth, mask)
+                if sparse_weight > 0 or not use_dense
+                else (np.empty(0, dtype=np.int64), np.empty(0))
+            )
+            dense_ids, dense_scores = (
+                self.dense.search(query_vector, depth, mask=mask)
+                if use_dense and self.dense is not None
+                else (np.empty(0, dtype=np.int64), np.empty(0))
+            )
+
+        if not len(dense_ids):
+            ranked = list(zip(sparse_ids[:top_k], sparse_scores[:top_k]))
+        else:
+            if fusion == "rrf":
+                fused = _rrf(
+                    [(sparse_ids, sparse_weight), (dense_ids, dense_weight)],
+                    RETRIEVAL_RRF_K,
+                )
+            else:
+                fused = _weighted_scores(
+                    [
+                        (sparse_ids, sparse_scores, sparse_weight),
+                        (dense_ids, dense_scores, dense_weight),
+                    ]
+                )
+            ranked = [
+                (idx, score)
+                for idx, score in sorted(
+                    fused.items(), key=lambda item: item[1], reverse=True
+                )
+                if chunks[idx] is not None
+            ][:top_k]
 
         results: List[Dict] = []
 
-        for idx in top_indices:
-            if scores[idx] <= 0:
+        for idx, score in ranked:
+            if chunks[idx] is None:
                 continue
 
             results.append(
                 {
-                    "score": float(scores[idx]),
-                    "metadata": self.chunks[idx],
+                    "score": float(score),
+                    "metadata": chunks[idx],
                 }
             )
 
         logger.info(
-            f"BM25 returned {len(results)} chunks "
-            f"for query='{query[:50]}'"
+            f"{'Hybrid' if len(dense_ids) else 'BM25'} retrieval returned "
+            f"{len(results)} chunks for query='{query[:50]}'"
         )
 
         return results
@@ -0,0 +1,479 @@
+"""
+summarizer.py
+
+Hierarchical (map-reduce) document summaries.
+
+Why:
+-----
+/summarize/upload sent the top 15 chunks of one fixed BM25 query to a
+single LLM call on every request: slow, and blind to most of a long
+document.
+
+How:
+-----
+- Map: a document's chunks are packed into page-ordered sections
+  (SUMMARY_SECTION_CHARS); each section is summarized by its own LLM
+  call, at most SUMMARY_CONCURRENCY calls in flight
+- Reduce: partial summaries are merged SUMMARY_REDUCE_FANIN at a time
+  until one structured summary remains; [Source X] is the section
+- Summary texts are cached per document hash (summary_cache); a
+  multi-document session composes its summary from the cached
+  per-document ones with one more LLM call (also cached)
+- /summarize/upload/stream streams the final reduce call on a miss
+  (stream_session)
+- Citations are rebuilt from the requesting session's chunks: the
+  same bytes uploaded by another session share the cached text but
+  not its source files
+- With SUMMARY_ON_INGEST, ingest jobs start the per-document summary
+  as soon as a file is registered; otherwise the first
+  /summarize/upload computes it
+- A failed LLM call is not cached: the request gets the same
+  LLM_FAILED notice as answer generation
+"""
+
+import asyncio
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from loguru import logger
+
+from app.core.config import (
+    SUMMARY_CONCURRENCY,
+    SUMMARY_REDUCE_FANIN,
+    SUMMARY_SECTION_CHARS,
+)
+from app.services.answer_generator import LLM_FAILED
+from app.services.llm import get_llm
+from app.state.retriever_cache import fingerprint_chunks
+from app.state.summary_cache import summary_cache
+
+
+SECTION_PROMPT = """
+You are an expert technical analyst summarizing ONE section of a longer
+document.
+
+RULES:
+- Use ONLY the provided section.
+- Keep concrete facts: metrics, dates, certifications, IDs, clauses.
+- Every factual sentence MUST end with the section's citation [Source X].
+- At most 150 words.
+"""
+
+MERGE_PROMPT = """
+You are an expert technical analyst merging partial summaries of one
+document.
+
+RULES:
+- Use ONLY the provided partial summaries.
+- Keep the [Source X] citation of every fact exactly as given.
+- Remove repetition; keep concrete facts.
+- At most 300 words.
+"""
+
+# Multi-level summary structure (final reduce)
+SUMMARY_PROMPT = """
+You are an expert technical analyst. Your task is to provide a multi-level
+summary of the provided partial summaries.
+
+Structure your response as follows:
+
+Executive Summary:
+- A high-level 3-sentence overview for stakeholders.
+
+Key Technical Pillars:
+- Identify the 3–5 main themes or arguments.
+
+Deep-Dive Analysis:
+- One detailed paragraph per pillar.
+
+Data & Evidence:
+- Specific metrics, dates, certifications, IDs, clauses.
+
+STRICT RULES:
+- Use ONLY the provided context.
+- Every factual sentence MUST end with a citation like [Source X],
+  keeping the citations given in the context.
+- If data is missing, say "Information not available in provided documents."
+- Maintain a professional, objective tone.
+"""
+
+_SOURCE = re.compile(r"\[Source (\d+)\]")
+
+
+def build_sections(chunks: List[Dict], max_chars: int) -> List[List[Dict]]:
+    """
+    Packs a document's chunks into sections of whole pages (in page
+    order) of at most max_chars; longer pages are split by chunk.
+    """
+
+    pages: "OrderedDict[int, List[Dict]]" = OrderedDict()
+    for c in sorted(chunks, key=lambda c: c.get("page_number") or 0):
+        pages.setdefault(c.get("page_number") or 0, []).append(c)
+
+    sections: List[List[Dict]] = []
+    current: List[Dict] = []
+    size = 0
+
+    for page_chunks in pages.values():
+        page_size = sum(len(c["text"]) for c in page_chunks)
+
+        if current and size + page_size > max_chars:
+            sections.append(current)
+            current, size = [], 0
+
+        for c in page_chunks:
+            if current and size + len(c["text"]) > max_chars:
+                sections.append(current)
+                current, size = [], 0
+            current.append(c)
+            size += len(c["text"])
+
+    if current:
+        sections.append(current)
+    return sections
+
+
+def _section_citation(section: List[Dict]) -> Dict:
+    first = section[0]
+    return {
+        "source_file": first.get("source_file"),
+        "page_number": first.get("page_number"),
+        "snippet": first.get("text", "")[:200],
+    }
+
+
+def _renumber(text: str, offset: int) -> str:
+    return _SOURCE.sub(lambda m: f"[Source {int(m.group(1)) + offset}]", text)
+
+
+def document_key(chunks: List[Dict], doc_hash: Optional[str] = None) -> str:
+    """
+    Cache key of a document: its upload hash, else a content fingerprint.
+    """
+
+    return doc_hash or fingerprint_chunks(chunks)
+
+
+class _Document(NamedTuple):
+    key: str
+    chunks: List[Dict]
+    # Sections as the summary cites them: sections[i] is [Source i + 1]
+    sections: List[List[Dict]]
+
+
+class DocumentSummarizer:
+    def __init__(
+        self,
+        concurrency: int = SUMMARY_CONCURRENCY,
+        section_chars: int = SUMMARY_SECTION_CHARS,
+        fanin: int = SUMMARY_REDUCE_FANIN,
+    ) -> None:
+        self.section_chars = section_chars
+        self.fanin = max(2, fanin)
+
+        # Bounded LLM parallelism for section / merge calls
+        self._llm_pool = ThreadPoolExecutor(
+            max_workers=concurrency,
+            thread_name_prefix="summary-llm",
+        )
+        # Per-document coordinators (wait on their calls in _llm_pool)
+        self._documents = ThreadPoolExecutor(
+            max_workers=2,
+            thread_name_prefix="summary",
+        )
+        # key -> summary being computed (shared by concurrent callers)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def summarize_document(
+        self,
+        chunks: List[Dict],
+        key: Optional[str] = None,
+    ) -> Future:
+        """
+        Future of one document's summary text: resolved at once from
+        the cache, shared if already being computed.
+        """
+
+        key = key or document_key(chunks)
+        future, owner = self._claim(key)
+        if owner:
+            self._documents.submit(
+                self._fulfil,
+                key,
+                future,
+                lambda: self._map_reduce(chunks),
+                chunks[0].get("source_file"),
+            )
+        return future
+
+    async def summarize_session(
+        self,
+        all_chunks: List[Dict],
+        doc_hashes: Optional[Dict[str, str]] = None,
+    ) -> Dict:
+        """
+        {"summary", "citations"} of every document in a session, composed
+        from the per-document summaries when there are several.
+
+        doc_hashes: upload hash per source file (the keys summaries were
+        precomputed under at ingest; see DocumentStore.document_hashes).
+        """
+
+        documents = self._session_documents(all_chunks, doc_hashes)
+
+        try:
+            texts = await asyncio.gather(
+                *(
+                    asyncio.wrap_future(
+                        self.summarize_document(d.chunks, d.key)
+                    )
+                    for d in documents
+                )
+            )
+
+            if len(documents) == 1:
+                text = texts[0]
+            else:
+                key = "+".join(d.key for d in documents)
+                future, owner = self._claim(key)
+                if owner:
+                    self._llm_pool.submit(
+                        self._fulfil,
+                        key,
+                        future,
+                        lambda: self._call(
+                            SUMMARY_PROMPT, _compose_context(documents, texts)
+                        ),
+                        f"{len(documents)} documents",
+                    )
+                text = await asyncio.wrap_future(future)
+
+        except Exception:
+            # Logged where the call failed; not cached, so a retry runs it
+            text = LLM_FAILED
+
+        return {"summary": text, "citations": _citations(documents)}
+
+    async def stream_session(
+        self,
+        all_chunks: List[Dict],
+        doc_hashes: Optional[Dict[str, str]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        summarize_session's text as deltas: on a cache miss the final
+        reduce call is streamed as the LLM produces it; a cached (or
+        already running) summary arrives as one delta.
+        """
+
+        documents = self._session_documents(all_chunks, doc_hashes)
+        key = "+".join(d.key for d in documents)
+
+        future, owner = self._claim(key)
+        if not owner:
+            try:
+                text = await asyncio.wrap_future(future)
+            except Exception:
+                text = LLM_FAILED
+            yield text
+            return
+
+        text = ""
+        try:
+            if len(documents) == 1:
+                context = await asyncio.wrap_future(
+                    self._documents.submit(
+                        self._reduce_context, documents[0].chunks
+                    )
+                )
+            else:
+                texts = await asyncio.gather(
+                    *(
+                        asyncio.wrap_future(
+                            self.summarize_document(d.chunks, d.key)
+                        )
+                        for d in documents
+                    )
+                )
+                context = _compose_context(documents, texts)
+
+            async for chunk in get_llm().astream(
+                _messages(SUMMARY_PROMPT, context)
+            ):
+                if chunk.content:
+                    text += chunk.content
+                    yield chunk.content
+
+            summary_cache.put(key, text.strip())
+            future.set_result(text.strip())
+
+        except Exception as e:
+            logger.exception(f"Summarizing {len(documents)} documents failed")
+            future.set_exception(e)
+            # Tokens already sent cannot be taken back: append the notice
+            yield f"\n\n{LLM_FAILED}" if text else LLM_FAILED
+
+        finally:
+            if not future.done():
+                # The client went away mid-stream: waiters must not hang
+                future.set_exception(RuntimeError("Summary stream closed"))
+
+    def session_citations(
+        self,
+        all_chunks: List[Dict],
+        doc_hashes: Optional[Dict[str, str]] = None,
+    ) -> List[Dict]:
+        """
+        Citations of summarize_session / stream_session: [Source X] is
+        citations[X - 1].
+        """
+
+        return _citations(self._session_documents(all_chunks, doc_hashes))
+
+    def _session_documents(
+        self,
+        all_chunks: List[Dict],
+        doc_hashes: Optional[Dict[str, str]],
+    ) -> List[_Document]:
+        doc_hashes = doc_hashes or {}
+
+        by_source: Dict[str, List[Dict]] = {}
+        for c in all_chunks:
+            by_source.setdefault(c["source_file"], []).append(c)
+
+        # Stable order: the same document set gives the same citations
+        return sorted(
+            (
+                _Document(
+                    document_key(chunks, doc_hashes.get(source_file)),
+                    chunks,
+                    build_sections(chunks, self.section_chars),
+                )
+                for source_file, chunks in by_source.items()
+            ),
+            key=lambda d: d.key,
+        )
+
+    def _claim(self, key: str) -> Tuple[Future, bool]:
+        """
+        The future of key's summary text, and whether the caller must
+        compute it (and resolve the future through _fulfil).
+        """
+
+        with self._lock:
+            # In-flight first: results reach the cache before leaving it
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+
+            cached = summary_cache.get(key)
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+                return future, False
+
+            future = Future()
+            self._inflight[key] = future
+
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future, True
+
+    def _forget(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _fulfil(
+        self,
+        key: str,
+        future: Future,
+        compute: Callable[[], str],
+        label: str,
+    ) -> None:
+        try:
+            text = compute()
+        except Exception as e:
+            logger.exception(f"Summarizing {label} failed")
+            future.set_exception(e)
+            return
+
+        summary_cache.put(key, text)
+        future.set_result(text)
+        logger.info(f"Summarized {label}")
+
+    def _map_reduce(self, chunks: List[Dict]) -> str:
+        return self._call(SUMMARY_PROMPT, self._reduce_context(chunks))
+
+    def _reduce_context(self, chunks: List[Dict]) -> str:
+        """
+        Context of a document's final (structured) summary call: its
+        labeled sections, or their partial summaries once merged down
+        to at most `fanin`.
+        """
+
+        sections = build_sections(chunks, self.section_chars)
+        labeled = [
+            f"[Source {i + 1}]\n"
+            + "\n".join(c["text"].strip() for c in section)
+            for i, section in enumerate(sections)
+        ]
+
+        if len(labeled) == 1:
+            # Short document: one structured call
+            return labeled[0]
+
+        partials = self._map(SECTION_PROMPT, labeled)
+        while len(partials) > self.fanin:
+            groups = [
+                "\n\n".join(partials[i : i + self.fanin])
+                for i in range(0, len(partials), self.fanin)
+            ]
+            partials = self._map(MERGE_PROMPT, groups)
+        return "\n\n".join(partials)
+
+    def _map(self, system_prompt: str, contexts: List[str]) -> List[str]:
+        futures = [
+            self._llm_pool.submit(self._call, system_prompt, context)
+            for context in contexts
+        ]
+        return [f.result() for f in futures]
+
+    def _call(self, system_prompt: str, context: str) -> str:
+        return get_llm().invoke(_messages(system_prompt, context)).content.strip()
+
+
+def _messages(system_prompt: str, context: str) -> list:
+    return [
+        SystemMessage(content=f"{system_prompt}\nCONTEXT:\n{context}"),
+        HumanMessage(content="Write the summary."),
+    ]
+
+
+def _compose_context(documents: List[_Document], texts: List[str]) -> str:
+    # [Source X] renumbered to follow the concatenated citations
+    blocks: List[str] = []
+    offset = 0
+
+    for i, (document, text) in enumerate(zip(documents, texts)):
+        blocks.append(f"DOCUMENT {i + 1}:\n{_renumber(text, offset)}")
+        offset += len(document.sections)
+
+    return "\n\n".join(blocks)
+
+
+def _citations(documents: List[_Document]) -> List[Dict]:
+    # Built from the requesting session's chunks: the cached text is
+    # shared by every upload of the same bytes, the source files are not
+    return [
+        _section_citation(section)
+        for document in documents
+        for section in document.sections
+    ]
+
+
+# Singleton instance
+summarizer = DocumentSummarizer()
@@ -0,0 +1,102 @@
+"""
+warmup.py
+
+Why:
+-----
+Importing the app used to load the embedding model and connect to
+Pinecone, so cold starts (HF Spaces, autoscaled pods) could not even
+answer /health until both were done.
+
+How:
+-----
+- Heavy components are lazy singletons (embeddings.get_embedding_backend,
+  vector_store.get_vector_store)
+- At startup a background thread loads them (WARMUP_ON_STARTUP)
+- /health/ is liveness (process up); /health/ready is readiness
+  (components loaded) with per-component status and timings
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import GROQ_API_KEY, WARMUP_ON_STARTUP
+
+
+def _load_embeddings() -> None:
+    from app.services.embeddings import get_embedding_backend
+
+    # One forward pass also initializes kernels / ORT sessions
+    get_embedding_backend().encode(["warm-up"])
+
+
+def _load_vector_store() -> None:
+    from app.db.vector_store import get_vector_store
+
+    get_vector_store()
+
+
+class Warmup:
+    def __init__(self, enabled: bool = WARMUP_ON_STARTUP) -> None:
+        self.enabled = enabled
+        self.components: List[Tuple[str, Callable[[], None]]] = [
+            ("embeddings", _load_embeddings),
+            ("vector_store", _load_vector_store),
+        ]
+        self._state: Dict[str, Dict[str, Any]] = {
+            name: {"status": "pending" if enabled else "lazy"}
+            for name, _ in self.components
+        }
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Loads every component in a background thread (once).
+        """
+
+        with self._lock:
+            if not self.enabled or self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="warmup", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        for name, load in self.components:
+            self._set(name, status="loading")
+            began = time.perf_counter()
+            try:
+                load()
+            except Exception as e:
+                logger.exception(f"Warm-up of {name} failed")
+                self._set(name, status="failed", error=str(e))
+                continue
+
+            seconds = round(time.perf_counter() - began, 3)
+            self._set(name, status="ready", seconds=seconds)
+            logger.info(f"Warm-up: {name} ready in {seconds:.2f}s")
+
+    def _set(self, name: str, **state: Any) -> None:
+        with self._lock:
+            self._state[name] = state
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            components = {name: dict(s) for name, s in self._state.items()}
+
+        # Without warm-up, components load on the first request
+        ready = all(
+            s["status"] in ("ready", "lazy") for s in components.values()
+        )
+        components["llm"] = {
+            "status": "configured" if GROQ_API_KEY else "missing GROQ_API_KEY"
+        }
+        return {"ready": ready, "components": components}
+
+
+# Singleton instance
+warmup = Warmup()
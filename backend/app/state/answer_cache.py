@@ -0,0 +1,212 @@
+"""
+answer_cache.py
+
+Process-wide cache of generated answers.
+
+Why:
+-----
+Users ask the same (or near-identical) questions about the same
+documents, and each one paid for retrieval and a Groq completion.
+
+How:
+-----
+- Keyed by (document-set fingerprint, documents subset, retrieval
+  options) plus the normalized standalone query; the fingerprint is
+  content-derived, so sessions holding the same documents share answers
+  and a session whose documents change stops matching its old entries
+- Optional paraphrase hits: cosine similarity of query embeddings
+  within the same document set (ANSWER_CACHE_SIMILARITY)
+- TTL and LRU bounded; invalidate(fingerprint) drops a document set
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import (
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_SIMILARITY,
+    ANSWER_CACHE_TTL_S,
+)
+
+# (fingerprint, documents subset, retrieval options)
+AnswerGroup = Tuple[str, Hashable, Hashable]
+
+
+def normalize_query(query: str) -> str:
+    """
+    Case, punctuation and whitespace-insensitive form of a query.
+    """
+
+    return " ".join(re.sub(r"[^\w\s]", " ", query.casefold()).split())
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        ttl_s: float = ANSWER_CACHE_TTL_S,
+        similarity: float = ANSWER_CACHE_SIMILARITY,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.similarity = similarity
+        self._clock = clock
+
+        # (group, normalized query) -> {"result", "vector", "cost", "expires"}
+        self._entries: "OrderedDict[Tuple[AnswerGroup, str], Dict]" = (
+            OrderedDict()
+        )
+        # group -> normalized queries (paraphrase candidates)
+        self._groups: Dict[AnswerGroup, Set[str]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.saved_seconds = 0.0
+
+    @property
+    def semantic(self) -> bool:
+        return self.similarity > 0
+
+    def get(
+        self,
+        group: AnswerGroup,
+        query: str,
+        vector: Optional[np.ndarray] = None,
+    ) -> Optional[Dict]:
+        """
+        Cached result for this query (or a paraphrase of it), else None.
+
+        `vector` is the normalized query embedding; without it only exact
+        (normalized) matches are found.
+        """
+
+        normalized = normalize_query(query)
+        now = self._clock()
+
+        with self._lock:
+            key = (group, normalized)
+            entry = self._live(key, now)
+
+            if entry is None and vector is not None and self.semantic:
+                key, entry = self._nearest(group, vector, now)
+                if entry is not None:
+                    self.semantic_hits += 1
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry["cost"]
+            return dict(entry["result"])
+
+    def put(
+        self,
+        group: AnswerGroup,
+        query: str,
+        result: Dict,
+        cost_s: float,
+        vector: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Stores a result; cost_s (retrieval + generation time) is what
+        each later hit saves.
+        """
+
+        key = (group, normalize_query(query))
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = {
+                "result": dict(result),
+                "vector": (
+                    np.asarray(vector, dtype=np.float32)
+                    if vector is not None
+                    else None
+                ),
+                "cost": cost_s,
+                "expires": self._clock() + self.ttl_s,
+            }
+            self._groups.setdefault(group, set()).add(key[1])
+
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._forget(evicted)
+                self.evictions += 1
+
+    def invalidate(self, fingerprint: str) -> int:
+        """
+        Drops every answer computed over this document set.
+        """
+
+        with self._lock:
+            groups = [g for g in self._groups if g[0] == fingerprint]
+            removed = 0
+            for group in groups:
+                for normalized in self._groups.pop(group):
+                    self._entries.pop((group, normalized), None)
+                    removed += 1
+            return removed
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_ms": self.saved_seconds * 1000,
+            }
+
+    def _live(self, key, now: float) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is not None and entry["expires"] <= now:
+            del self._entries[key]
+            self._forget(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def _nearest(self, group: AnswerGroup, vector: np.ndarray, now: float):
+        best_key, best_entry, best_score = None, None, self.similarity
+        vector = np.asarray(vector, dtype=np.float32)
+
+        for normalized in list(self._groups.get(group, ())):
+            key = (group, normalized)
+            entry = self._live(key, now)
+            if entry is None or entry["vector"] is None:
+                continue
+
+            # Query embeddings are L2-normalized: dot product == cosine
+            score = float(np.dot(entry["vector"], vector))
+            if score >= best_score:
+                best_key, best_entry, best_score = key, entry, score
+
+        return best_key, best_entry
+
+    def _forget(self, key) -> None:
+        group, normalized = key
+        queries = self._groups.get(group)
+        if queries is not None:
+            queries.discard(normalized)
+            if not queries:
+                del self._groups[group]
+
+
+# Singleton instance
+answer_cache = AnswerCache()
@@ -0,0 +1,242 @@
+"""
+chunk_table.py
+
+Columnar chunk storage.
+
+Why:
+-----
+Every chunk was a Python dict with four string keys: per chunk a dict,
+a chunk_id string and a text object, which dominates RSS for sessions
+with 100k+ chunks.
+
+How:
+-----
+- ChunkTable keeps one column per field: interned source_file ids,
+  int32 page numbers and chunk indexes, and one UTF-8 text arena with
+  offsets; chunk_id is derived ("{source}_p{page}_c{idx}") unless it
+  does not follow that scheme
+- Rows are read through ChunkView, a two-slot read-only Mapping, so
+  c["text"] / c.get(...) keep working for retrievers, citations and
+  prompt building
+- Append-only: views handed out stay valid while a session grows
+- Rows are indexed by source_file, so selecting documents costs only
+  the rows returned
+"""
+
+import re
+import sys
+import threading
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+FIELDS = ("text", "page_number", "source_file", "chunk_id")
+
+_CHUNK_INDEX = re.compile(r"_c(\d+)$")
+
+# page_number / chunk index of rows that have none
+_MISSING = -1
+
+
+class ChunkView(Mapping):
+    """
+    Read-only dict-like view of one ChunkTable row.
+    """
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "ChunkTable", row: int) -> None:
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key: str) -> Any:
+        return self._table.value(self._row, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.keys(self._row))
+
+    def __len__(self) -> int:
+        return len(self._table.keys(self._row))
+
+    def __repr__(self) -> str:
+        return f"ChunkView({dict(self)!r})"
+
+
+class ChunkTable(Sequence):
+    """
+    Append-only columnar list of chunks; items are ChunkViews.
+    """
+
+    def __init__(self, chunks: Iterable[Mapping] = ()) -> None:
+        self._sources: List[str] = []
+        self._source_ids: Dict[str, int] = {}
+        # source id -> its rows, in table order
+        self._source_rows: List[array] = []
+
+        self._source = array("i")
+        self._page = array("i")
+        self._index = array("i")
+        self._offsets = array("q", [0])
+        self._arena = bytearray()
+
+        # Rare fallbacks: chunk ids off the naming scheme, extra keys
+        self._explicit_ids: Dict[int, str] = {}
+        self._extras: Dict[int, Dict[str, Any]] = {}
+
+        self._lock = threading.Lock()
+        self.extend(chunks)
+
+    # -----------------------------
+    # Sequence
+    # -----------------------------
+    def __len__(self) -> int:
+        return len(self._source)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [ChunkView(self, i) for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("chunk row out of range")
+        return ChunkView(self, row)
+
+    def __iter__(self) -> Iterator[ChunkView]:
+        for row in range(len(self)):
+            yield ChunkView(self, row)
+
+    # -----------------------------
+    # Writes
+    # -----------------------------
+    def extend(self, chunks: Iterable[Mapping]) -> range:
+        """
+        Appends chunks (dicts or views); returns their row range.
+        """
+
+        with self._lock:
+            start = len(self._source)
+            for chunk in chunks:
+                self._append(chunk)
+            return range(start, len(self._source))
+
+    def _append(self, chunk: Mapping) -> None:
+        row = len(self._source)
+        text = chunk.get("text") or ""
+        source = chunk.get("source_file")
+        page = chunk.get("page_number")
+        chunk_id = chunk.get("chunk_id")
+
+        source_id = _MISSING
+        if source is not None:
+            source_id = self._source_ids.get(source, _MISSING)
+            if source_id == _MISSING:
+                source_id = len(self._sources)
+                self._sources.append(sys.intern(source))
+                self._source_ids[self._sources[-1]] = source_id
+                self._source_rows.append(array("i"))
+            self._source_rows[source_id].append(row)
+
+        index = _MISSING
+        if chunk_id is not None:
+            match = _CHUNK_INDEX.search(chunk_id)
+            if match and chunk_id == f"{source}_p{page}_c{match.group(1)}":
+                index = int(match.group(1))
+            else:
+                self._explicit_ids[row] = chunk_id
+
+        extras = {k: v for k, v in chunk.items() if k not in FIELDS}
+        if extras:
+            self._extras[row] = extras
+
+        self._arena += text.encode("utf-8", "surrogatepass")
+        self._offsets.append(len(self._arena))
+        self._source.append(source_id)
+        self._page.append(_MISSING if page is None else page)
+        self._index.append(index)
+
+    # -----------------------------
+    # Reads
+    # -----------------------------
+    def value(self, row: int, key: str) -> Any:
+        if key == "text":
+            start, end = self._offsets[row], self._offsets[row + 1]
+            return self._arena[start:end].decode("utf-8", "surrogatepass")
+
+        if key in FIELDS:
+            if not self._has(row, key):
+                raise KeyError(key)
+            if key == "source_file":
+                return self._sources[self._source[row]]
+            if key == "page_number":
+                return self._page[row]
+            return self._chunk_id(row)
+
+        extras = self._extras.get(row)
+        if extras is not None and key in extras:
+            return extras[key]
+        raise KeyError(key)
+
+    def keys(self, row: int) -> List[str]:
+        keys = [k for k in FIELDS if self._has(row, k)]
+        extras = self._extras.get(row)
+        if extras:
+            keys.extend(extras)
+        return keys
+
+    def source_of(self, row: int) -> Optional[str]:
+        source_id = self._source[row]
+        return None if source_id == _MISSING else self._sources[source_id]
+
+    def rows_for(self, source_files: Iterable[str]) -> List[int]:
+        """
+        Rows of the given source files, in table order.
+        """
+
+        selected = [
+            self._source_rows[self._source_ids[source]]
+            for source in dict.fromkeys(source_files)
+            if source in self._source_ids
+        ]
+        if len(selected) == 1:
+            return selected[0].tolist()
+        return sorted(row for rows in selected for row in rows)
+
+    def row_of(self, chunk: Any) -> Optional[int]:
+        """
+        Row of a view of this table (None for anything else).
+        """
+
+        if isinstance(chunk, ChunkView) and chunk._table is self:
+            return chunk._row
+        return None
+
+    def nbytes(self) -> int:
+        """
+        Approximate footprint of the columns (for cache accounting).
+        """
+
+        columns = (self._source, self._page, self._index, self._offsets)
+        columns += tuple(self._source_rows)
+        return len(self._arena) + sum(
+            c.buffer_info()[1] * c.itemsize for c in columns
+        )
+
+    def _chunk_id(self, row: int) -> str:
+        explicit = self._explicit_ids.get(row)
+        if explicit is not None:
+            return explicit
+
+        page = self._page[row]
+        return (
+            f"{self.source_of(row)}_p{None if page == _MISSING else page}"
+            f"_c{self._index[row]}"
+        )
+
+    def _has(self, row: int, key: str) -> bool:
+        if key == "text":
+            return True
+        if key == "source_file":
+            return self._source[row] != _MISSING
+        if key == "page_number":
+            return self._page[row] != _MISSING
+        return self._index[row] != _MISSING or row in self._explicit_ids
@@ -0,0 +1,93 @@
+"""
+document_registry.py
+
+Process-wide registry of already-ingested PDFs.
+
+Why:
+-----
+Byte-identical uploads were re-parsed, re-chunked and re-indexed.
+
+How:
+-----
+- Keyed by the SHA-256 of the uploaded bytes
+- Holds the processed chunks (as a compact ChunkTable) and their
+  embeddings, so a repeat upload is attached to the new session without
+  pdfplumber or the vector store
+- LRU-bounded by document count
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import DOCUMENT_REGISTRY_MAX_DOCS
+from app.state.chunk_table import ChunkTable
+
+
+class DocumentRegistry:
+    def __init__(self, max_documents: int = DOCUMENT_REGISTRY_MAX_DOCS) -> None:
+        self.max_documents = max_documents
+
+        # sha256 -> {"source_file", "chunks", "vectors"}
+        self._documents: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, doc_hash: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._documents.get(doc_hash)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._documents.move_to_end(doc_hash)
+            self.hits += 1
+            return entry
+
+    def register(
+        self,
+        doc_hash: str,
+        source_file: str,
+        chunks: List[dict],
+        vectors: Optional[List[list[float]]],
+    ) -> ChunkTable:
+        """
+        Registers a processed document; returns its stored chunk table.
+        """
+        table = ChunkTable(chunks)
+
+        with self._lock:
+            self._documents[doc_hash] = {
+                "source_file": source_file,
+                "chunks": table,
+                # One shared float32 matrix; sessions keep row views
+                "vectors": (
+                    np.asarray(vectors, dtype=np.float32)
+                    if vectors is not None
+                    else None
+                ),
+            }
+            self._documents.move_to_end(doc_hash)
+
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+
+        return table
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "documents": len(self._documents),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Singleton instance
+document_registry = DocumentRegistry()
@@ -3,31 +3,177 @@ document_store.py
 
 Session-aware in-memory document store.
 Prevents cross-document and cross-session leakage.
+
+Chunks are kept in a columnar ChunkTable per session; readers get
+dict-like ChunkViews (see chunk_table.py).
+
+Every clear_session starts a new generation of the session: writes made
+for an older generation (e.g. by a cancelled ingest job that was still
+running) are rejected, so stale chunks never leak into a re-upload.
 """
 
-from typing import Dict, List
+import hashlib
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from app.state.answer_cache import answer_cache
+from app.state.chunk_table import ChunkTable
+from app.state.retriever_cache import retriever_cache
+
+
+class SessionSnapshot(NamedTuple):
+    chunks: Sequence[dict]
+    # Row-aligned with chunks, or None if any chunk has no embedding
+    vectors: Optional[np.ndarray]
+    # Session fingerprint the snapshot belongs to (None if not stored)
+    fingerprint: Optional[str]
 
 
 class DocumentStore:
     def __init__(self) -> None:
-        # session_id -> list of document chunks
-        self._store: Dict[str, List[dict]] = {}
+        # session_id -> columnar chunk table
+        self._store: Dict[str, ChunkTable] = {}
+        # session_id -> running digest of chunk ids (see fingerprint_chunks)
+        self._digests: Dict[str, "hashlib._Hash"] = {}
+        # session_id -> float32 embedding (row view) per table row
+        self._vectors: Dict[str, List[Optional[np.ndarray]]] = {}
+        # session_id -> generation, bumped by every clear_session
+        self._generations: Dict[str, int] = {}
+        # session_id -> source_file -> SHA-256 of the uploaded bytes
+        self._doc_hashes: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.RLock()
 
-    def add_chunks(self, session_id: str, chunks: List[dict]) -> None:
+    def generation(self, session_id: str) -> int:
         """
-        Add chunks for a session.
+        Current generation of a session (see add_chunks).
         """
-        if session_id not in self._store:
-            self._store[session_id] = []
+        with self._lock:
+            return self._generations.get(session_id, 0)
 
-        self._store[session_id].extend(chunks)
+    def add_chunks(
+        self,
+        session_id: str,
+        chunks: Sequence[dict],
+        vectors: Optional[List[list[float]]] = None,
+        generation: Optional[int] = None,
+        doc_hash: Optional[str] = None,
+    ) -> bool:
+        """
+        Add chunks (and optionally their embeddings) for a session.
 
-    def get_all_chunks(self, session_id: str) -> List[dict]:
+        With a generation, the chunks are only added if the session has
+        not been cleared since; returns whether they were added.
+        doc_hash: upload hash of the document the chunks belong to.
+        """
+        with self._lock:
+            if (
+                generation is not None
+                and generation != self._generations.get(session_id, 0)
+            ):
+                return False
+
+            if session_id not in self._store:
+                self._store[session_id] = ChunkTable()
+                self._digests[session_id] = hashlib.sha1()
+                self._vectors[session_id] = []
+
+            table = self._store[session_id]
+            rows = table.extend(chunks)
+            chunks = table[rows.start:rows.stop]
+
+            if doc_hash is not None and chunks:
+                hashes = self._doc_hashes.setdefault(session_id, {})
+                hashes[chunks[0]["source_file"]] = doc_hash
+
+            if vectors is not None:
+                vectors = np.asarray(vectors, dtype=np.float32)
+                self._vectors[session_id].extend(vectors)
+            else:
+                self._vectors[session_id].extend([None] * len(rows))
+
+            digest = self._digests[session_id]
+            previous = digest.hexdigest()
+            for c in chunks:
+                digest.update(str(c.get("chunk_id", "")).encode("utf-8"))
+                digest.update(b"\0")
+
+            # Cached retrievers absorb the new chunks instead of refitting
+            retriever_cache.absorb(
+                session_id, previous, digest.hexdigest(), chunks, vectors
+            )
+            self._release(session_id, previous)
+            return True
+
+    def get_all_chunks(self, session_id: str) -> Sequence[dict]:
         """
         Get all chunks for a session.
         """
         return self._store.get(session_id, [])
 
+    def get_vectors(
+        self,
+        session_id: str,
+        chunks: Sequence[dict],
+    ) -> Optional[np.ndarray]:
+        """
+        Contiguous float32 embedding matrix aligned with `chunks`,
+        or None if any chunk has no local embedding.
+        """
+        return self.snapshot(session_id, chunks).vectors
+
+    def snapshot(
+        self,
+        session_id: str,
+        chunks: Sequence[dict],
+    ) -> SessionSnapshot:
+        """
+        `chunks` with their embeddings and the session fingerprint, taken
+        together: the session's own (growing) table is cut at its length
+        under the lock, so rows appended meanwhile are in neither part.
+        """
+        with self._lock:
+            table = self._store.get(session_id)
+            if table is None:
+                return SessionSnapshot(chunks, None, None)
+
+            session_vectors = self._vectors[session_id]
+            fingerprint = self._digests[session_id].copy().hexdigest()
+            if chunks is table:
+                rows = session_vectors[: len(table)]
+
+        if chunks is table:
+            # Append-only: the first len(rows) rows no longer change
+            chunks = table[: len(rows)]
+        else:
+            rows = []
+            for c in chunks:
+                row = table.row_of(c)
+                rows.append(None if row is None else session_vectors[row])
+
+        vectors = None
+        if rows and all(r is not None for r in rows):
+            vectors = np.stack(rows)
+        return SessionSnapshot(chunks, vectors, fingerprint)
+
+    def document_hashes(self, session_id: str) -> Dict[str, str]:
+        """
+        Upload hash of each of the session's documents, by source file.
+        """
+        with self._lock:
+            return dict(self._doc_hashes.get(session_id, {}))
+
+    def fingerprint(self, session_id: str) -> Optional[str]:
+        """
+        Content fingerprint of the session's chunks, or None if empty.
+        """
+        with self._lock:
+            digest = self._digests.get(session_id)
+            if digest is None:
+                return None
+            return digest.copy().hexdigest()
+
     def get_documents(
         self,
         session_id: str,
@@ -36,18 +182,44 @@ class DocumentStore:
         """
         Get chunks belonging to specific documents.
         """
-        chunks = self._store.get(session_id, [])
+        table = self._store.get(session_id)
+        if table is None:
+            return []
+
+        # Per-source row index: cost is the chunks returned
+        return [table[row] for row in table.rows_for(filenames)]
+
+    def clear_session(self, session_id: str) -> int:
+        """
+        Clear all documents for a session; returns its new generation.
+        """
+        with self._lock:
+            fingerprint = self.fingerprint(session_id)
+
+            self._store.pop(session_id, None)
+            self._digests.pop(session_id, None)
+            self._vectors.pop(session_id, None)
+            self._doc_hashes.pop(session_id, None)
+            retriever_cache.invalidate(session_id)
+
+            if fingerprint is not None:
+                self._release(session_id, fingerprint)
 
-        return [
-            c for c in chunks
-            if c.get("source_file") in filenames
-        ]
+            generation = self._generations.get(session_id, 0) + 1
+            self._generations[session_id] = generation
+            return generation
 
-    def clear_session(self, session_id: str) -> None:
+    def _release(self, session_id: str, fingerprint: str) -> None:
         """
-        Clear all documents for a session.
+        Drops cached answers for a document set this session no longer
+        has, unless another session still holds the same documents.
         """
-        self._store.pop(session_id, None)
+        shared = any(
+            other != session_id and digest.hexdigest() == fingerprint
+            for other, digest in self._digests.items()
+        )
+        if not shared:
+            answer_cache.invalidate(fingerprint)
 
 
 # Singleton instance
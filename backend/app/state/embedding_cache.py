@@ -0,0 +1,213 @@
+"""
+embedding_cache.py
+
+Content-addressed embedding cache.
+
+Why:
+-----
+Re-uploaded documents (same text, new uuid filename) were re-embedded
+from scratch; the SentenceTransformer forward pass dominates ingestion.
+
+How:
+-----
+- Key: sha256(model name + normalized chunk text)
+- Tier 1: in-memory LRU of float32 vectors
+- Tier 2: SQLite on disk (survives restarts, shared by all sessions),
+  opened on first use; disk errors are logged and treated as misses
+- Hit/miss counters per tier
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import (
+    EMBEDDING_CACHE_MEMORY_ITEMS,
+    EMBEDDING_CACHE_PATH,
+)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used for cache keys (unicode NFC, collapsed spaces).
+    """
+
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cache_key(text: str, model_name: str) -> str:
+    payload = f"{model_name}\0{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        path: Optional[str] = EMBEDDING_CACHE_PATH,
+        max_memory_items: int = EMBEDDING_CACHE_MEMORY_ITEMS,
+    ) -> None:
+        self.path = path or None
+        self.max_memory_items = max_memory_items
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Disk I/O is serialized on its own lock, so memory hits never
+        # wait for SQLite
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Cached vectors for `keys` (None where missing), memory then disk.
+        """
+
+        results: List[Optional[np.ndarray]] = [None] * len(keys)
+        pending: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    results[i] = vector
+                else:
+                    pending.setdefault(key, []).append(i)
+
+        found = self._disk_lookup(list(pending)) if pending else {}
+
+        with self._lock:
+            for key, vector in found.items():
+                for i in pending.pop(key):
+                    results[i] = vector
+                    self.disk_hits += 1
+                self._remember(key, vector)
+
+            self.misses += sum(len(idx) for idx in pending.values())
+
+        return results
+
+    def put_many(
+        self,
+        keys: Sequence[str],
+        vectors: Sequence[np.ndarray],
+    ) -> None:
+        rows = []
+
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes()))
+
+        if not rows:
+            return
+
+        with self._db_lock:
+            db = self._connect()
+            if db is None:
+                return
+            try:
+                db.executemany(
+                    "INSERT OR IGNORE INTO embeddings (key, vector) "
+                    "VALUES (?, ?)",
+                    rows,
+                )
+                db.commit()
+            except sqlite3.Error:
+                logger.exception("Embedding cache disk write failed")
+                db.rollback()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """
+        Opens the disk tier on first use (call with _db_lock held); the
+        tier is disabled if the file cannot be opened.
+        """
+
+        if self._db is not None or self.path is None:
+            return self._db
+
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            db.commit()
+        except (OSError, sqlite3.Error):
+            logger.exception(
+                f"Embedding cache disk tier disabled ({self.path})"
+            )
+            self.path = None
+            return None
+
+        self._db = db
+        return db
+
+    def _disk_lookup(
+        self,
+        keys: List[str],
+        batch: int = 500,
+    ) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+
+        with self._db_lock:
+            db = self._connect()
+            if db is None:
+                return found
+
+            try:
+                for i in range(0, len(keys), batch):
+                    part = keys[i : i + batch]
+                    placeholders = ",".join("?" * len(part))
+                    rows = db.execute(
+                        "SELECT key, vector FROM embeddings "
+                        f"WHERE key IN ({placeholders})",
+                        part,
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = np.frombuffer(blob, dtype=np.float32)
+            except sqlite3.Error:
+                logger.exception("Embedding cache disk lookup failed")
+
+        return found
+
+
+# Singleton instance
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,220 @@
+"""
+retriever_cache.py
+
+Per-session cache of fitted retrievers.
+
+Why:
+-----
+Fitting BM25 over every session chunk on each /chat turn makes
+latency grow with corpus size even when nothing has changed.
+
+How:
+-----
+- Keyed by (session_id, content fingerprint, documents subset)
+- LRU eviction bounded by entry count and estimated memory
+- New chunks are folded into cached retrievers incrementally;
+  clear_session invalidates
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from app.core.config import (
+    RETRIEVER_CACHE_MAX_BYTES,
+    RETRIEVER_CACHE_MAX_ENTRIES,
+)
+from app.services.retriever import HybridRetriever
+
+
+CacheKey = Tuple[str, str, Optional[Tuple[str, ...]]]
+# (chunks, embeddings aligned with them or None, their fingerprint)
+Snapshot = Tuple[Sequence[dict], Optional[np.ndarray], str]
+
+
+def fingerprint_chunks(chunks: List[dict]) -> str:
+    """
+    Content fingerprint of a chunk list (order-sensitive).
+    """
+
+    digest = hashlib.sha1()
+    for c in chunks:
+        digest.update(str(c.get("chunk_id", "")).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _estimate_bytes(
+    chunks: List[dict],
+    vectors: Optional[np.ndarray] = None,
+) -> int:
+    """
+    Rough retriever footprint: raw text plus tokenized BM25 corpus,
+    plus the dense matrix when present.
+    """
+
+    size = sum(len(c.get("text", "")) for c in chunks) * 4
+    if vectors is not None:
+        size += np.asarray(vectors, dtype=np.float32).nbytes
+    return size
+
+
+class RetrieverCache:
+    def __init__(
+        self,
+        max_entries: int = RETRIEVER_CACHE_MAX_ENTRIES,
+        max_bytes: int = RETRIEVER_CACHE_MAX_BYTES,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # key -> (retriever, estimated bytes)
+        self._entries: "OrderedDict[CacheKey, Tuple[HybridRetriever, int]]" = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(
+        self,
+        session_id: str,
+        chunks: Sequence[dict],
+        fingerprint: str,
+        documents: Optional[List[str]] = None,
+        load: Optional[Callable[[], Snapshot]] = None,
+    ) -> HybridRetriever:
+        """
+        Return a cached retriever for this chunk set, fitting one on miss.
+
+        load is only called on a miss and should return a consistent
+        (chunks, aligned embeddings or None, fingerprint) snapshot of
+        `chunks` to fit; a snapshot of a newer fingerprint is not cached
+        under this one.
+        """
+
+        key: CacheKey = (
+            session_id,
+            fingerprint,
+            tuple(sorted(set(documents))) if documents else None,
+        )
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Fit outside the lock so other sessions are not blocked
+        vectors, current = None, fingerprint
+        if load is not None:
+            chunks, vectors, current = load()
+        retriever = HybridRetriever(chunks, vectors)
+        size = _estimate_bytes(chunks, vectors)
+
+        if current == fingerprint:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = (retriever, size)
+                    self._bytes += size
+                    self._evict()
+
+        logger.info(
+            f"[{session_id}] Retriever cache miss, fitted "
+            f"{len(chunks)} chunks"
+        )
+        return retriever
+
+    def absorb(
+        self,
+        session_id: str,
+        fingerprint: str,
+        new_fingerprint: str,
+        chunks: List[dict],
+        vectors: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Fold chunks appended to a session into its cached retrievers
+        and re-key them under the new fingerprint.
+        """
+
+        with self._lock:
+            keys = [k for k in self._entries if k[0] == session_id]
+
+            for key in keys:
+                retriever, size = self._entries.pop(key)
+                self._bytes -= size
+
+                if key[1] != fingerprint:
+                    continue
+
+                documents = key[2]
+                keep = [
+                    i for i, c in enumerate(chunks)
+                    if documents is None
+                    or c.get("source_file") in documents
+                ]
+                if keep:
+                    relevant = [chunks[i] for i in keep]
+                    relevant_vectors = (
+                        np.asarray(vectors, dtype=np.float32)[keep]
+                        if vectors is not None
+                        else None
+                    )
+                    retriever.add_chunks(relevant, relevant_vectors)
+                    size += _estimate_bytes(relevant, relevant_vectors)
+
+                self._entries[(session_id, new_fingerprint, documents)] = (
+                    retriever,
+                    size,
+                )
+                self._bytes += size
+
+            self._evict()
+
+    def invalidate(self, session_id: str) -> None:
+        """
+        Drop every cached retriever belonging to a session.
+        """
+
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == session_id]
+            for key in stale:
+                _, size = self._entries.pop(key)
+                self._bytes -= size
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "estimated_bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _evict(self) -> None:
+        # Always keep the most recent entry, even if it alone exceeds the
+        # byte budget; otherwise large sessions would never be cached.
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries
+            or self._bytes > self.max_bytes
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+
+# Singleton instance
+retriever_cache = RetrieverCache()
@@ -0,0 +1,67 @@
+"""
+summary_cache.py
+
+Process-wide cache of map-reduce summaries.
+
+Why:
+-----
+Summarizing a long document takes dozens of LLM calls; the result only
+depends on the document's content.
+
+How:
+-----
+- Keyed by document hash (per-document summaries) or by the sorted
+  hashes of a multi-document set (composed summaries)
+- LRU-bounded by entry count
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.core.config import SUMMARY_CACHE_MAX_ENTRIES
+
+
+class SummaryCache:
+    def __init__(self, max_entries: int = SUMMARY_CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+
+        # key -> summary text (citations are built per session)
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Singleton instance
+summary_cache = SummaryCache()
@@ -1,3 +1,44 @@
 """
 Utility helper functions.
 """
+
+import json
+from typing import Any, AsyncIterator, Tuple
+
+from fastapi.responses import StreamingResponse
+from loguru import logger
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    One Server-Sent Events frame with a JSON payload.
+    """
+
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(
+    events: AsyncIterator[Tuple[str, Any]],
+    error_detail: str = "Failed to generate response",
+) -> StreamingResponse:
+    """
+    Streams (event, data) pairs as text/event-stream.
+
+    Failures after the headers are sent end the stream with an "error"
+    event instead of a status code.
+    """
+
+    async def frames():
+        try:
+            async for event, data in events:
+                yield sse_event(event, data)
+        except Exception:
+            logger.exception(error_detail)
+            yield sse_event("error", {"detail": error_detail})
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        # No caching / proxy buffering: tokens must reach the client now
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
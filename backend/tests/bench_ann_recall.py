@@ -0,0 +1,100 @@
+"""
+bench_ann_recall.py
+
+Why:
+-----
+Reports recall@k and latency of the IVF-flat index against exact
+brute-force search, to pick ANN_NPROBE / ANN_NLIST for a deployment.
+
+Usage:
+------
+python tests/bench_ann_recall.py --size 200000 --nprobe 1 4 8 16 32
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.db.ivf_index import IVFFlatIndex
+from app.services.dense_index import DenseIndex
+
+
+def make_vectors(n: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """
+    Clustered Gaussian vectors, a rough stand-in for chunk embeddings.
+    """
+
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=n)
+    noise = rng.normal(size=(n, dim))
+    return (centers[labels] + 0.5 * noise).astype(np.float32)
+
+
+def run_benchmark(args):
+    print("\n[BENCH] IVF-flat recall@k vs exact search\n")
+
+    data = make_vectors(args.size, args.dim, args.clusters, seed=0)
+    queries = make_vectors(args.queries, args.dim, args.clusters, seed=1)
+
+    exact = DenseIndex(args.dim, args.size)
+    exact.add(data)
+
+    start = time.perf_counter()
+    ivf = IVFFlatIndex(
+        args.dim,
+        args.size,
+        nlist=args.nlist,
+        train_threshold=args.size,
+    )
+    ivf.add(data)
+    print(
+        f"Vectors: {args.size}  dim: {args.dim}  "
+        f"lists: {len(ivf.centroids)}  "
+        f"build: {time.perf_counter() - start:.1f}s\n"
+    )
+
+    start = time.perf_counter()
+    truth = [set(exact.search(q, args.k)[0].tolist()) for q in queries]
+    exact_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+    print(f"{'nprobe':>7} | {'recall@' + str(args.k):>10} | {'ms/query':>9} | {'speedup':>8}")
+    print("-" * 45)
+    print(f"{'exact':>7} | {1.0:>10.3f} | {exact_ms:>9.2f} | {'1.0x':>8}")
+
+    for nprobe in args.nprobe:
+        start = time.perf_counter()
+        found = [
+            set(ivf.search(q, args.k, nprobe=nprobe)[0].tolist())
+            for q in queries
+        ]
+        ms = (time.perf_counter() - start) / len(queries) * 1000
+        recall = np.mean(
+            [len(f & t) / args.k for f, t in zip(found, truth)]
+        )
+        print(
+            f"{nprobe:>7} | {recall:>10.3f} | {ms:>9.2f} "
+            f"| {exact_ms / ms:>7.1f}x"
+        )
+
+    print("\n[BENCH] Done\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--nlist", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32]
+    )
+    run_benchmark(parser.parse_args())
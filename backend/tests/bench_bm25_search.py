@@ -0,0 +1,111 @@
+"""
+bench_bm25_search.py
+
+Why:
+-----
+Measures query latency of the sparse BM25 index (postings-only scoring
++ argpartition top-k) against the previous BM25Okapi.get_scores +
+full argsort path.
+
+Usage:
+------
+python tests/bench_bm25_search.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.services.bm25_index import BM25Index
+
+
+def make_corpus(n_docs: int, doc_len: int, vocab: int, seed: int = 0):
+    """
+    Zipf-distributed synthetic chunks (~800 chars each by default).
+    """
+
+    rng = np.random.default_rng(seed)
+    ids = rng.zipf(1.2, size=(n_docs, doc_len)) % vocab
+    return [[f"w{t}" for t in row] for row in ids]
+
+
+def make_queries(n_queries: int, vocab: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    return [
+        [f"w{t}" for t in rng.zipf(1.2, size=rng.integers(3, 9)) % vocab]
+        for _ in range(n_queries)
+    ]
+
+
+def time_queries(search, queries) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        search(q)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def run_benchmark(args):
+    print("\n[BENCH] BM25 search: BM25Okapi+argsort vs sparse index\n")
+    print(
+        f"{'chunks':>10} | {'okapi ms/q':>11} | {'sparse ms/q':>11} "
+        f"| {'speedup':>8}"
+    )
+    print("-" * 52)
+
+    queries = make_queries(args.queries, args.vocab)
+
+    for size in args.sizes:
+        corpus = make_corpus(size, args.doc_len, args.vocab)
+
+        index = BM25Index()
+        for doc in corpus:
+            index.add_document(doc)
+        sparse_ms = time_queries(
+            lambda q: index.top_k(q, args.top_k), queries
+        )
+
+        if size <= args.baseline_max:
+            okapi = BM25Okapi(corpus)
+            okapi_ms = time_queries(
+                lambda q: np.argsort(okapi.get_scores(q))[::-1][: args.top_k],
+                queries,
+            )
+            del okapi
+            print(
+                f"{size:>10} | {okapi_ms:>11.2f} | {sparse_ms:>11.2f} "
+                f"| {okapi_ms / sparse_ms:>7.1f}x"
+            )
+        else:
+            print(
+                f"{size:>10} | {'skipped':>11} | {sparse_ms:>11.2f} "
+                f"| {'-':>8}"
+            )
+
+        del corpus, index
+
+    print("\n[BENCH] Done\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--doc-len", type=int, default=130)
+    parser.add_argument("--vocab", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=12)
+    parser.add_argument(
+        "--baseline-max",
+        type=int,
+        default=1_000_000,
+        help="Skip BM25Okapi above this size (it holds a dict per chunk)",
+    )
+    run_benchmark(parser.parse_args())
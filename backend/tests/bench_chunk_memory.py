@@ -0,0 +1,126 @@
+"""
+bench_chunk_memory.py
+
+Why:
+-----
+Compares the memory held by a session's chunks as a list of dicts (the
+old DocumentStore layout) against the columnar ChunkTable, and the
+cost of reading them back through ChunkViews.
+
+Chunks are real chunker output of the given PDFs, repeated under new
+file names until --chunks is reached (as a session with many uploads).
+Memory is measured with tracemalloc around building each layout.
+
+Usage:
+------
+python tests/bench_chunk_memory.py --pdf uploaded_docs/HPC.pdf --chunks 100000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.services.chunker import chunk_pages
+from app.services.pdf_loader import load_pdf
+from app.state.chunk_table import ChunkTable
+
+
+def synthetic_session(template, count):
+    """
+    Fresh chunk dicts (own strings, as parsing creates them) cycling
+    over the template chunks under a new file name per pass.
+    """
+
+    chunks = []
+    copy = 0
+    while len(chunks) < count:
+        source_file = f"{copy:08d}-upload.pdf"
+        for c in template:
+            idx = c["chunk_id"].rsplit("_c", 1)[1]
+            chunks.append(
+                {
+                    "text": "".join(list(c["text"])),
+                    "page_number": c["page_number"],
+                    "source_file": "".join(list(source_file)),
+                    "chunk_id": f"{source_file}_p{c['page_number']}_c{idx}",
+                }
+            )
+            if len(chunks) == count:
+                break
+        copy += 1
+    return chunks
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    value = build()
+    gc.collect()
+    used = sum(
+        stat.size_diff
+        for stat in tracemalloc.take_snapshot().compare_to(start, "filename")
+    )
+    tracemalloc.stop()
+    return value, used
+
+
+def read_all(chunks):
+    started = time.perf_counter()
+    total = 0
+    for c in chunks:
+        total += len(c["text"]) + (c.get("page_number") or 0)
+        total += len(c["chunk_id"]) + len(c["source_file"])
+    return time.perf_counter() - started
+
+
+def run_benchmark(args):
+    template = []
+    for pdf in args.pdf:
+        template.extend(chunk_pages(load_pdf(pdf, workers=1)))
+
+    dicts, dict_bytes = measure(
+        lambda: synthetic_session(template, args.chunks)
+    )
+    table, table_bytes = measure(lambda: ChunkTable(dicts))
+
+    assert [dict(c) for c in table[:50]] == dicts[:50]
+
+    dict_read = read_all(dicts)
+    table_read = read_all(table)
+
+    n = len(dicts)
+    print(
+        f"\n[BENCH] Chunk storage: {n} chunks "
+        f"({len(template)} template chunks from {len(args.pdf)} PDF(s))\n"
+    )
+    print(f"{'layout':>14} | {'MiB':>8} | {'B/chunk':>8} | {'read s':>7}")
+    print("-" * 47)
+    print(
+        f"{'list of dicts':>14} | {dict_bytes / 2**20:>8.1f} | "
+        f"{dict_bytes / n:>8.0f} | {dict_read:>7.3f}"
+    )
+    print(
+        f"{'ChunkTable':>14} | {table_bytes / 2**20:>8.1f} | "
+        f"{table_bytes / n:>8.0f} | {table_read:>7.3f}"
+    )
+    print(f"\nMemory saved: {1 - table_bytes / dict_bytes:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--pdf",
+        nargs="+",
+        default=[os.path.join(PROJECT_ROOT, "tests", "sample.pdf")],
+    )
+    parser.add_argument("--chunks", type=int, default=100_000)
+    args = parser.parse_args()
+
+    run_benchmark(args)
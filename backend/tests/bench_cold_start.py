@@ -0,0 +1,102 @@
+"""
+bench_cold_start.py
+
+Why:
+-----
+Measures how long a fresh process takes before the app can answer
+/health (importing app.main), against the eager start-up the app used
+to do (import + embedding model + vector store), and lists the slowest
+imports from `python -X importtime`.
+
+Each measurement runs in a fresh interpreter, so nothing is cached.
+
+Usage:
+------
+python tests/bench_cold_start.py --runs 3 --top 15
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+LAZY = "import app.main"
+EAGER = (
+    "import app.main\n"
+    "from app.services.embeddings import get_embedding_backend\n"
+    "from app.db.vector_store import get_vector_store\n"
+    "get_embedding_backend().encode(['warm-up'])\n"
+    "get_vector_store()\n"
+)
+
+
+def time_script(code: str, runs: int):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1:]
+            return None, error[0] if error else "failed"
+        best = min(best, elapsed)
+    return best, None
+
+
+def slowest_imports(top: int):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", LAZY],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+
+    # Per root package, the outermost import carries the total cost
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        root = name.strip().split(".")[0]
+        if root != "app":
+            packages[root] = max(packages.get(root, 0), int(cumulative_us))
+
+    rows = sorted(((us, name) for name, us in packages.items()), reverse=True)
+    return rows[:top]
+
+
+def run_benchmark(args):
+    print("\n[BENCH] Cold start (best of %d fresh processes)\n" % args.runs)
+
+    lazy_s, _ = time_script(LAZY, args.runs)
+    eager_s, eager_error = time_script(EAGER, args.runs)
+
+    print(f"{'start-up':>32} | {'seconds':>8}")
+    print("-" * 45)
+    print(f"{'import app.main (/health ready)':>32} | {lazy_s:>8.2f}")
+    if eager_s is None:
+        print(f"{'eager (model + vector store)':>32} | n/a ({eager_error})")
+    else:
+        print(f"{'eager (model + vector store)':>32} | {eager_s:>8.2f}")
+        print(f"\nLiveness is available {eager_s / lazy_s:.1f}x sooner")
+
+    print("\nSlowest packages imported by app.main:\n")
+    for cumulative_us, name in slowest_imports(args.top):
+        print(f"{cumulative_us / 1000:>9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    run_benchmark(args)
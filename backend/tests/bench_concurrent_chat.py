@@ -0,0 +1,125 @@
+"""
+bench_concurrent_chat.py
+
+Why:
+-----
+Load test for the async request path: /chat/ awaits the LLM (ainvoke)
+and runs retrieval on an executor, so concurrent requests should overlap
+instead of queueing behind each other. Throughput should grow with
+concurrency until the LLM (or CPU for retrieval) saturates.
+
+Uploads one PDF into a fresh session against a running server, waits
+for ingestion, then fires `--requests` chat requests at each
+concurrency level and reports req/s and p50/p95 latency.
+
+Usage:
+------
+uvicorn app.main:app --port 8000
+python tests/bench_concurrent_chat.py --url http://127.0.0.1:8000 --concurrency 1 4 16 32
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+import httpx
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+QUESTIONS = [
+    "What is this document about?",
+    "Summarize the main findings.",
+    "Which dates are mentioned?",
+    "What are the key technical terms?",
+]
+
+
+async def upload(client: httpx.AsyncClient, pdf: str) -> str:
+    session_id = f"bench-{uuid.uuid4().hex[:8]}"
+    with open(pdf, "rb") as f:
+        response = await client.post(
+            "/upload/upload",
+            params={"session_id": session_id, "wait": "true"},
+            files={"files": (os.path.basename(pdf), f, "application/pdf")},
+        )
+    response.raise_for_status()
+    return session_id
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    session_id: str,
+    concurrency: int,
+    requests: int,
+):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(
+                "/chat/",
+                json={
+                    "session_id": session_id,
+                    "question": QUESTIONS[i % len(QUESTIONS)],
+                },
+            )
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    return requests / elapsed, statistics.median(latencies), p95, errors
+
+
+async def run_benchmark(args):
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(
+        base_url=args.url, limits=limits, timeout=args.timeout
+    ) as client:
+        session_id = await upload(client, args.pdf)
+
+        print(f"\n[BENCH] Concurrent /chat/ ({args.requests} requests per level)\n")
+        print(
+            f"{'concurrency':>11} | {'req/s':>7} | {'p50 ms':>8} | "
+            f"{'p95 ms':>8} | {'errors':>6}"
+        )
+        print("-" * 53)
+
+        baseline = None
+        for concurrency in args.concurrency:
+            rate, p50, p95, errors = await run_level(
+                client, session_id, concurrency, args.requests
+            )
+            baseline = baseline or rate
+            print(
+                f"{concurrency:>11} | {rate:>7.2f} | {p50 * 1000:>8.0f} | "
+                f"{p95 * 1000:>8.0f} | {errors:>6}   ({rate / baseline:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--pdf", default=os.path.join(PROJECT_ROOT, "tests", "sample.pdf")
+    )
+    parser.add_argument(
+        "--concurrency", nargs="+", type=int, default=[1, 4, 16, 32]
+    )
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args))
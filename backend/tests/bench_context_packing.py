@@ -0,0 +1,108 @@
+"""
+bench_context_packing.py
+
+Why:
+-----
+Compares prompt context size per /chat turn: the old packing (first 15
+retrieved chunks, whatever their length or overlap) against the token
+budget packer (same-page merge, near-duplicate drop, greedy budget).
+
+Retrieval is BM25-only over the given PDFs with the same top_k as chat.
+Token counts use tiktoken (CONTEXT_TOKENIZER) when its encoding can be
+loaded, else the packer's 4-characters-per-token estimate.
+
+Usage:
+------
+python tests/bench_context_packing.py --pdf uploaded_docs/HPC.pdf --budget 3000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.core.config import LLM_CONTEXT_BUDGET
+from app.services.chunker import chunk_pages
+from app.services.context_packer import (
+    count_tokens,
+    pack_context,
+    render_context,
+)
+from app.services.pdf_loader import load_pdf
+from app.services.retriever import HybridRetriever
+
+DEFAULT_QUERIES = [
+    "What is this document about?",
+    "Summarize the main findings",
+    "Which dates and deadlines are mentioned?",
+    "What metrics or numbers are reported?",
+    "Who are the authors or parties involved?",
+    "What are the key technical terms and definitions?",
+    "What conclusions are drawn?",
+    "Which requirements or constraints are listed?",
+]
+
+
+def old_context(evidence):
+    blocks = [
+        (item.get("metadata", item).get("text") or "").strip()
+        for item in evidence
+    ]
+    blocks = [b for b in blocks if b][:15]
+    return "\n\n".join(
+        f"[Source {i + 1}]\n{text}" for i, text in enumerate(blocks)
+    )
+
+
+def new_context(evidence, budget):
+    return render_context(pack_context(evidence, budget))
+
+
+def run_benchmark(args):
+    chunks = []
+    for pdf in args.pdf:
+        chunks.extend(chunk_pages(load_pdf(pdf, workers=1)))
+
+    retriever = HybridRetriever(chunks)
+
+    before, after = [], []
+    for query in args.queries:
+        evidence = retriever.search(query, top_k=args.top_k)
+        before.append(count_tokens(old_context(evidence)))
+        after.append(count_tokens(new_context(evidence, args.budget)))
+
+    print(
+        f"\n[BENCH] Context packing: {len(chunks)} chunks, "
+        f"{len(args.queries)} queries, top_k={args.top_k}, "
+        f"budget={args.budget}\n"
+    )
+    print(f"{'packing':>14} | {'mean tok':>8} | {'max tok':>8}")
+    print("-" * 37)
+    print(
+        f"{'15 blocks':>14} | {statistics.mean(before):>8.0f} | "
+        f"{max(before):>8}"
+    )
+    print(
+        f"{'token budget':>14} | {statistics.mean(after):>8.0f} | "
+        f"{max(after):>8}"
+    )
+    saved = 1 - sum(after) / max(1, sum(before))
+    print(f"\nPrompt context tokens saved: {saved:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--pdf",
+        nargs="+",
+        default=[os.path.join(PROJECT_ROOT, "tests", "sample.pdf")],
+    )
+    parser.add_argument("--queries", nargs="+", default=DEFAULT_QUERIES)
+    parser.add_argument("--top-k", type=int, default=12)
+    parser.add_argument("--budget", type=int, default=LLM_CONTEXT_BUDGET)
+    args = parser.parse_args()
+
+    run_benchmark(args)
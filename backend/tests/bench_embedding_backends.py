@@ -0,0 +1,133 @@
+"""
+bench_embedding_backends.py
+
+Why:
+-----
+Compares embedding backends (fp32 torch, int8 torch, ONNX Runtime) on
+real chunks: load time, embeddings/sec, resident memory and cosine
+agreement with the fp32 baseline. Each backend runs in a fresh process
+so RSS numbers do not bleed into each other.
+
+Usage:
+------
+python tests/bench_embedding_backends.py --pdf uploaded_docs/HPC.pdf --backends torch torch-int8 onnx
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+import numpy as np
+
+from app.services.embedding_backends import BACKENDS, create_embedding_backend
+from app.services.embedding_service import pack_by_token_budget
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Peak instead of current where /proc is unavailable (KB on Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(backend_name, model_name, onnx_file, texts, token_budget, rounds):
+    before = rss_mb()
+    start = time.perf_counter()
+    backend = create_embedding_backend(backend_name, model_name, onnx_file)
+    load_s = time.perf_counter() - start
+
+    batches = pack_by_token_budget(backend.token_lengths(texts), token_budget)
+    backend.encode(texts[:8])  # warm-up
+
+    vectors = np.empty((len(texts), 0), dtype=np.float32)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        rows = [None] * len(texts)
+        for batch in batches:
+            encoded = backend.encode([texts[i] for i in batch])
+            for i, row in zip(batch, encoded):
+                rows[i] = row
+        vectors = np.stack(rows)
+    rate = rounds * len(texts) / (time.perf_counter() - start)
+
+    return load_s, rate, rss_mb() - before, rss_mb(), vectors
+
+
+def run_benchmark(args):
+    from app.services.chunker import chunk_pages
+    from app.services.pdf_loader import load_pdf
+
+    texts = []
+    for pdf in args.pdf:
+        texts.extend(c["text"] for c in chunk_pages(load_pdf(pdf, workers=1)))
+    texts = texts[: args.limit]
+
+    print(f"\n[BENCH] Embedding backends: {len(texts)} chunks, {args.model}\n")
+    print(
+        f"{'backend':>11} | {'load s':>6} | {'emb/sec':>8} | "
+        f"{'+RSS MB':>7} | {'RSS MB':>7} | {'min cos':>7}"
+    )
+    print("-" * 62)
+
+    ctx = multiprocessing.get_context("spawn")
+    baseline = None
+
+    for name in args.backends:
+        with ctx.Pool(1) as pool:
+            try:
+                load_s, rate, delta, rss, vectors = pool.apply(
+                    measure,
+                    (
+                        name,
+                        args.model,
+                        args.onnx_file,
+                        texts,
+                        args.token_budget,
+                        args.rounds,
+                    ),
+                )
+            except Exception as e:
+                print(f"{name:>11} | unavailable: {e}")
+                continue
+
+        if baseline is None and name == "torch":
+            baseline = vectors
+        cosine = (
+            float(np.min(np.sum(vectors * baseline, axis=1)))
+            if baseline is not None
+            else float("nan")
+        )
+
+        print(
+            f"{name:>11} | {load_s:>6.2f} | {rate:>8.1f} | "
+            f"{delta:>7.0f} | {rss:>7.0f} | {cosine:>7.4f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--pdf",
+        nargs="+",
+        default=[os.path.join(PROJECT_ROOT, "tests", "sample.pdf")],
+    )
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--onnx-file", default=None)
+    parser.add_argument("--limit", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--token-budget", type=int, default=8192)
+    args = parser.parse_args()
+
+    run_benchmark(args)
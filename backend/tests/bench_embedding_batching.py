@@ -0,0 +1,161 @@
+"""
+bench_embedding_batching.py
+
+Why:
+-----
+Compares embedding batch plans on real chunk length distributions:
+
+- before: 50 chunks per call in document order (old index_chunks),
+  split by SentenceTransformer into batches of 32
+- after: requests sorted by length, sliced into EMBEDDING_MAX_BATCH
+  texts and packed by EMBEDDING_TOKEN_BUDGET padded tokens
+
+Reports padding waste (padded tokens that carry no text) and, when
+sentence-transformers is installed, embeddings/sec.
+
+Usage:
+------
+python tests/bench_embedding_batching.py --pdf uploaded_docs/HPC.pdf uploaded_docs/LLM_Blog.pdf
+"""
+
+import argparse
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.core.config import (
+    EMBEDDING_MAX_BATCH,
+    EMBEDDING_MODEL,
+    EMBEDDING_TOKEN_BUDGET,
+)
+from app.services.chunker import chunk_pages
+from app.services.embedding_service import pack_by_token_budget
+from app.services.pdf_loader import load_pdf
+
+
+def before_plan(lengths, call_size: int, model_batch: int):
+    """
+    Old path: fixed-size calls in document order; the model length-sorts
+    inside each call and cuts it into `model_batch` pieces.
+    """
+
+    plan = []
+    for start in range(0, len(lengths), call_size):
+        call = sorted(
+            range(start, min(start + call_size, len(lengths))),
+            key=lengths.__getitem__,
+        )
+        for i in range(0, len(call), model_batch):
+            plan.append(call[i : i + model_batch])
+    return plan
+
+
+def after_plan(lengths, request_size: int, max_batch: int, token_budget: int):
+    plan = []
+    for start in range(0, len(lengths), request_size):
+        request = sorted(
+            range(start, min(start + request_size, len(lengths))),
+            key=lengths.__getitem__,
+        )
+        for i in range(0, len(request), max_batch):
+            part = request[i : i + max_batch]
+            for batch in pack_by_token_budget(
+                [lengths[j] for j in part], token_budget
+            ):
+                plan.append([part[j] for j in batch])
+    return plan
+
+
+def padding_waste(plan, lengths):
+    real = padded = 0
+    for batch in plan:
+        sizes = [lengths[i] for i in batch]
+        real += sum(sizes)
+        padded += len(sizes) * max(sizes)
+    return 1 - real / padded, padded
+
+
+def run_benchmark(args):
+    chunks = []
+    for pdf in args.pdf:
+        chunks.extend(chunk_pages(load_pdf(pdf, workers=1)))
+    texts = [c["text"] for c in chunks]
+
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        model = None
+        # ~4 characters per WordPiece token, plus [CLS]/[SEP]
+        lengths = [len(t) // 4 + 2 for t in texts]
+        print("sentence-transformers not installed: approximate tokens")
+    else:
+        model = SentenceTransformer(EMBEDDING_MODEL)
+        lengths = [
+            len(ids)
+            for ids in model.tokenizer(
+                texts,
+                add_special_tokens=True,
+                truncation=True,
+                max_length=model.max_seq_length,
+            )["input_ids"]
+        ]
+
+    plans = {
+        "before": before_plan(lengths, args.call_size, args.model_batch),
+        "after": after_plan(
+            lengths, args.request_size, args.max_batch, args.token_budget
+        ),
+    }
+
+    print(
+        f"\n[BENCH] Embedding batching: {len(texts)} chunks, "
+        f"mean {sum(lengths) / len(lengths):.0f} tokens, "
+        f"max {max(lengths)} tokens\n"
+    )
+    print(
+        f"{'plan':>8} | {'batches':>7} | {'padded tok':>10} | "
+        f"{'waste':>6} | {'emb/sec':>8}"
+    )
+    print("-" * 52)
+
+    for name, plan in plans.items():
+        waste, padded = padding_waste(plan, lengths)
+
+        rate = float("nan")
+        if model is not None:
+            model.encode(texts[: args.model_batch])  # warm-up
+            start = time.perf_counter()
+            for batch in plan:
+                model.encode(
+                    [texts[i] for i in batch],
+                    batch_size=len(batch),
+                    normalize_embeddings=True,
+                )
+            rate = len(texts) / (time.perf_counter() - start)
+
+        print(
+            f"{name:>8} | {len(plan):>7} | {padded:>10} | "
+            f"{waste:>5.1%} | {rate:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--pdf",
+        nargs="+",
+        default=[os.path.join(PROJECT_ROOT, "tests", "sample.pdf")],
+    )
+    parser.add_argument("--call-size", type=int, default=50)
+    parser.add_argument("--model-batch", type=int, default=32)
+    parser.add_argument("--request-size", type=int, default=256)
+    parser.add_argument("--max-batch", type=int, default=EMBEDDING_MAX_BATCH)
+    parser.add_argument(
+        "--token-budget", type=int, default=EMBEDDING_TOKEN_BUDGET
+    )
+    args = parser.parse_args()
+
+    run_benchmark(args)
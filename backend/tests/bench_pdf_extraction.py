@@ -0,0 +1,86 @@
+"""
+bench_pdf_extraction.py
+
+Why:
+-----
+Measures PDF extraction throughput (pages/sec) of each extraction
+engine on the serial path, and of page-sharded process-pool extraction.
+
+Usage:
+------
+python tests/bench_pdf_extraction.py --pdf uploaded_docs/HPC.pdf --workers 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.services.pdf_loader import ENGINES, load_pdf
+
+
+def time_load(pdf_path: str, **kwargs):
+    start = time.perf_counter()
+    pages = load_pdf(pdf_path, **kwargs)
+    return pages, time.perf_counter() - start
+
+
+def run_benchmark(args):
+    print(f"\n[BENCH] PDF extraction throughput: {args.pdf}\n")
+
+    print(f"{'mode':>22} | {'seconds':>8} | {'pages/sec':>9} | {'speedup':>8}")
+    print("-" * 58)
+
+    baseline_s = None
+    for engine in ENGINES[::-1]:
+        pages, seconds = time_load(args.pdf, workers=1, engine=engine)
+        baseline_s = baseline_s or seconds  # pdfplumber runs first
+        label = f"serial {engine}"
+        print(
+            f"{label:>22} | {seconds:>8.2f} | {len(pages) / seconds:>9.1f} "
+            f"| {baseline_s / seconds:>7.1f}x"
+        )
+
+    serial_pages, _ = time_load(
+        args.pdf, workers=1, engine=args.engine
+    )
+    n = len(serial_pages)
+
+    for workers in args.workers:
+        # Warm the pool so process start-up is not billed to one run
+        load_pdf(
+            args.pdf,
+            workers=workers,
+            pages_per_task=args.pages_per_task,
+            engine=args.engine,
+        )
+
+        pages, seconds = time_load(
+            args.pdf,
+            workers=workers,
+            pages_per_task=args.pages_per_task,
+            engine=args.engine,
+        )
+        assert pages == serial_pages, "parallel output differs from serial"
+
+        label = f"{args.engine} {workers} workers"
+        print(
+            f"{label:>22} | {seconds:>8.2f} | {n / seconds:>9.1f} "
+            f"| {baseline_s / seconds:>7.1f}x"
+        )
+
+    print("\n[BENCH] Done\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--pdf", default=os.path.join(PROJECT_ROOT, "uploaded_docs", "HPC.pdf")
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--pages-per-task", type=int, default=16)
+    parser.add_argument("--engine", choices=ENGINES, default="auto")
+    run_benchmark(parser.parse_args())
@@ -0,0 +1,100 @@
+"""
+test_answer_cache.py
+
+Why:
+-----
+Cached answers are only safe if they are served for the same document
+set: repeated and paraphrased questions must hit, while expired entries,
+other document sets and changed sessions must miss.
+"""
+
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.state import document_store as document_store_module
+from app.state.answer_cache import AnswerCache
+from app.state.document_store import DocumentStore
+
+GROUP = ("fingerprint-a", None, ("rrf", None, None))
+RESULT = {"answer": "4,250 EUR [Source 1].", "citations": []}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_normalized_query_hits_and_records_savings():
+    cache = AnswerCache(max_entries=8, ttl_s=60, similarity=0)
+    cache.put(GROUP, "What is the invoice total?", RESULT, cost_s=1.5)
+
+    assert cache.get(GROUP, "what is the invoice  total") == RESULT
+    other_documents = ("fingerprint-b", None, GROUP[2])
+    assert cache.get(other_documents, "What is the invoice total?") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["saved_ms"] == pytest.approx(1500)
+
+
+def test_paraphrase_hits_above_threshold_only():
+    cache = AnswerCache(max_entries=8, ttl_s=60, similarity=0.9)
+    cache.put(GROUP, "What is the invoice total?", RESULT, 1.0, _unit(1, 0, 0))
+
+    assert cache.get(GROUP, "How much is the invoice?", _unit(1, 0.1, 0)) == RESULT
+    assert cache.get(GROUP, "Who signed the contract?", _unit(0, 1, 0)) is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_ttl_and_lru_eviction():
+    clock = _Clock()
+    cache = AnswerCache(max_entries=2, ttl_s=10, similarity=0, clock=clock)
+
+    cache.put(GROUP, "q1", RESULT, 1.0)
+    cache.put(GROUP, "q2", RESULT, 1.0)
+    cache.get(GROUP, "q1")
+    cache.put(GROUP, "q3", RESULT, 1.0)  # evicts q2 (least recent)
+
+    assert cache.get(GROUP, "q2") is None
+    assert cache.get(GROUP, "q1") == RESULT
+
+    clock.now = 11
+    assert cache.get(GROUP, "q1") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_document_changes_invalidate_unshared_answers(monkeypatch):
+    cache = AnswerCache(max_entries=8, ttl_s=60, similarity=0)
+    monkeypatch.setattr(document_store_module, "answer_cache", cache)
+    store = DocumentStore()
+
+    chunks = [{"chunk_id": "doc-1", "text": "invoice", "source_file": "a.pdf"}]
+    store.add_chunks("s1", chunks)
+    store.add_chunks("s2", chunks)
+    fingerprint = store.fingerprint("s1")
+    group = (fingerprint, None, ("rrf", None, None))
+    cache.put(group, "total?", RESULT, 1.0)
+
+    # s2 still holds the same documents: the answer stays valid
+    store.clear_session("s1")
+    assert cache.get(group, "total?") == RESULT
+
+    more = [{"chunk_id": "doc-2", "text": "x", "source_file": "b.pdf"}]
+    store.add_chunks("s2", more)
+    assert cache.get(group, "total?") is None
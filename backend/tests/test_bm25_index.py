@@ -0,0 +1,140 @@
+"""
+test_bm25_index.py
+
+Why:
+-----
+The incremental BM25 index replaces BM25Okapi in the retriever,
+so its scores must stay interchangeable with rank_bm25.
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+rank_bm25 = pytest.importorskip("rank_bm25")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.services.bm25_index import BM25Index
+
+
+VOCAB = [f"term{i}" for i in range(200)] + ["the", "of", "and"]
+
+
+def _corpus(n_docs: int, seed: int = 7) -> list[list[str]]:
+    rng = random.Random(seed)
+    return [
+        rng.choices(VOCAB, k=rng.randint(5, 120))
+        for _ in range(n_docs)
+    ]
+
+
+def _queries(seed: int = 11) -> list[list[str]]:
+    rng = random.Random(seed)
+    queries = [rng.choices(VOCAB, k=rng.randint(1, 6)) for _ in range(25)]
+    queries.append(["the", "the", "of"])  # repeated / common terms
+    queries.append(["unknown", "term3"])  # out-of-vocabulary term
+    return queries
+
+
+def test_scores_match_bm25okapi():
+    corpus = _corpus(300)
+
+    reference = rank_bm25.BM25Okapi(corpus)
+    index = BM25Index()
+    for doc in corpus:
+        index.add_document(doc)
+
+    for query in _queries():
+        np.testing.assert_allclose(
+            index.get_scores(query),
+            reference.get_scores(query),
+            rtol=1e-9,
+            atol=1e-9,
+        )
+
+
+def test_incremental_add_matches_full_refit():
+    corpus = _corpus(240)
+
+    index = BM25Index()
+    for doc in corpus[:100]:
+        index.add_document(doc)
+    for doc in corpus[100:]:
+        index.add_document(doc)
+
+    reference = rank_bm25.BM25Okapi(corpus)
+
+    for query in _queries():
+        np.testing.assert_allclose(
+            index.get_scores(query),
+            reference.get_scores(query),
+            rtol=1e-9,
+            atol=1e-9,
+        )
+
+
+def test_remove_source_matches_refit_without_it():
+    corpus = _corpus(200)
+
+    index = BM25Index()
+    for i, doc in enumerate(corpus):
+        index.add_document(doc, source_file="a.pdf" if i % 3 else "b.pdf")
+
+    removed = index.remove_source("b.pdf")
+    kept = [i for i in range(len(corpus)) if i % 3]
+
+    assert len(removed) == len(corpus) - len(kept)
+    assert index.corpus_size == len(kept)
+
+    reference = rank_bm25.BM25Okapi([corpus[i] for i in kept])
+
+    for query in _queries():
+        scores = index.get_scores(query)
+        assert not scores[removed].any()
+        np.testing.assert_allclose(
+            scores[kept],
+            reference.get_scores(query),
+            rtol=1e-9,
+            atol=1e-9,
+        )
+
+
+def test_top_k_matches_dense_ranking():
+    corpus = _corpus(500)
+
+    index = BM25Index()
+    for i, doc in enumerate(corpus):
+        index.add_document(doc, source_file=f"{i % 4}.pdf")
+    index.remove_source("2.pdf")
+
+    for query in _queries():
+        dense = index.get_scores(query)
+        ids, scores = index.top_k(query, 10)
+
+        expected = np.sort(dense[dense > 0])[::-1][:10]
+        np.testing.assert_allclose(scores, expected, rtol=1e-9)
+        np.testing.assert_allclose(dense[ids], scores, rtol=1e-9)
+
+
+def test_top_k_respects_document_mask():
+    corpus = _corpus(400)
+
+    index = BM25Index()
+    for i, doc in enumerate(corpus):
+        index.add_document(doc, source_file=f"{i % 4}.pdf")
+
+    mask = np.zeros(index.num_ids, dtype=bool)
+    mask[index.source_doc_ids("1.pdf")] = True
+
+    for query in _queries():
+        dense = np.where(mask, index.get_scores(query), 0.0)
+        ids, scores = index.top_k(query, 10, mask)
+
+        assert all(i % 4 == 1 for i in ids)
+        expected = np.sort(dense[dense > 0])[::-1][:10]
+        np.testing.assert_allclose(scores, expected, rtol=1e-9)
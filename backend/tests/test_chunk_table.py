@@ -0,0 +1,92 @@
+"""
+test_chunk_table.py
+
+Why:
+-----
+The columnar ChunkTable replaces per-chunk dicts in the DocumentStore;
+its views must read back exactly what was stored (including chunk ids
+off the naming scheme and extra keys), and session vectors must stay
+aligned with the rows they belong to.
+"""
+
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.state.chunk_table import ChunkTable
+from app.state.document_store import DocumentStore
+
+
+def _chunks(name, pages=3, per_page=2):
+    return [
+        {
+            "text": f"{name} page {page} chunk {c} – ünïcode",
+            "page_number": page,
+            "source_file": name,
+            "chunk_id": f"{name}_p{page}_c{c}",
+        }
+        for page in range(1, pages + 1)
+        for c in range(per_page)
+    ]
+
+
+def test_views_round_trip():
+    chunks = _chunks("a.pdf") + [
+        {"text": "no page", "source_file": "b.pdf", "chunk_id": "custom-1"},
+        {"text": "extra", "page_number": 2, "score": 0.5},
+    ]
+    table = ChunkTable(chunks)
+
+    assert len(table) == len(chunks)
+    assert [dict(c) for c in table] == chunks
+    assert table[-1]["score"] == 0.5
+    assert table[-1].get("chunk_id") is None
+    assert table[6].get("page_number", "missing") == "missing"
+    assert [dict(c) for c in table[1:3]] == chunks[1:3]
+
+    with pytest.raises(KeyError):
+        table[0]["metadata"]
+    with pytest.raises(IndexError):
+        table[len(chunks)]
+
+
+def test_extend_returns_rows_and_shares_sources():
+    table = ChunkTable(_chunks("a.pdf", pages=1))
+    rows = table.extend(_chunks("a.pdf", pages=2)[2:])
+
+    assert rows == range(2, 4)
+    assert table[3]["chunk_id"] == "a.pdf_p2_c1"
+    assert table[0]["source_file"] is table[3]["source_file"]
+    assert table.row_of(table[3]) == 3
+    assert table.row_of(dict(table[3])) is None
+
+
+def test_store_keeps_vectors_aligned():
+    store = DocumentStore()
+    a, b = _chunks("a.pdf"), _chunks("b.pdf")
+    vectors_a = np.arange(len(a) * 2, dtype=np.float32).reshape(-1, 2)
+
+    store.add_chunks("s1", a, vectors_a)
+    store.add_chunks("s1", b)
+
+    all_chunks = store.get_all_chunks("s1")
+    assert [dict(c) for c in all_chunks] == a + b
+    assert store.get_vectors("s1", all_chunks) is None
+
+    documents = store.get_documents("s1", ["a.pdf"])
+    assert [dict(c) for c in documents] == a
+    np.testing.assert_array_equal(
+        store.get_vectors("s1", documents), vectors_a
+    )
+
+    mixed = store.get_documents("s1", ["b.pdf", "a.pdf", "c.pdf"])
+    assert [dict(c) for c in mixed] == a + b
+
+    assert store.get_all_chunks("missing") == []
+    assert store.get_documents("missing", ["a.pdf"]) == []
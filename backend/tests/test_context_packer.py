@@ -0,0 +1,139 @@
+"""
+test_context_packer.py
+
+Why:
+-----
+Prompt context must fit the model's token budget without sending the
+same text twice: overlapping neighbours are merged, near-duplicates are
+dropped, and the most relevant blocks win the budget. The budget covers
+the labeled context as sent, and [Source N] must cite the N-th block.
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("loguru")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.services.context_packer import (
+    merge_overlapping,
+    pack_context,
+    render_context,
+)
+
+
+def words(text: str) -> int:
+    return len(text.split())
+
+
+def result(text, page, idx, score, source="a.pdf"):
+    return {
+        "score": score,
+        "metadata": {
+            "text": text,
+            "page_number": page,
+            "source_file": source,
+            "chunk_id": f"{source}_p{page}_c{idx}",
+        },
+    }
+
+
+def test_neighbouring_chunks_share_overlap_once():
+    first = "alpha beta gamma delta epsilon zeta eta theta"
+    second = "epsilon zeta eta theta iota kappa lambda"
+    assert merge_overlapping(first, second) == (
+        "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda"
+    )
+    assert merge_overlapping("no shared text here", "completely different") == (
+        "no shared text here\ncompletely different"
+    )
+
+
+def test_same_page_chunks_merge_in_chunk_order():
+    evidence = [
+        result("epsilon zeta eta theta iota kappa lambda mu", 3, 1, 0.9),
+        result("unrelated page ten text about invoices", 10, 0, 0.8),
+        result("alpha beta gamma delta epsilon zeta eta theta", 3, 0, 0.7),
+    ]
+
+    blocks = pack_context(evidence, budget=100, count=words)
+
+    assert [b["page_number"] for b in blocks] == [3, 10]
+    assert blocks[0]["text"] == (
+        "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu"
+    )
+    assert blocks[0]["score"] == 0.9
+
+
+def test_near_duplicates_are_dropped():
+    text = "the payment term is thirty days from the invoice date"
+    evidence = [
+        result(text, 1, 0, 0.9, source="a.pdf"),
+        result(text + " net", 4, 0, 0.8, source="b.pdf"),
+        result("penalties apply after sixty days", 5, 0, 0.7),
+    ]
+
+    blocks = pack_context(evidence, budget=100, count=words)
+    assert [b["source_file"] for b in blocks] == ["a.pdf", "a.pdf"]
+    assert blocks[1]["page_number"] == 5
+
+
+def test_budget_is_filled_greedily_by_relevance():
+    # "[Source N]" costs two words per block
+    evidence = [
+        result(" ".join(["a"] * 6), 1, 0, 0.9),
+        result(" ".join(["b"] * 8), 2, 0, 0.8),  # does not fit any more
+        result(" ".join(["c"] * 3), 3, 0, 0.7),
+    ]
+
+    blocks = pack_context(evidence, budget=13, count=words, dedup_threshold=1.1)
+
+    assert [b["page_number"] for b in blocks] == [1, 3]
+    assert words(render_context(blocks)) == 13
+
+
+def test_oversized_best_block_is_truncated_to_the_budget():
+    evidence = [result(" ".join(["word"] * 50), 1, 0, 0.9)]
+    blocks = pack_context(evidence, budget=10, count=words)
+
+    assert len(blocks) == 1
+    assert words(render_context(blocks)) == 10
+
+
+def test_citations_follow_packed_blocks(monkeypatch):
+    pytest.importorskip("langchain_core")
+    from langchain_core.messages import AIMessage
+
+    from app.services import answer_generator, rag_pipeline
+    from app.state.answer_cache import AnswerCache
+
+    text = "the payment term is thirty days from the invoice date"
+    candidates = [
+        result(text, 1, 0, 0.9, source="a.pdf"),
+        result(text, 4, 0, 0.8, source="b.pdf"),  # near-duplicate: dropped
+        result("penalties apply after sixty days", 5, 0, 0.7),
+    ]
+    sent = []
+
+    class _LLM:
+        def invoke(self, messages):
+            sent.append(messages[0].content)
+            return AIMessage(content="Thirty days [Source 1], then [Source 2].")
+
+    monkeypatch.setattr(answer_generator, "get_llm", lambda: _LLM())
+    monkeypatch.setattr(rag_pipeline, "retrieve", lambda *a, **k: candidates)
+    monkeypatch.setattr(rag_pipeline, "answer_cache", AnswerCache())
+
+    result_ = rag_pipeline.answer_question("pack-test", "Payment terms?", [])
+
+    citations = result_["citations"]
+    assert [(c["source_file"], c["page_number"]) for c in citations] == [
+        ("a.pdf", 1),
+        ("a.pdf", 5),
+    ]
+    assert "[Source 2]\npenalties apply" in sent[0]
+    assert "[Source 3]" not in sent[0]
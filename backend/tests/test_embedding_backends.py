@@ -0,0 +1,67 @@
+"""
+test_embedding_backends.py
+
+Why:
+-----
+Faster embedding backends are only usable if their vectors agree with
+the fp32 baseline: documents indexed with one backend are queried with
+vectors from another after a config change.
+"""
+
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sentence_transformers")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.services.embedding_backends import create_embedding_backend
+
+MODEL = "all-MiniLM-L6-v2"
+
+TEXTS = [
+    "Retrieval-augmented generation grounds answers in documents.",
+    "The invoice total is 4,250 EUR, due within 30 days.",
+    "Kubernetes schedules pods onto nodes based on resource requests.",
+    "short",
+    " ".join(["long chunk text"] * 120),
+]
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    return create_embedding_backend("torch", MODEL).encode(TEXTS)
+
+
+def _check_parity(vectors, baseline, min_cosine):
+    assert vectors.shape == baseline.shape
+    assert vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-3)
+
+    cosine = np.sum(vectors * baseline, axis=1)
+    assert cosine.min() >= min_cosine
+
+
+def test_int8_backend_matches_fp32(baseline):
+    pytest.importorskip("torch")
+    backend = create_embedding_backend("torch-int8", MODEL)
+    _check_parity(backend.encode(TEXTS), baseline, min_cosine=0.97)
+
+
+def test_onnx_backend_matches_fp32(baseline):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("optimum")
+    backend = create_embedding_backend("onnx", MODEL)
+    _check_parity(backend.encode(TEXTS), baseline, min_cosine=0.999)
+
+
+def test_backends_use_separate_cache_namespaces():
+    backend = create_embedding_backend("torch", MODEL)
+    assert backend.cache_namespace == MODEL
+
+    int8 = create_embedding_backend("torch-int8", MODEL)
+    assert int8.cache_namespace != backend.cache_namespace
@@ -0,0 +1,112 @@
+"""
+test_embedding_cache.py
+
+Why:
+-----
+Re-uploads rely on the embedding cache instead of re-encoding: keys
+must ignore whitespace / unicode form but not the model, vectors must
+survive a restart through the SQLite tier, and a broken or unwritable
+cache file must cost cache hits, never an ingestion.
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.state.embedding_cache import EmbeddingCache, cache_key
+
+
+def _vectors(n, dim=4):
+    return [np.full(dim, i, dtype=np.float32) for i in range(n)]
+
+
+def test_cache_key_normalizes_text_not_model():
+    key = cache_key("Café  menu\n", "model-a")
+
+    assert cache_key("Café menu", "model-a") == key
+    assert cache_key("Café menu", "model-b") != key
+
+
+def test_memory_tier_is_lru():
+    cache = EmbeddingCache(path=None, max_memory_items=2)
+    cache.put_many(["a", "b"], _vectors(2))
+    cache.get_many(["a"])
+    cache.put_many(["c"], _vectors(1))
+
+    a, b, c = cache.get_many(["a", "b", "c"])
+    assert a is not None and c is not None
+    assert b is None
+
+    stats = cache.stats()
+    assert stats["memory_entries"] == 2
+    assert stats["memory_hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache" / "embeddings.sqlite3")
+    cache = EmbeddingCache(path=path)
+    # Opened on first use, not at construction
+    assert not os.path.exists(path)
+
+    cache.put_many(["a", "b"], _vectors(2))
+    assert os.path.exists(path)
+
+    restarted = EmbeddingCache(path=path)
+    a, missing, b = restarted.get_many(["a", "x", "b"])
+
+    np.testing.assert_array_equal(a, np.zeros(4, dtype=np.float32))
+    np.testing.assert_array_equal(b, np.ones(4, dtype=np.float32))
+    assert missing is None
+    assert restarted.stats()["disk_hits"] == 2
+    assert restarted.stats()["misses"] == 1
+
+    # Disk hits are promoted to memory
+    restarted.get_many(["a"])
+    assert restarted.stats()["memory_hits"] == 1
+
+
+class _BrokenConnection:
+    def __init__(self):
+        self.rolled_back = False
+
+    def executemany(self, *args):
+        raise sqlite3.OperationalError("database is locked")
+
+    def execute(self, *args):
+        raise sqlite3.OperationalError("database is locked")
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+def test_disk_errors_are_logged_not_raised(tmp_path):
+    cache = EmbeddingCache(path=str(tmp_path / "embeddings.sqlite3"))
+    broken = _BrokenConnection()
+    cache._db = broken
+
+    cache.put_many(["a"], _vectors(1))
+    assert broken.rolled_back
+    # The memory tier still took the vector
+    assert cache.get_many(["a"])[0] is not None
+
+    assert cache.get_many(["b"]) == [None]
+    assert cache.stats()["misses"] == 1
+
+
+def test_unopenable_path_disables_disk_tier(tmp_path):
+    # A directory where the database file should be
+    path = tmp_path / "embeddings.sqlite3"
+    path.mkdir()
+    cache = EmbeddingCache(path=str(path))
+
+    cache.put_many(["a"], _vectors(1))
+    assert cache.path is None
+    assert cache.get_many(["a", "b"])[1] is None
@@ -0,0 +1,118 @@
+"""
+test_embedding_service.py
+
+Why:
+-----
+The micro-batcher sits in front of every embedding call: results must
+come back to the right caller in order, concurrent requests must share
+forward passes, and queries must not queue behind ingestion.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.services.embedding_service import (
+    EmbeddingService,
+    pack_by_token_budget,
+)
+
+
+class _FakeModel:
+    """
+    Encodes "t<n>" as [n, len]; records every batch it was given.
+    """
+
+    def __init__(self, gate=None):
+        self.batches = []
+        self.gate = gate
+
+    def __call__(self, texts):
+        if self.gate is not None:
+            self.gate.wait()
+        self.batches.append(list(texts))
+        return np.array([[float(t[1:]), len(t)] for t in texts])
+
+
+def test_results_are_routed_back_in_order():
+    model = _FakeModel()
+    service = EmbeddingService(model, window_ms=1, max_batch=4)
+
+    texts = [f"t{i}" for i in range(10)]
+    vectors = service.submit(texts).result(timeout=5)
+
+    assert vectors.dtype == np.float32
+    assert vectors[:, 0].tolist() == list(range(10))
+    # Split into max_batch slices
+    assert [len(b) for b in model.batches] == [4, 4, 2]
+
+
+def test_bulk_slices_are_length_sorted():
+    model = _FakeModel()
+    service = EmbeddingService(model, window_ms=0, max_batch=2)
+
+    texts = ["t1000", "t1", "t100", "t10"]
+    vectors = service.submit(texts).result(timeout=5)
+
+    assert vectors[:, 0].tolist() == [1000, 1, 100, 10]
+    assert model.batches == [["t1", "t10"], ["t100", "t1000"]]
+
+
+def test_pack_by_token_budget():
+    lengths = [120, 8, 30, 9, 128, 31, 7]
+    batches = pack_by_token_budget(lengths, token_budget=64)
+
+    assert sorted(i for b in batches for i in b) == list(range(len(lengths)))
+    for batch in batches:
+        padded = len(batch) * max(lengths[i] for i in batch)
+        assert padded <= 64 or len(batch) == 1
+    # Short texts share a pass instead of padding to the longest
+    assert batches[0] == [6, 1, 3]
+
+
+def test_concurrent_requests_share_a_forward_pass():
+    model = _FakeModel()
+    service = EmbeddingService(model, window_ms=200, max_batch=8)
+
+    futures = [service.submit([f"t{i}"], "interactive") for i in range(8)]
+    results = [f.result(timeout=5) for f in futures]
+
+    assert [r[0, 0] for r in results] == list(range(8))
+    assert len(model.batches) == 1
+
+
+def test_interactive_lane_goes_first():
+    gate = threading.Event()
+    model = _FakeModel(gate)
+    service = EmbeddingService(model, window_ms=0, max_batch=2)
+
+    # First bulk slice blocks inside the model; everything else queues
+    bulk = service.submit([f"t{i}" for i in range(6)], "bulk")
+    while service._lanes["bulk"][0].offset == 0:
+        time.sleep(0.001)
+    query = service.submit(["t99"], "interactive")
+    gate.set()
+
+    query.result(timeout=5)
+    bulk.result(timeout=5)
+
+    assert model.batches[0] == ["t0", "t1"]
+    assert model.batches[1] == ["t99"]
+
+
+def test_encode_errors_reach_the_caller():
+    def broken(texts):
+        raise RuntimeError("model exploded")
+
+    service = EmbeddingService(broken, window_ms=0)
+
+    with pytest.raises(RuntimeError):
+        service.submit(["t1"]).result(timeout=5)
@@ -0,0 +1,206 @@
+"""
+test_ingest_jobs.py
+
+Why:
+-----
+Background ingestion must report per-file progress and failures, stop
+when cancelled, only add fully processed files to the session, and
+never write chunks of a cancelled job into a session that a re-upload
+has cleared in the meantime; vectors of files a cancelled job does not
+add are deleted, and waiting for a session's jobs is bounded.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.services import ingest_jobs as ingest_jobs_module
+from app.services.ingest_jobs import IngestJobManager
+from app.state.document_registry import DocumentRegistry
+from app.state.document_store import DocumentStore
+
+
+def _chunks(source_file, page, count=2):
+    return [
+        {
+            "text": f"{source_file} page {page} chunk {c}",
+            "page_number": page,
+            "source_file": source_file,
+            "chunk_id": f"{source_file}_p{page}_c{c}",
+        }
+        for c in range(count)
+    ]
+
+
+def _files(*names):
+    return [
+        {
+            "filename": name,
+            "source_file": name,
+            "file_path": f"/tmp/{name}",
+            "doc_hash": f"hash-{name}",
+        }
+        for name in names
+    ]
+
+
+class _FakePipeline:
+    """
+    Stands in for stream_ingest_many: two batches per file, a file
+    listed in `fail` raises after its first batch. With a gate, waits
+    for it after the first batch (to cancel / clear mid-job).
+    """
+
+    def __init__(self, fail=(), gate=None):
+        self.fail = set(fail)
+        self.gate = gate
+        self.paused = threading.Event()
+
+    def __call__(self, file_paths, engine=None, progress=None, on_file_done=None):
+        for page in (1, 2):
+            for idx, path in enumerate(file_paths):
+                name = os.path.basename(path)
+                if page == 2 and name in self.fail:
+                    continue
+                chunks = _chunks(name, page)
+                progress[idx].pages_extracted += 1
+                progress[idx].chunks_embedded += len(chunks)
+                progress[idx].vectors_upserted += len(chunks)
+                yield idx, chunks, [[1.0, 0.0]] * len(chunks)
+
+            if page == 1 and self.gate is not None:
+                self.paused.set()
+                self.gate.wait(5)
+
+        for idx, path in enumerate(file_paths):
+            name = os.path.basename(path)
+            on_file_done(
+                idx,
+                RuntimeError("broken PDF") if name in self.fail else None,
+            )
+
+
+class _FakeVectorStore:
+    def __init__(self):
+        self.deleted = []
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+
+
+@pytest.fixture
+def vector_store(monkeypatch):
+    fake = _FakeVectorStore()
+    monkeypatch.setattr(ingest_jobs_module, "get_vector_store", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+def store(monkeypatch, vector_store):
+    fresh = DocumentStore()
+    monkeypatch.setattr(ingest_jobs_module, "document_store", fresh)
+    monkeypatch.setattr(ingest_jobs_module, "document_registry", DocumentRegistry())
+    monkeypatch.setattr(ingest_jobs_module, "SUMMARY_ON_INGEST", False)
+    return fresh
+
+
+def _run(monkeypatch, pipeline, files, store, session_id="s1"):
+    monkeypatch.setattr(ingest_jobs_module, "stream_ingest_many", pipeline)
+    manager = IngestJobManager(workers=1)
+    generation = store.clear_session(session_id)
+    return manager, manager.submit(session_id, files, generation=generation)
+
+
+def test_progress_and_completion(monkeypatch, store):
+    manager, job = _run(monkeypatch, _FakePipeline(), _files("a.pdf", "b.pdf"), store)
+    job.future.result(5)
+
+    assert job.status == "completed"
+    assert [p.status for p in job.progress] == ["completed", "completed"]
+    assert [p.vectors_upserted for p in job.progress] == [4, 4]
+    assert len(store.get_all_chunks("s1")) == 8
+    assert store.document_hashes("s1") == {
+        "a.pdf": "hash-a.pdf",
+        "b.pdf": "hash-b.pdf",
+    }
+    assert manager.pending_futures("s1") == []
+
+
+def test_failed_file_is_reported_and_discarded(monkeypatch, store, vector_store):
+    pipeline = _FakePipeline(fail={"b.pdf"})
+    _, job = _run(monkeypatch, pipeline, _files("a.pdf", "b.pdf"), store)
+    job.future.result(5)
+
+    assert job.status == "failed"
+    assert job.error == "1 of 2 files failed"
+    assert job.progress[0].status == "completed"
+    assert job.progress[1].status == "failed"
+    assert job.progress[1].error == "broken PDF"
+    assert store.document_hashes("s1") == {"a.pdf": "hash-a.pdf"}
+
+    # The batch of b.pdf extracted before the failure is not searchable
+    sources = {c["source_file"] for c in store.get_all_chunks("s1")}
+    assert sources == {"a.pdf"}
+    assert vector_store.deleted == ["b.pdf_p1_c0", "b.pdf_p1_c1"]
+
+
+def test_cancel_stops_the_job(monkeypatch, store, vector_store):
+    gate = threading.Event()
+    pipeline = _FakePipeline(gate=gate)
+    manager, job = _run(monkeypatch, pipeline, _files("a.pdf"), store)
+
+    assert pipeline.paused.wait(5)
+    manager.cancel_session("s1")
+    gate.set()
+    job.future.result(5)
+
+    assert job.status == "cancelled"
+    assert job.progress[0].status == "cancelled"
+    # The unfinished file never reached the session, nor kept its vectors
+    assert len(store.get_all_chunks("s1")) == 0
+    assert vector_store.deleted == ["a.pdf_p1_c0", "a.pdf_p1_c1"]
+
+
+def test_cleared_session_rejects_stale_batches(monkeypatch, store, vector_store):
+    gate = threading.Event()
+    pipeline = _FakePipeline(gate=gate)
+    _, job = _run(monkeypatch, pipeline, _files("old.pdf"), store)
+
+    assert pipeline.paused.wait(5)
+    # Re-upload: the session is cleared and refilled before the old job
+    # notices it should stop
+    generation = store.clear_session("s1")
+    store.add_chunks("s1", _chunks("new.pdf", 1), generation=generation)
+    gate.set()
+    job.future.result(5)
+
+    assert job.status == "cancelled"
+    sources = {c["source_file"] for c in store.get_all_chunks("s1")}
+    assert sources == {"new.pdf"}
+    assert vector_store.deleted == [
+        c["chunk_id"] for page in (1, 2) for c in _chunks("old.pdf", page)
+    ]
+
+
+def test_wait_for_session_is_bounded(monkeypatch, store):
+    gate = threading.Event()
+    pipeline = _FakePipeline(gate=gate)
+    manager, job = _run(monkeypatch, pipeline, _files("a.pdf"), store)
+    assert pipeline.paused.wait(5)
+
+    # Timing out neither cancels nor fails the job
+    assert asyncio.run(manager.wait_for_session("s1", timeout=0.05)) is False
+    assert job.status == "running"
+
+    gate.set()
+    assert asyncio.run(manager.wait_for_session("s1", timeout=5)) is True
+    assert job.status == "completed"
+    assert asyncio.run(manager.wait_for_session("s1", timeout=0)) is True
@@ -0,0 +1,254 @@
+"""
+test_ingest_pipeline.py
+
+Why:
+-----
+The streaming ingest stages run concurrently: prefetch must stay a
+bounded number of items ahead of its consumer (and re-raise producer
+errors), and however extraction, embedding and upserts interleave, each
+file's chunks must come out in page order with their own vectors, and
+a file is only reported done after its last batch. A failed upsert
+fails its own file only, and upserts that are never handed back are
+deleted from the index.
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("langchain_text_splitters")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.services import ingest_pipeline
+from app.services.chunker import iter_chunks
+from app.services.ingest_pipeline import FileProgress, prefetch, stream_ingest_many
+
+
+def _pages(source_file, count):
+    return [
+        {
+            "text": f"{source_file} page {page}",
+            "page_number": page,
+            "source_file": source_file,
+        }
+        for page in range(1, count + 1)
+    ]
+
+
+def _wait_until_stable(read, settle=0.2, timeout=5):
+    value = read()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(settle)
+        if read() == value:
+            return value
+        value = read()
+    return value
+
+
+def test_prefetch_applies_backpressure():
+    produced = []
+
+    def source():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    items = prefetch(source(), maxsize=3)
+    assert next(items) == 0
+
+    # One item consumed, `maxsize` queued and one blocked in put
+    assert _wait_until_stable(lambda: len(produced)) <= 1 + 3 + 1
+
+    assert list(items) == list(range(1, 100))
+
+
+def test_prefetch_reraises_and_releases_producer():
+    def failing():
+        yield 1
+        raise ValueError("bad page")
+
+    items = prefetch(failing(), maxsize=2)
+    assert next(items) == 1
+    with pytest.raises(ValueError, match="bad page"):
+        next(items)
+
+    finished = threading.Event()
+
+    def endless():
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            finished.set()
+
+    items = prefetch(endless(), maxsize=2)
+    next(items)
+    # Closing the consumer lets the blocked producer give up
+    items.close()
+    assert finished.wait(5)
+
+
+def test_iter_chunks_keeps_page_order():
+    pages = _pages("a.pdf", 3)
+    pages[1]["text"] = " ".join(["word"] * 400)
+
+    chunks = list(iter_chunks(pages, chunk_size=800, chunk_overlap=0))
+    pages_seen = [c["page_number"] for c in chunks]
+
+    assert pages_seen == sorted(pages_seen)
+    assert chunks[0]["chunk_id"] == "a.pdf_p1_c0"
+    page_two = [c["chunk_id"] for c in chunks if c["page_number"] == 2]
+    assert page_two == [f"a.pdf_p2_c{i}" for i in range(len(page_two))]
+    assert len(page_two) > 1
+
+
+class _FakeIndex:
+    def __init__(self):
+        self.persisted = False
+        self.deleted = []
+
+    def persist(self):
+        self.persisted = True
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+
+
+@pytest.fixture
+def fake_stages(monkeypatch):
+    index = _FakeIndex()
+    counts = {"a.pdf": 23, "b.pdf": 7, "c.pdf": 15}
+
+    def pages(file_path, engine=None, offload=False):
+        name = os.path.basename(file_path)
+        for page in _pages(name, counts[name]):
+            time.sleep(random.random() / 1000)
+            yield page
+
+    def upsert(index, chunks, vectors):
+        # Upserts finish out of submission order
+        time.sleep(random.random() / 100)
+
+    monkeypatch.setattr(ingest_pipeline, "iter_pdf_pages", pages)
+    monkeypatch.setattr(
+        ingest_pipeline, "embed_texts", lambda texts: [[t] for t in texts]
+    )
+    monkeypatch.setattr(ingest_pipeline, "upsert_chunks", upsert)
+    monkeypatch.setattr(ingest_pipeline, "get_vector_store", lambda: index)
+    return index, counts
+
+
+def test_stream_ingest_many_keeps_per_file_order(fake_stages):
+    index, counts = fake_stages
+    files = [f"/tmp/{name}" for name in counts]
+    progress = [FileProgress(os.path.basename(f), os.path.basename(f)) for f in files]
+
+    seen = {idx: [] for idx in range(len(files))}
+    done = []
+
+    def on_file_done(idx, error):
+        assert error is None
+        # Every batch of the file was yielded before it is reported
+        assert len(seen[idx]) == counts[os.path.basename(files[idx])]
+        done.append(idx)
+
+    for idx, chunks, vectors in stream_ingest_many(
+        files,
+        batch_size=2,
+        embed_batch_size=5,
+        max_pending_batches=1,
+        concurrent_files=3,
+        upsert_workers=3,
+        progress=progress,
+        on_file_done=on_file_done,
+    ):
+        assert [[c["text"]] for c in chunks] == vectors
+        seen[idx].extend(c["chunk_id"] for c in chunks)
+
+    for idx, path in enumerate(files):
+        name = os.path.basename(path)
+        expected = [c["chunk_id"] for c in iter_chunks(_pages(name, counts[name]))]
+        assert seen[idx] == expected
+        assert progress[idx].vectors_upserted == counts[name]
+
+    assert sorted(done) == [0, 1, 2]
+    assert index.persisted
+
+
+def test_stream_ingest_many_reports_failed_file(fake_stages, monkeypatch):
+    working = ingest_pipeline.iter_pdf_pages
+
+    def pages(file_path, engine=None, offload=False):
+        if file_path.endswith("b.pdf"):
+            raise RuntimeError("Failed to load PDF")
+        return working(file_path, engine, offload)
+
+    monkeypatch.setattr(ingest_pipeline, "iter_pdf_pages", pages)
+    files = ["/tmp/a.pdf", "/tmp/b.pdf"]
+
+    errors = {}
+    yielded = set()
+    for idx, _, _ in stream_ingest_many(
+        files,
+        on_file_done=lambda idx, error: errors.__setitem__(idx, error),
+    ):
+        yielded.add(idx)
+
+    assert yielded == {0}
+    assert errors[0] is None
+    assert str(errors[1]) == "Failed to load PDF"
+
+
+def test_failed_upsert_fails_its_file_only(fake_stages, monkeypatch):
+    index, _ = fake_stages
+    failing = []
+
+    def upsert(index, chunks, vectors):
+        if chunks[0]["source_file"] == "b.pdf":
+            failing.extend(c["chunk_id"] for c in chunks)
+            raise ConnectionError("upsert timed out")
+
+    monkeypatch.setattr(ingest_pipeline, "upsert_chunks", upsert)
+    files = ["/tmp/a.pdf", "/tmp/b.pdf"]
+
+    errors = {}
+    yielded = {0: 0, 1: 0}
+    for idx, chunks, _ in stream_ingest_many(
+        files,
+        batch_size=2,
+        embed_batch_size=4,
+        on_file_done=lambda idx, error: errors.__setitem__(idx, error),
+    ):
+        yielded[idx] += len(chunks)
+
+    assert yielded == {0: 23, 1: 0}
+    assert errors[0] is None
+    assert str(errors[1]) == "upsert timed out"
+    # Possibly partly written: deleted again
+    assert failing and sorted(index.deleted) == sorted(failing)
+
+
+def test_closing_early_deletes_unreported_upserts(fake_stages, monkeypatch):
+    index, _ = fake_stages
+    monkeypatch.setattr(
+        ingest_pipeline, "upsert_chunks", lambda *args: time.sleep(0.02)
+    )
+
+    stream = stream_ingest_many(
+        ["/tmp/a.pdf"], batch_size=2, embed_batch_size=10, upsert_workers=1
+    )
+    _, first, _ = next(stream)
+    stream.close()
+
+    reported = {c["chunk_id"] for c in first}
+    assert index.deleted
+    assert reported.isdisjoint(index.deleted)
@@ -0,0 +1,107 @@
+"""
+test_ivf_index.py
+
+Why:
+-----
+The local IVF-flat index must stay close to exact search and survive
+a save/load round trip, since it backs air-gapped deployments.
+"""
+
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.db.ivf_index import IVFFlatIndex
+from app.services.dense_index import DenseIndex
+
+
+def _clustered(n: int, dim: int = 32, clusters: int = 40, seed: int = 3):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=n)
+    return (centers[labels] + 0.3 * rng.normal(size=(n, dim))).astype(
+        np.float32
+    )
+
+
+def _recall(index, exact, queries, k=10, **kwargs):
+    hits = 0
+    for q in queries:
+        expected = set(exact.search(q, k)[0].tolist())
+        hits += len(expected & set(index.search(q, k, **kwargs)[0].tolist()))
+    return hits / (k * len(queries))
+
+
+def test_exact_until_trained():
+    data = _clustered(500)
+    index = IVFFlatIndex(32, train_threshold=1000)
+    exact = DenseIndex(32)
+    index.add(data)
+    exact.add(data)
+
+    assert not index.is_trained
+    assert _recall(index, exact, data[:20]) == 1.0
+
+
+def test_recall_and_incremental_insert():
+    data = _clustered(6000)
+    index = IVFFlatIndex(32, nprobe=8, train_threshold=2000)
+    exact = DenseIndex(32)
+
+    for batch in np.array_split(data, 6):
+        index.add(batch)
+        exact.add(batch)
+
+    assert index.is_trained
+    queries = _clustered(50, seed=9)
+    assert _recall(index, exact, queries) >= 0.9
+    assert _recall(index, exact, queries, nprobe=len(index.centroids)) == 1.0
+
+
+def test_masked_search_only_returns_selected_rows():
+    data = _clustered(6000)
+    index = IVFFlatIndex(32, nprobe=8, train_threshold=2000)
+    index.add(data)
+    assert index.is_trained
+
+    queries = _clustered(20, seed=9)
+    for selected in (np.arange(0, 6000, 7), np.arange(0, 6000, 2)):
+        mask = np.zeros(len(index), dtype=bool)
+        mask[selected] = True
+
+        exact = DenseIndex(32)
+        exact.add(data[selected])
+
+        for q in queries:
+            ids, scores = index.search(q, 10, mask=mask)
+            assert mask[ids].all()
+
+            if len(selected) < index.train_threshold:
+                # Small subsets are scanned exactly
+                expected = selected[exact.search(q, 10)[0]]
+                assert ids.tolist() == expected.tolist()
+
+
+def test_save_load_round_trip(tmp_path):
+    data = _clustered(3000)
+    index = IVFFlatIndex(32, train_threshold=1000)
+    index.add(data)
+    index.save(str(tmp_path))
+
+    loaded = IVFFlatIndex.load(str(tmp_path))
+    queries = _clustered(10, seed=5)
+
+    for q in queries:
+        ids, scores = index.search(q, 5)
+        loaded_ids, loaded_scores = loaded.search(q, 5)
+        assert ids.tolist() == loaded_ids.tolist()
+        np.testing.assert_allclose(scores, loaded_scores, rtol=1e-6)
+
+    loaded.add(_clustered(10, seed=6))
+    assert len(loaded) == 3010
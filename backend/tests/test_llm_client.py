@@ -0,0 +1,127 @@
+"""
+test_llm_client.py
+
+Why:
+-----
+Every chat turn makes up to three LLM calls; they must share one
+cached client and reuse pooled keep-alive connections instead of
+paying connection setup (and TLS) each time.
+
+Runs against a local stub of the chat completions endpoint.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("langchain_groq")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from langchain_core.messages import HumanMessage
+
+from app.services import llm as llm_module
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.connections.add(self.client_address)
+        self.server.models.append(body["model"])
+
+        payload = json.dumps(
+            {
+                "id": "stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "ok"},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 1,
+                    "completion_tokens": 1,
+                    "total_tokens": 2,
+                },
+            }
+        ).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.connections = set()
+    server.models = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(llm_module, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(
+        llm_module, "GROQ_BASE_URL", f"http://127.0.0.1:{server.server_port}"
+    )
+    asyncio.run(llm_module.close_llm_clients())
+
+    yield server
+
+    asyncio.run(llm_module.close_llm_clients())
+    server.shutdown()
+    server.server_close()
+
+
+def test_llm_is_cached_per_model(stub_server):
+    first = llm_module.get_llm()
+    assert llm_module.get_llm() is first
+
+    other = llm_module.get_llm("another-model")
+    assert other is not first
+    assert other.http_client is first.http_client
+
+
+def test_sync_calls_reuse_one_connection(stub_server):
+    for _ in range(5):
+        reply = llm_module.get_llm().invoke([HumanMessage(content="hi")])
+        assert reply.content == "ok"
+
+    llm_module.get_llm("another-model").invoke([HumanMessage(content="hi")])
+
+    assert len(stub_server.models) == 6
+    assert stub_server.models[-1] == "another-model"
+    assert len(stub_server.connections) == 1
+
+
+def test_async_calls_reuse_one_connection(stub_server):
+    async def chat():
+        message = [HumanMessage(content="hi")]
+        try:
+            for _ in range(5):
+                await llm_module.get_llm().ainvoke(message)
+        finally:
+            # Async connections belong to this event loop
+            await llm_module.close_llm_clients()
+
+    asyncio.run(chat())
+
+    assert len(stub_server.models) == 5
+    assert len(stub_server.connections) == 1
@@ -0,0 +1,181 @@
+"""
+test_local_vector_store.py
+
+Why:
+-----
+The local store must come back from disk exactly as it was queried
+(overwrites and deletes included), while each persist only writes what
+changed since the last one and retired rows are eventually compacted
+away.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.db.ivf_index import IVFFlatIndex
+from app.db.local_vector_store import LocalVectorStore
+
+DIM = 16
+
+
+def _records(prefix, n, seed):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, DIM)).astype(np.float32)
+    return [
+        (f"{prefix}-{i}", vectors[i].tolist(), {"text": f"{prefix} {i}"})
+        for i in range(n)
+    ]
+
+
+def _store(directory, **kwargs):
+    kwargs.setdefault("train_threshold", 100)
+    return LocalVectorStore(str(directory), dim=DIM, **kwargs)
+
+
+def _answers(store, queries, k=5):
+    return [
+        [(m["id"], round(m["score"], 5), m["metadata"]) for m in store.query(q, k)]
+        for q in queries
+    ]
+
+
+def _files(directory):
+    return sorted(os.listdir(directory))
+
+
+def test_upsert_persist_reload_query(tmp_path):
+    store = _store(tmp_path)
+    store.upsert(_records("a", 300, seed=1))
+    store.persist()
+
+    store.upsert(_records("b", 40, seed=2))
+    # Overwrite one persisted vector, delete another
+    store.upsert([("a-0", [1.0] * DIM, {"text": "new a 0"})])
+    store.delete(["a-1", "missing"])
+    store.persist()
+
+    queries = np.random.default_rng(3).normal(size=(8, DIM))
+    queries[0] = 1.0
+
+    reloaded = _store(tmp_path)
+    assert len(reloaded) == len(store) == 339
+    assert _answers(reloaded, queries) == _answers(store, queries)
+    assert reloaded.query([1.0] * DIM, 1)[0]["metadata"] == {"text": "new a 0"}
+    assert all(
+        m["id"] != "a-1" for q in queries for m in reloaded.query(q, 20)
+    )
+
+    # The reloaded store keeps accepting writes and deltas
+    reloaded.upsert(_records("c", 5, seed=4))
+    reloaded.persist()
+    assert len(_store(tmp_path)) == 344
+
+
+def test_persist_writes_deltas_not_snapshots(tmp_path):
+    store = _store(tmp_path)
+    store.upsert(_records("a", 300, seed=1))
+    store.persist()
+
+    snapshot = os.path.join(tmp_path, "snapshot-000001", "vectors.npy")
+    written = os.stat(snapshot).st_mtime_ns
+
+    store.upsert(_records("b", 20, seed=2))
+    store.persist()
+    store.upsert(_records("c", 20, seed=3))
+    store.persist()
+    # Nothing changed: nothing written
+    store.persist()
+
+    assert os.stat(snapshot).st_mtime_ns == written
+    assert _files(tmp_path) == [
+        "delta-000001-000001.npy",
+        "delta-000001-000002.npy",
+        "deltas-000001.jsonl",
+        "records.json",
+        "snapshot-000001",
+    ]
+    assert np.load(os.path.join(tmp_path, "delta-000001-000002.npy")).shape == (
+        20,
+        DIM,
+    )
+
+
+def test_retired_rows_are_compacted(tmp_path):
+    store = _store(tmp_path, compact_ratio=0.25)
+    store.upsert(_records("a", 200, seed=1))
+    store.persist()
+
+    store.delete([f"a-{i}" for i in range(40)])
+    store.persist()
+    # 40 of 200 rows retired: below the ratio, only a delta
+    assert "deltas-000001.jsonl" in _files(tmp_path)
+
+    store.delete([f"a-{i}" for i in range(40, 60)])
+    store.persist()
+
+    # 60 of 200 retired: a compacted snapshot replaces generation 1
+    assert _files(tmp_path) == ["records.json", "snapshot-000002"]
+    assert np.load(
+        os.path.join(tmp_path, "snapshot-000002", "vectors.npy")
+    ).shape == (140, DIM)
+
+    reloaded = _store(tmp_path)
+    assert len(reloaded) == 140
+    queries = np.random.default_rng(5).normal(size=(5, DIM))
+    assert _answers(reloaded, queries) == _answers(store, queries)
+
+
+def test_torn_log_tail_is_ignored(tmp_path):
+    store = _store(tmp_path)
+    store.upsert(_records("a", 50, seed=1))
+    store.persist()
+    store.upsert(_records("b", 10, seed=2))
+    store.persist()
+
+    with open(os.path.join(tmp_path, "deltas-000001.jsonl"), "a") as f:
+        f.write('{"shard": "delta-000001-000002.npy", "sta')
+
+    reloaded = _store(tmp_path)
+    assert len(reloaded) == 60
+
+    reloaded.upsert(_records("c", 10, seed=3))
+    reloaded.persist()
+    assert len(_store(tmp_path)) == 70
+
+
+def test_loads_single_snapshot_layout(tmp_path):
+    # Layout written before deltas: index files next to records.json
+    records = _records("a", 120, seed=1)
+    index = IVFFlatIndex(DIM, train_threshold=100)
+    index.add(np.asarray([v for _, v, _ in records]))
+    index.save(str(tmp_path))
+    with open(os.path.join(tmp_path, "records.json"), "w") as f:
+        json.dump(
+            {
+                "ids": [vid for vid, _, _ in records],
+                "metadata": {vid: meta for vid, _, meta in records},
+            },
+            f,
+        )
+
+    store = _store(tmp_path)
+    assert len(store) == 120
+    assert store.query(records[7][1], 1)[0]["id"] == "a-7"
+
+    store.upsert(_records("b", 10, seed=2))
+    store.persist()
+    assert len(_store(tmp_path)) == 130
+
+    # The first compaction moves it to a snapshot generation
+    store.delete([f"a-{i}" for i in range(60)])
+    store.persist()
+    assert _files(tmp_path) == ["records.json", "snapshot-000001"]
+    assert len(_store(tmp_path)) == 70
@@ -0,0 +1,211 @@
+"""
+test_pdf_loader.py
+
+Why:
+-----
+The auto engine trusts pypdf unless a page looks garbled; the heuristic
+must flag empty pages, unmapped glyphs, symbol soup and lost spacing
+without flagging ordinary text, and only the flagged pages may go to
+pdfplumber (counted in stats["fallbacks"]), in page order.
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pypdf")
+pytest.importorskip("pdfplumber")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from loguru import logger
+
+from app.services import pdf_loader
+from app.services.pdf_loader import (
+    _extract_page_range,
+    _looks_garbled,
+    _normalize_text,
+    iter_pdf_pages,
+)
+
+PROSE = (
+    "The committee reviewed the annual budget and approved the proposal "
+    "for new laboratory equipment, subject to a final audit in March."
+)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "(cid:72)(cid:101)(cid:108) report",
+        PROSE + " \ufffd\ufffd\ufffd",
+        "|| -- ** ## .. ;; :: ~~ ^^ %% && @@ " * 4,
+        "Thecommitteereviewedtheannualbudgetandapprovedtheproposal" * 5,
+    ],
+    ids=["empty", "cid", "replacement", "symbols", "glued"],
+)
+def test_garbled_text_is_flagged(text):
+    assert _looks_garbled(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        PROSE,
+        PROSE * 20,
+        "Table 3: 12.5% 18.0% 22.1% (n = 240)",
+        PROSE + " caf\ufffd",
+        "Thecommitteereviewedthebudget",  # too short to judge spacing
+    ],
+    ids=["prose", "long", "numbers", "one-replacement", "short-glued"],
+)
+def test_ordinary_text_is_kept(text):
+    assert not _looks_garbled(text)
+
+
+def test_sample_pdf_needs_no_fallback():
+    pages, _ = _extract_page_range(
+        os.path.join(PROJECT_ROOT, "tests", "sample.pdf"), 0, None, "pypdf"
+    )
+    assert pages
+    assert not any(_looks_garbled(p["text"]) for p in pages)
+
+
+class _Page:
+    def __init__(self, text, log=None, idx=None):
+        self.text, self.log, self.idx = text, log, idx
+
+    def extract_text(self):
+        if isinstance(self.text, Exception):
+            raise self.text
+        if self.log is not None:
+            self.log.append(self.idx)
+        return self.text
+
+    def flush_cache(self):
+        pass
+
+
+@pytest.fixture
+def fake_pdf(monkeypatch, tmp_path):
+    """
+    pypdf returns `fast` per page; pdfplumber returns "plumber page N".
+    Records files opened and pages pdfplumber extracted.
+    """
+
+    state = {"fast": [], "opened": [], "plumbed": [], "reader_error": None}
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"%PDF-1.4")
+
+    class Reader:
+        def __init__(self, file_path):
+            state["opened"].append("pypdf")
+            if state["reader_error"] is not None:
+                raise state["reader_error"]
+            self.pages = [_Page(text) for text in state["fast"]]
+
+    class Plumber:
+        def __init__(self):
+            state["opened"].append("pdfplumber")
+            self.pages = [
+                _Page(f"plumber page {i + 1}", state["plumbed"], i)
+                for i in range(len(state["fast"]))
+            ]
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(pdf_loader, "PdfReader", Reader)
+    monkeypatch.setattr(
+        pdf_loader.pdfplumber, "open", lambda file_path: Plumber()
+    )
+    state["path"] = str(path)
+    return state
+
+
+def test_only_garbled_pages_fall_back(fake_pdf):
+    fake_pdf["fast"] = [
+        PROSE,
+        "",
+        "(cid:3)(cid:4)(cid:5)",
+        ValueError("bad content stream"),
+        PROSE.upper(),
+    ]
+
+    pages, stats = _extract_page_range(fake_pdf["path"], 0, None, "auto")
+
+    assert [p["page_number"] for p in pages] == [1, 2, 3, 4, 5]
+    assert pages[0]["text"] == _normalize_text(PROSE)
+    assert [p["text"] for p in pages[1:4]] == [
+        "plumber page 2",
+        "plumber page 3",
+        "plumber page 4",
+    ]
+    assert pages[4]["text"] == PROSE.upper()
+    assert pages[0]["source_file"] == "doc.pdf"
+
+    assert fake_pdf["plumbed"] == [1, 2, 3]
+    assert stats["fallbacks"] == 3
+
+
+def test_clean_pages_never_open_pdfplumber(fake_pdf):
+    fake_pdf["fast"] = [PROSE, PROSE]
+
+    pages, stats = _extract_page_range(fake_pdf["path"], 0, None, "auto")
+
+    assert len(pages) == 2
+    assert fake_pdf["opened"] == ["pypdf"]
+    assert stats["fallbacks"] == 0
+    assert stats["pdfplumber_s"] == 0.0
+
+
+def test_unreadable_for_pypdf_uses_pdfplumber(fake_pdf):
+    fake_pdf["fast"] = [PROSE, PROSE, PROSE]
+    fake_pdf["reader_error"] = ValueError("broken xref")
+
+    pages, _ = _extract_page_range(fake_pdf["path"], 0, 3, "auto")
+    assert [p["text"] for p in pages] == [
+        "plumber page 1",
+        "plumber page 2",
+        "plumber page 3",
+    ]
+
+    # The pypdf engine never falls back
+    with pytest.raises(ValueError):
+        _extract_page_range(fake_pdf["path"], 0, 3, "pypdf")
+
+
+def test_pypdf_engine_keeps_garbled_pages(fake_pdf):
+    fake_pdf["fast"] = [PROSE, ""]
+
+    pages, stats = _extract_page_range(fake_pdf["path"], 0, None, "pypdf")
+
+    assert [p["text"] for p in pages] == [_normalize_text(PROSE), ""]
+    assert "pdfplumber" not in fake_pdf["opened"]
+    assert stats["fallbacks"] == 0
+
+
+def test_serial_ranges_share_one_open_file(fake_pdf):
+    fake_pdf["fast"] = [PROSE, "", PROSE, "(cid:1)", PROSE]
+    messages = []
+    sink = logger.add(messages.append, level="INFO")
+    try:
+        pages = list(
+            iter_pdf_pages(
+                fake_pdf["path"], workers=1, pages_per_task=2, engine="auto"
+            )
+        )
+    finally:
+        logger.remove(sink)
+
+    assert [p["page_number"] for p in pages] == [1, 2, 3, 4, 5]
+    assert [p["text"] for p in pages if p["text"].startswith("plumber")] == [
+        "plumber page 2",
+        "plumber page 4",
+    ]
+    # Three page ranges, each file handle opened once
+    assert fake_pdf["opened"] == ["pypdf", "pdfplumber"]
+    assert any("fallbacks=2" in str(m) for m in messages)
@@ -0,0 +1,230 @@
+"""
+test_query_rewriter.py
+
+Why:
+-----
+Standalone follow-ups must skip the rewrite LLM call, while anaphoric or
+elliptical ones must still be rewritten; speculative retrieval must only
+be reused when the rewrite left the question unchanged, and is dropped
+(never leaking a worker or an unretrieved error) otherwise.
+"""
+
+import asyncio
+import gc
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from langchain_core.messages import AIMessage
+
+from app.services import query_rewriter, rag_pipeline
+
+HISTORY = [
+    {"role": "user", "content": "What does the contract say about payment?"},
+    {"role": "assistant", "content": "Payment is due in 30 days [Source 1]."},
+]
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "What is the invoice total for March 2024?",
+        "Which certifications does the vendor hold?",
+        "List the termination clauses of the agreement",
+    ],
+)
+def test_standalone_questions(question):
+    assert query_rewriter.is_standalone(question)
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "What about its price?",
+        "Why?",
+        "And the second vendor?",
+        "How long do they have to pay it?",
+        "Explain the clause mentioned above",
+        "tell me more",
+    ],
+)
+def test_follow_ups_need_rewrite(question):
+    assert not query_rewriter.is_standalone(question)
+
+
+class _FakeLLM:
+    def __init__(self, reply: str, delay: float = 0.0):
+        self.reply = reply
+        self.delay = delay
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return AIMessage(content=self.reply)
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return AIMessage(content=self.reply)
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    fresh = query_rewriter.RewriteStats()
+    monkeypatch.setattr(query_rewriter, "rewrite_stats", fresh)
+    monkeypatch.setattr(rag_pipeline, "rewrite_stats", fresh)
+    return fresh
+
+
+def test_bypass_skips_llm_and_is_recorded(monkeypatch, stats):
+    llm = _FakeLLM("What is the payment term of the contract?")
+    monkeypatch.setattr(query_rewriter, "get_llm", lambda: llm)
+
+    question = "What is the invoice total for March 2024?"
+    assert query_rewriter.rewrite_query(HISTORY, question) == question
+    assert llm.calls == 0
+
+    rewritten = query_rewriter.rewrite_query(HISTORY, "What about its term?")
+    assert rewritten == llm.reply
+    assert llm.calls == 1
+
+    snapshot = stats.stats()
+    assert snapshot["bypassed"] == 1
+    assert snapshot["rewritten"] == 1
+    assert snapshot["bypass_rate"] == 0.5
+
+
+def _speculate(monkeypatch, reply):
+    searched = []
+
+    def fake_retrieve(session_id, query, *args, **kwargs):
+        searched.append(query)
+        return [{"text": query}]
+
+    monkeypatch.setattr(rag_pipeline, "QUERY_REWRITE_SPECULATIVE", True)
+    monkeypatch.setattr(rag_pipeline, "retrieve", fake_retrieve)
+    monkeypatch.setattr(
+        query_rewriter, "get_llm", lambda: _FakeLLM(reply, delay=0.05)
+    )
+    monkeypatch.setattr(
+        rag_pipeline.memory, "get_history", lambda session_id: HISTORY
+    )
+
+    async def turn():
+        query, speculative = await rag_pipeline._rewrite(
+            "s1", "And why?", [], None, None
+        )
+        candidates = await rag_pipeline._retrieve_async(
+            "s1", query, [], None, None, speculative
+        )
+        return query, candidates
+
+    query, candidates = asyncio.run(turn())
+    return query, candidates, searched
+
+
+def test_speculative_hit_reuses_raw_retrieval(monkeypatch, stats):
+    query, candidates, searched = _speculate(monkeypatch, "and why")
+
+    assert query == "And why?"
+    assert searched == ["And why?"]
+    assert candidates == [{"text": "And why?"}]
+    assert stats.stats()["speculative_hits"] == 1
+    assert stats.stats()["speculative_saved_ms"] > 0
+
+
+def test_speculative_miss_retrieves_rewritten_query(monkeypatch, stats):
+    reply = "Why is payment due in 30 days?"
+    query, candidates, searched = _speculate(monkeypatch, reply)
+
+    assert query == reply
+    assert searched == ["And why?", reply]
+    assert candidates == [{"text": reply}]
+    assert stats.stats()["speculative"] == 1
+    assert stats.stats()["speculative_hits"] == 0
+
+
+def test_speculative_miss_cancels_queued_search(monkeypatch, stats):
+    searched = []
+    gate = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    monkeypatch.setattr(rag_pipeline, "_executor", executor)
+    monkeypatch.setattr(rag_pipeline, "QUERY_REWRITE_SPECULATIVE", True)
+    monkeypatch.setattr(
+        rag_pipeline,
+        "retrieve",
+        lambda session_id, query, *args: searched.append(query) or [],
+    )
+    reply = "Why is payment due in 30 days?"
+    monkeypatch.setattr(
+        query_rewriter, "get_llm", lambda: _FakeLLM(reply, delay=0.05)
+    )
+    monkeypatch.setattr(
+        rag_pipeline.memory, "get_history", lambda session_id: HISTORY
+    )
+
+    async def turn():
+        # The only worker is busy: the speculative search stays queued
+        executor.submit(gate.wait, 5)
+        query, speculative = await rag_pipeline._rewrite(
+            "s1", "And why?", [], None, None
+        )
+        await asyncio.sleep(0.01)
+        gate.set()
+        await rag_pipeline._retrieve_async(
+            "s1", query, [], None, None, speculative
+        )
+        return query, speculative
+
+    query, speculative = asyncio.run(turn())
+    executor.shutdown(wait=True)
+
+    assert query == reply
+    assert speculative is None
+    assert searched == [reply]
+
+
+def test_failed_speculative_search_is_not_left_unretrieved(monkeypatch, stats):
+    reply = "Why is payment due in 30 days?"
+    unhandled = []
+
+    def fake_retrieve(session_id, query, *args, **kwargs):
+        if query != reply:
+            raise RuntimeError("retriever build failed")
+        return [{"text": query}]
+
+    monkeypatch.setattr(rag_pipeline, "QUERY_REWRITE_SPECULATIVE", True)
+    monkeypatch.setattr(rag_pipeline, "retrieve", fake_retrieve)
+    monkeypatch.setattr(
+        query_rewriter, "get_llm", lambda: _FakeLLM(reply, delay=0.05)
+    )
+    monkeypatch.setattr(
+        rag_pipeline.memory, "get_history", lambda session_id: HISTORY
+    )
+
+    async def turn():
+        asyncio.get_running_loop().set_exception_handler(
+            lambda loop, context: unhandled.append(context)
+        )
+        query, speculative = await rag_pipeline._rewrite(
+            "s1", "And why?", [], None, None
+        )
+        candidates = await rag_pipeline._retrieve_async(
+            "s1", query, [], None, None, speculative
+        )
+        # Let the dropped search finish, then collect it
+        await asyncio.sleep(0.05)
+        gc.collect()
+        return candidates
+
+    assert asyncio.run(turn()) == [{"text": reply}]
+    assert unhandled == []
@@ -0,0 +1,136 @@
+"""
+test_retriever.py
+
+Why:
+-----
+Hybrid fusion decides which chunks reach the prompt: rrf and weighted
+fusion must both rank agreement between BM25 and dense search first,
+weighted fusion must not invert all-negative cosine scores, and a
+weight of 0 must switch that side off entirely.
+"""
+
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.services import retriever as retriever_module
+from app.services.retriever import HybridRetriever, _rrf, _weighted_scores
+
+CHUNKS = [
+    {"text": "apple banana", "source_file": "a.pdf", "chunk_id": "a.pdf_p1_c0"},
+    {"text": "apple apple cherry", "source_file": "a.pdf", "chunk_id": "a.pdf_p1_c1"},
+    {"text": "dates figs", "source_file": "b.pdf", "chunk_id": "b.pdf_p1_c0"},
+    {"text": "grape melon", "source_file": "b.pdf", "chunk_id": "b.pdf_p1_c1"},
+    # Filler, so "apple" is rare enough for a positive BM25 idf
+    {"text": "kiwi lemon", "source_file": "c.pdf", "chunk_id": "c.pdf_p1_c0"},
+    {"text": "mango olive", "source_file": "c.pdf", "chunk_id": "c.pdf_p1_c1"},
+]
+
+VECTORS = np.eye(len(CHUNKS), dtype=np.float32)
+
+
+@pytest.fixture
+def query_vector(monkeypatch):
+    """
+    Sets the embedding returned for the query; records embed calls.
+    """
+
+    state = {"vector": [0.0, 0.6, 0.8, 0.0, 0.0, 0.0], "calls": 0}
+
+    def embed(texts, priority=None):
+        state["calls"] += 1
+        return [state["vector"] for _ in texts]
+
+    monkeypatch.setattr(retriever_module, "embed_texts", embed)
+    return state
+
+
+def _ids(results):
+    return [r["metadata"]["chunk_id"] for r in results]
+
+
+def test_rrf_sums_weighted_reciprocal_ranks():
+    fused = _rrf([(np.array([1, 0]), 1.0), (np.array([0, 2]), 2.0)], k=60)
+
+    assert fused[0] == pytest.approx(1 / 62 + 2 / 61)
+    assert fused[1] == pytest.approx(1 / 61)
+    assert fused[2] == pytest.approx(2 / 62)
+
+
+def test_weighted_scores_keep_order_of_negative_scores():
+    fused = _weighted_scores(
+        [(np.array([3, 1, 2]), np.array([-0.1, -0.4, -0.9]), 1.0)]
+    )
+
+    assert sorted(fused, key=fused.get, reverse=True) == [3, 1, 2]
+    assert fused[3] == pytest.approx(1.0)
+    assert fused[2] == pytest.approx(0.0)
+
+    # A single (or all-equal) score scales to 1, not a division by 0
+    assert _weighted_scores([(np.array([5]), np.array([-2.0]), 0.5)]) == {5: 0.5}
+
+
+@pytest.mark.parametrize("fusion", ["rrf", "weighted"])
+def test_fusion_ranks_agreement_first(query_vector, fusion):
+    retriever = HybridRetriever(CHUNKS, VECTORS)
+    results = retriever.search("apple", top_k=4, fusion=fusion)
+
+    # BM25: c1 > c0; dense: c2 > c1 -> c1 is the consensus best
+    assert _ids(results)[0] == "a.pdf_p1_c1"
+    assert query_vector["calls"] == 1
+
+
+def test_weighted_fusion_with_negative_cosine(query_vector):
+    query_vector["vector"] = [-1.0, -0.2, -0.5, -0.9, -1.5, -1.6]
+    retriever = HybridRetriever(CHUNKS, VECTORS)
+
+    results = retriever.search(
+        "apple", top_k=4, fusion="weighted", sparse_weight=0
+    )
+    # Least negative cosine first (c1: -0.2, c2: -0.5, c3: -0.9, c0: -1)
+    assert _ids(results) == [
+        "a.pdf_p1_c1",
+        "b.pdf_p1_c0",
+        "b.pdf_p1_c1",
+        "a.pdf_p1_c0",
+    ]
+
+
+def test_zero_dense_weight_is_bm25_only(query_vector):
+    retriever = HybridRetriever(CHUNKS, VECTORS)
+    results = retriever.search("apple", top_k=4, dense_weight=0)
+
+    assert query_vector["calls"] == 0
+    assert _ids(results) == ["a.pdf_p1_c1", "a.pdf_p1_c0"]
+    assert results[0]["score"] > results[1]["score"] > 0
+
+
+@pytest.mark.parametrize("fusion", ["rrf", "weighted"])
+def test_zero_sparse_weight_is_dense_only(query_vector, fusion):
+    retriever = HybridRetriever(CHUNKS, VECTORS)
+    results = retriever.search("apple", top_k=2, fusion=fusion, sparse_weight=0)
+
+    # Dense ranking alone: c2 (0.8) > c1 (0.6), although c2 has no "apple"
+    assert _ids(results) == ["b.pdf_p1_c0", "a.pdf_p1_c1"]
+
+
+def test_without_vectors_falls_back_to_bm25(query_vector):
+    retriever = HybridRetriever(CHUNKS)
+    results = retriever.search("apple", top_k=4, sparse_weight=0)
+
+    assert query_vector["calls"] == 0
+    assert _ids(results) == ["a.pdf_p1_c1", "a.pdf_p1_c0"]
+
+
+def test_documents_mask_both_rankings(query_vector):
+    retriever = HybridRetriever(CHUNKS, VECTORS)
+
+    results = retriever.search("apple", top_k=4, documents=["b.pdf"])
+    assert {r["metadata"]["source_file"] for r in results} == {"b.pdf"}
+    assert retriever.search("apple", documents=["missing.pdf"]) == []
@@ -0,0 +1,198 @@
+"""
+test_retriever_cache.py
+
+Why:
+-----
+A /chat turn should reuse the session's fitted retriever: unchanged
+chunks must hit, a changed chunk set must refit, a refit must see the
+chunks and vectors of one moment while uploads append to the session,
+chunks appended to the session must be absorbed without a refit, clear_session must drop the
+session's retrievers, and the cache must stay within its bounds.
+"""
+
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from app.state import document_store as document_store_module
+from app.state.document_store import DocumentStore
+from app.state.retriever_cache import RetrieverCache, fingerprint_chunks
+
+
+def _chunks(source_file, words):
+    return [
+        {
+            "text": f"{word} filler text",
+            "page_number": 1,
+            "source_file": source_file,
+            "chunk_id": f"{source_file}_p1_c{i}",
+        }
+        for i, word in enumerate(words)
+    ]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    fresh = RetrieverCache(max_entries=8, max_bytes=10**9)
+    monkeypatch.setattr(document_store_module, "retriever_cache", fresh)
+    return fresh
+
+
+def _texts(results):
+    return [r["metadata"]["text"].split()[0] for r in results]
+
+
+def test_same_fingerprint_hits(cache):
+    chunks = _chunks("a.pdf", ["alpha", "beta", "gamma"])
+    loads = []
+
+    fingerprint = fingerprint_chunks(chunks)
+
+    def load():
+        loads.append(1)
+        return chunks, None, fingerprint
+
+    first = cache.get_or_build("s1", chunks, fingerprint, None, load)
+    again = cache.get_or_build("s1", chunks, fingerprint, None, load)
+
+    assert again is first
+    assert loads == [1]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_changed_fingerprint_rebuilds(cache):
+    chunks = _chunks("a.pdf", ["alpha", "beta"])
+    first = cache.get_or_build("s1", chunks, fingerprint_chunks(chunks))
+
+    changed = _chunks("b.pdf", ["gamma", "delta", "kappa", "sigma"])
+    rebuilt = cache.get_or_build("s1", changed, fingerprint_chunks(changed))
+
+    assert rebuilt is not first
+    assert _texts(rebuilt.search("gamma", top_k=1)) == ["gamma"]
+    # Document subsets of one chunk set are cached separately
+    subset = cache.get_or_build(
+        "s1", changed[:1], fingerprint_chunks(changed), ["b.pdf"]
+    )
+    assert subset is not rebuilt
+    assert cache.stats()["misses"] == 3
+
+
+def test_appended_chunks_are_absorbed(cache):
+    store = DocumentStore()
+    a = _chunks("a.pdf", ["alpha", "beta", "gamma"])
+    store.add_chunks("s1", a)
+
+    chunks = store.get_all_chunks("s1")
+    retriever = cache.get_or_build("s1", chunks, store.fingerprint("s1"))
+    only_a = cache.get_or_build(
+        "s1", chunks, store.fingerprint("s1"), ["a.pdf"]
+    )
+
+    store.add_chunks("s1", _chunks("b.pdf", ["zeta", "theta", "iota"]))
+    fingerprint = store.fingerprint("s1")
+    assert fingerprint == fingerprint_chunks(store.get_all_chunks("s1"))
+
+    # Re-keyed under the new fingerprint: no refit
+    assert cache.get_or_build("s1", chunks, fingerprint) is retriever
+    assert _texts(retriever.search("zeta", top_k=1)) == ["zeta"]
+
+    # A document subset only absorbs chunks of its documents
+    assert cache.get_or_build("s1", chunks, fingerprint, ["a.pdf"]) is only_a
+    assert "zeta" not in _texts(only_a.search("zeta", top_k=6))
+    assert cache.stats()["misses"] == 2
+
+
+def test_fits_a_snapshot_of_a_growing_session(cache):
+    store = DocumentStore()
+    store.add_chunks(
+        "s1", _chunks("a.pdf", ["alpha", "beta", "gamma"]), np.eye(3)
+    )
+    table, fingerprint = store.get_all_chunks("s1"), store.fingerprint("s1")
+
+    def load():
+        snapshot = store.snapshot("s1", table)
+        # An ingest job attaching a document while the retriever is fitted
+        store.add_chunks(
+            "s1", _chunks("b.pdf", ["zeta", "theta"]), np.eye(3)[:2]
+        )
+        return snapshot
+
+    retriever = cache.get_or_build("s1", table, fingerprint, load=load)
+    assert len(table) == 5
+    assert len(retriever.chunks) == 3
+    assert retriever.dense is not None
+
+    # Key read before the append: fitted from the newer snapshot, but
+    # not cached under the stale fingerprint
+    store.add_chunks("s2", _chunks("a.pdf", ["alpha", "beta"]))
+    stale = store.fingerprint("s2")
+    store.add_chunks("s2", _chunks("b.pdf", ["zeta"]))
+    table = store.get_all_chunks("s2")
+    fitted = cache.get_or_build(
+        "s2", table, stale, load=lambda: store.snapshot("s2", table)
+    )
+    assert len(fitted.chunks) == 3
+    assert cache.stats()["entries"] == 1
+
+
+def test_absorb_drops_retrievers_of_another_fingerprint(cache):
+    chunks = _chunks("a.pdf", ["alpha", "beta"])
+    cache.get_or_build("s1", chunks, "old")
+
+    cache.absorb("s1", "current", "next", _chunks("b.pdf", ["gamma"]))
+
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["estimated_bytes"] == 0
+
+
+def test_clear_session_invalidates(cache):
+    store = DocumentStore()
+    for session_id in ("s1", "s2"):
+        store.add_chunks(session_id, _chunks("a.pdf", ["alpha", "beta"]))
+        cache.get_or_build(
+            session_id,
+            store.get_all_chunks(session_id),
+            store.fingerprint(session_id),
+        )
+
+    store.clear_session("s1")
+
+    assert cache.stats()["entries"] == 1
+    store.add_chunks("s1", _chunks("a.pdf", ["alpha", "beta"]))
+    cache.get_or_build(
+        "s1", store.get_all_chunks("s1"), store.fingerprint("s1")
+    )
+    assert cache.stats()["misses"] == 3
+
+
+def test_eviction_is_lru_and_bounded():
+    cache = RetrieverCache(max_entries=2, max_bytes=10**9)
+    sessions = {
+        s: _chunks(f"{s}.pdf", ["alpha", "beta"]) for s in ("s1", "s2", "s3")
+    }
+
+    cache.get_or_build("s1", sessions["s1"], "f1")
+    cache.get_or_build("s2", sessions["s2"], "f2")
+    cache.get_or_build("s1", sessions["s1"], "f1")  # s1 most recent
+    cache.get_or_build("s3", sessions["s3"], "f3")  # evicts s2
+
+    assert cache.stats()["evictions"] == 1
+    cache.get_or_build("s1", sessions["s1"], "f1")
+    assert cache.stats()["hits"] == 2
+    cache.get_or_build("s2", sessions["s2"], "f2")
+    assert cache.stats()["misses"] == 4
+
+    # Byte budget: the newest entry is kept even if it alone exceeds it
+    small = RetrieverCache(max_entries=8, max_bytes=1)
+    small.get_or_build("s1", sessions["s1"], "f1")
+    small.get_or_build("s2", sessions["s2"], "f2")
+    assert small.stats()["entries"] == 1
+    assert small.get_or_build("s2", sessions["s2"], "f2") is not None
+    assert small.stats()["hits"] == 1
@@ -0,0 +1,106 @@
+"""
+test_streaming.py
+
+Why:
+-----
+Streaming endpoints must forward LLM tokens as they arrive and always
+end with a structured event: citations on success, an error event if
+generation fails after the response has started.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("langchain_core")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from langchain_core.messages import AIMessageChunk
+
+from app.services import answer_generator
+from app.utils.helpers import sse_event, sse_response
+
+EVIDENCE = [{"text": "The invoice total is 4,250 EUR."}]
+
+
+class _FakeLLM:
+    def __init__(self, tokens, fail_after=None):
+        self.tokens = tokens
+        self.fail_after = fail_after
+
+    async def astream(self, messages):
+        for i, token in enumerate(self.tokens):
+            if i == self.fail_after:
+                raise RuntimeError("connection reset")
+            yield AIMessageChunk(content=token)
+
+
+def _collect(iterator):
+    async def run():
+        return [item async for item in iterator]
+
+    return asyncio.run(run())
+
+
+def _parse(frames):
+    events = []
+    for frame in "".join(frames).strip().split("\n\n"):
+        event, data = frame.split("\n")
+        events.append(
+            (event.removeprefix("event: "), json.loads(data.removeprefix("data: ")))
+        )
+    return events
+
+
+def test_stream_answer_yields_tokens(monkeypatch):
+    llm = _FakeLLM(["The total ", "", "is 4,250 EUR ", "[Source 1]."])
+    monkeypatch.setattr(answer_generator, "get_llm", lambda: llm)
+
+    tokens = _collect(answer_generator.stream_answer("total?", EVIDENCE))
+
+    assert tokens == ["The total ", "is 4,250 EUR ", "[Source 1]."]
+
+
+def test_stream_answer_reports_failure_in_stream(monkeypatch):
+    llm = _FakeLLM(["The total ", "is"], fail_after=1)
+    monkeypatch.setattr(answer_generator, "get_llm", lambda: llm)
+
+    tokens = _collect(answer_generator.stream_answer("total?", EVIDENCE))
+
+    assert tokens[0] == "The total "
+    assert tokens[-1].strip() == answer_generator.LLM_FAILED
+
+
+def test_stream_answer_without_evidence():
+    tokens = _collect(answer_generator.stream_answer("total?", []))
+    assert tokens == [answer_generator.NO_CONTENT]
+
+
+def test_sse_response_frames_events_and_errors():
+    async def events():
+        yield "token", {"text": "a"}
+        yield "citations", {"citations": []}
+
+    async def failing():
+        yield "token", {"text": "a"}
+        raise RuntimeError("boom")
+
+    ok = sse_response(events())
+    assert ok.media_type == "text/event-stream"
+    assert _parse(_collect(ok.body_iterator)) == [
+        ("token", {"text": "a"}),
+        ("citations", {"citations": []}),
+    ]
+
+    failed = _parse(_collect(sse_response(failing(), "Failed").body_iterator))
+    assert failed[-1] == ("error", {"detail": "Failed"})
+
+    assert sse_event("token", {"text": "x"}) == (
+        'event: token\ndata: {"text": "x"}\n\n'
+    )
@@ -0,0 +1,228 @@
+"""
+test_summarizer.py
+
+Why:
+-----
+Map-reduce summaries must cover every section of a document, respect
+the reduce fan-in, and be computed once per document: repeat requests
+and multi-document sessions reuse the cached per-document summaries,
+found by the upload hash the session recorded for each document, while
+citations always name the requesting session's source files.
+"""
+
+import asyncio
+import os
+import re
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from app.services import summarizer as summarizer_module
+from app.services.answer_generator import LLM_FAILED
+from app.services.summarizer import DocumentSummarizer, build_sections
+from app.state.document_registry import DocumentRegistry
+from app.state.document_store import DocumentStore
+from app.state.summary_cache import SummaryCache
+
+
+class _FakeLLM:
+    """
+    Echoes the [Source X] labels of its context, so citations can be
+    followed through every reduce level.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def invoke(self, messages):
+        context = messages[0].content.split("CONTEXT:\n", 1)[1]
+        with self._lock:
+            self.calls.append(context)
+        labels = sorted(set(re.findall(r"\[Source \d+\]", context)))
+        return AIMessage(content="Summary " + " ".join(labels))
+
+    async def astream(self, messages):
+        for word in self.invoke(messages).content.split(" "):
+            yield AIMessageChunk(content=word + " ")
+
+
+def _document(name, pages, chunks_per_page=2, chars=100):
+    return [
+        {
+            "text": f"{name} page {page} " + "x" * chars,
+            "page_number": page,
+            "source_file": name,
+            "chunk_id": f"{name}_p{page}_c{c}",
+        }
+        for page in range(1, pages + 1)
+        for c in range(chunks_per_page)
+    ]
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = _FakeLLM()
+    monkeypatch.setattr(summarizer_module, "get_llm", lambda: fake)
+    monkeypatch.setattr(summarizer_module, "summary_cache", SummaryCache())
+    return fake
+
+
+def test_sections_keep_pages_together():
+    chunks = _document("a.pdf", pages=6)  # ~230 chars per page
+    sections = build_sections(chunks, max_chars=500)
+
+    assert [c for s in sections for c in s] == chunks
+    for section in sections:
+        assert len({c["page_number"] for c in section}) == 2
+
+    # A page longer than a section is split by chunk
+    long_page = build_sections(_document("b.pdf", 1, 4, 300), max_chars=500)
+    assert [len(s) for s in long_page] == [1, 1, 1, 1]
+
+
+def test_map_reduce_covers_every_section(llm):
+    summarizer = DocumentSummarizer(concurrency=3, section_chars=250, fanin=3)
+    chunks = _document("a.pdf", pages=10)
+
+    text = summarizer.summarize_document(chunks, key="doc-a").result()
+
+    # 10 sections -> 10 map calls, 4 then 2 merges (fan-in 3), 1 final
+    assert len(llm.calls) == 17
+    assert text.count("[Source") == 10
+
+    # Cached: no more LLM calls
+    summary = asyncio.run(summarizer.summarize_session(chunks, {"a.pdf": "doc-a"}))
+    assert summary["summary"] == text
+    assert len(summary["citations"]) == 10
+    assert summary["citations"][3]["page_number"] == 4
+    assert len(llm.calls) == 17
+
+
+def test_sessions_compose_cached_document_summaries(llm):
+    summarizer = DocumentSummarizer(concurrency=2, section_chars=10_000)
+    a, b = _document("a.pdf", 2), _document("b.pdf", 3)
+
+    summarizer.summarize_document(a).result()
+    calls_before = len(llm.calls)
+
+    summary = asyncio.run(summarizer.summarize_session(a + b))
+
+    # b.pdf (one short section) + the composition
+    assert len(llm.calls) == calls_before + 2
+    assert len(summary["citations"]) == 2
+    assert "[Source 1]" in summary["summary"]
+    assert "[Source 2]" in summary["summary"]
+
+    asyncio.run(summarizer.summarize_session(b + a))
+    assert len(llm.calls) == calls_before + 2
+
+
+def test_session_summary_uses_upload_hashes(llm):
+    summarizer = DocumentSummarizer(concurrency=2, section_chars=10_000)
+    store = DocumentStore()
+    registry = DocumentRegistry(max_documents=1)
+    a, b = _document("a.pdf", 2), _document("b.pdf", 3)
+
+    # As ingestion does: register, attach with the hash, precompute
+    for doc_hash, chunks in (("hash-a", a), ("hash-b", b)):
+        registered = registry.register(
+            doc_hash, chunks[0]["source_file"], chunks, None
+        )
+        store.add_chunks("s1", registered, doc_hash=doc_hash)
+        summarizer.summarize_document(registered, doc_hash).result()
+    calls_before = len(llm.calls)
+
+    # a.pdf left the registry; its session still knows the hash
+    assert registry.get("hash-a") is None
+    hashes = store.document_hashes("s1")
+    assert hashes == {"a.pdf": "hash-a", "b.pdf": "hash-b"}
+
+    asyncio.run(summarizer.summarize_session(store.get_all_chunks("s1"), hashes))
+    # Only the composition: no per-document summary was recomputed
+    assert len(llm.calls) == calls_before + 1
+
+    store.clear_session("s1")
+    assert store.document_hashes("s1") == {}
+
+
+def test_cached_summary_cites_the_requesting_session(llm):
+    summarizer = DocumentSummarizer(concurrency=2, section_chars=250)
+    first = _document("first-report.pdf", 3)
+    # Same bytes uploaded again under a new source file
+    second = [dict(c, source_file="second-report.pdf") for c in first]
+
+    one = asyncio.run(summarizer.summarize_session(first, {"first-report.pdf": "h"}))
+    calls_before = len(llm.calls)
+    two = asyncio.run(
+        summarizer.summarize_session(second, {"second-report.pdf": "h"})
+    )
+
+    assert len(llm.calls) == calls_before
+    assert two["summary"] == one["summary"]
+    assert {c["source_file"] for c in one["citations"]} == {"first-report.pdf"}
+    assert {c["source_file"] for c in two["citations"]} == {"second-report.pdf"}
+    assert [c["page_number"] for c in two["citations"]] == [
+        c["page_number"] for c in one["citations"]
+    ]
+
+
+async def _collect(stream):
+    return [text async for text in stream]
+
+
+def test_stream_session_streams_the_final_reduce(llm):
+    summarizer = DocumentSummarizer(concurrency=2, section_chars=250, fanin=2)
+    chunks = _document("a.pdf", pages=4)
+    hashes = {"a.pdf": "doc-a"}
+
+    # Miss: the map and merge calls run first, the final call streams
+    deltas = asyncio.run(_collect(summarizer.stream_session(chunks, hashes)))
+    assert len(deltas) == 9
+    assert "".join(deltas).strip() == (
+        "Summary [Source 1] [Source 2] [Source 3] [Source 4]"
+    )
+    calls = len(llm.calls)
+
+    # Cached under the document key: one delta, no LLM call
+    cached = asyncio.run(_collect(summarizer.stream_session(chunks, hashes)))
+    assert cached == ["".join(deltas).strip()]
+    summary = asyncio.run(summarizer.summarize_session(chunks, hashes))
+    assert summary["summary"] == cached[0]
+    assert summarizer.session_citations(chunks, hashes) == summary["citations"]
+    assert len(llm.calls) == calls
+
+
+class _FailingLLM:
+    def invoke(self, messages):
+        raise RuntimeError("rate limited")
+
+    async def astream(self, messages):
+        raise RuntimeError("rate limited")
+        yield
+
+
+def test_llm_failure_falls_back_and_is_not_cached(llm, monkeypatch):
+    summarizer = DocumentSummarizer(concurrency=2, section_chars=10_000)
+    chunks = _document("a.pdf", 2)
+    hashes = {"a.pdf": "doc-a"}
+
+    monkeypatch.setattr(summarizer_module, "get_llm", lambda: _FailingLLM())
+    failed = asyncio.run(summarizer.summarize_session(chunks, hashes))
+    assert failed["summary"] == LLM_FAILED
+    assert len(failed["citations"]) == 1
+    streamed = asyncio.run(_collect(summarizer.stream_session(chunks, hashes)))
+    assert streamed == [LLM_FAILED]
+
+    # Nothing cached: the next request summarizes again
+    monkeypatch.setattr(summarizer_module, "get_llm", lambda: llm)
+    summary = asyncio.run(summarizer.summarize_session(chunks, hashes))
+    assert summary["summary"] == "Summary [Source 1]"
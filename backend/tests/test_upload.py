@@ -0,0 +1,137 @@
+"""
+test_upload.py
+
+Why:
+-----
+A waiting upload must report what actually happened to its job: every
+file failing is an error, a partial failure names the failed files and
+leaves them out of the result, and an upload superseded while still
+queued is a conflict rather than a server error.
+"""
+
+import asyncio
+import io
+import os
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("fastapi")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from fastapi import HTTPException, Response, UploadFile
+
+from app.api.routes import upload as upload_module
+from app.services import ingest_jobs as ingest_jobs_module
+from app.services.ingest_jobs import IngestJobManager
+from app.state.document_registry import DocumentRegistry
+from app.state.document_store import DocumentStore
+
+
+class _FakePipeline:
+    """
+    Stands in for stream_ingest_many: files named bad*.pdf fail, and
+    files named slow*.pdf wait for `release`.
+    """
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, file_paths, engine=None, progress=None, on_file_done=None):
+        for idx, path in enumerate(file_paths):
+            name = os.path.basename(path)
+            if "slow" in name:
+                self.started.set()
+                self.release.wait(timeout=5)
+            chunk = {
+                "text": f"{name} text",
+                "page_number": 1,
+                "source_file": name,
+                "chunk_id": f"{name}_p1_c0",
+            }
+            yield idx, [chunk], [[1.0, 0.0]]
+            on_file_done(idx, ValueError("broken PDF") if "bad" in name else None)
+
+
+class _FakeVectorStore:
+    def delete(self, ids):
+        pass
+
+
+@pytest.fixture
+def env(monkeypatch, tmp_path):
+    store, pipeline = DocumentStore(), _FakePipeline()
+
+    for module in (upload_module, ingest_jobs_module):
+        monkeypatch.setattr(module, "document_store", store)
+        monkeypatch.setattr(module, "document_registry", DocumentRegistry())
+    monkeypatch.setattr(upload_module, "ingest_jobs", IngestJobManager(workers=1))
+    monkeypatch.setattr(upload_module, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(ingest_jobs_module, "stream_ingest_many", pipeline)
+    monkeypatch.setattr(
+        ingest_jobs_module, "get_vector_store", lambda: _FakeVectorStore()
+    )
+    monkeypatch.setattr(ingest_jobs_module, "SUMMARY_ON_INGEST", False)
+    return store, pipeline
+
+
+def _upload(session_id, *names, wait=True):
+    uploads = [
+        UploadFile(file=io.BytesIO(name.encode()), filename=name)
+        for name in names
+    ]
+    return upload_module.upload_documents(
+        Response(), session_id, files=uploads, wait=wait
+    )
+
+
+def test_every_file_failing_is_an_error(env):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(_upload("s1", "bad-a.pdf", "bad-b.pdf"))
+
+    assert exc.value.status_code == 500
+    assert exc.value.detail == "2 of 2 files failed"
+
+
+def test_partial_failure_reports_failed_files(env):
+    store, _ = env
+
+    result = asyncio.run(_upload("s1", "good.pdf", "bad.pdf"))
+
+    assert result["message"] == "Some documents failed to index"
+    assert result["document_count"] == 1
+    assert result["files"][0].endswith("-good.pdf")
+    assert result["failed"] == [{"filename": "bad.pdf", "error": "broken PDF"}]
+    assert [c["source_file"] for c in store.get_all_chunks("s1")] == result["files"]
+
+
+def test_superseded_queued_upload_is_a_conflict(env):
+    store, pipeline = env
+
+    async def scenario():
+        # Occupies the single worker, so the next s1 job stays queued
+        busy = asyncio.ensure_future(_upload("other", "slow.pdf"))
+        await asyncio.get_running_loop().run_in_executor(
+            None, pipeline.started.wait, 5
+        )
+
+        first = asyncio.ensure_future(_upload("s1", "first.pdf"))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(_upload("s1", "second.pdf"))
+        await asyncio.sleep(0.05)
+
+        pipeline.release.set()
+        return await asyncio.gather(busy, first, second, return_exceptions=True)
+
+    busy, first, second = asyncio.run(scenario())
+
+    assert busy["document_count"] == 1
+    assert isinstance(first, HTTPException)
+    assert first.status_code == 409
+    assert second["files"][0].endswith("-second.pdf")
+    assert [c["source_file"] for c in store.get_all_chunks("s1")] == second["files"]
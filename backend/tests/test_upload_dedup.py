@@ -0,0 +1,168 @@
+"""
+test_upload_dedup.py
+
+Why:
+-----
+Byte-identical uploads must not be parsed, embedded or indexed again:
+a re-upload attaches the registered chunks and vectors, a file sent
+twice in one upload is attached once, and the registry stays bounded
+by evicting its least recently used documents.
+"""
+
+import asyncio
+import io
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("fastapi")
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from fastapi import Response, UploadFile
+
+from app.api.routes import upload as upload_module
+from app.services import ingest_jobs as ingest_jobs_module
+from app.services.ingest_jobs import IngestJobManager
+from app.state.document_registry import DocumentRegistry
+from app.state.document_store import DocumentStore
+
+
+def _chunks(source_file, count=3):
+    return [
+        {
+            "text": f"{source_file} chunk {c}",
+            "page_number": 1,
+            "source_file": source_file,
+            "chunk_id": f"{source_file}_p1_c{c}",
+        }
+        for c in range(count)
+    ]
+
+
+class _FakePipeline:
+    """
+    Stands in for stream_ingest_many; records every file it parses.
+    """
+
+    def __init__(self):
+        self.parsed = []
+
+    def __call__(self, file_paths, engine=None, progress=None, on_file_done=None):
+        for idx, path in enumerate(file_paths):
+            name = os.path.basename(path)
+            self.parsed.append(name)
+            chunks = _chunks(name)
+            vectors = [[float(idx), float(c)] for c in range(len(chunks))]
+            yield idx, chunks, vectors
+        for idx in range(len(file_paths)):
+            on_file_done(idx, None)
+
+
+class _FakeVectorStore:
+    def delete(self, ids):
+        pass
+
+
+@pytest.fixture
+def env(monkeypatch, tmp_path):
+    store, registry = DocumentStore(), DocumentRegistry()
+    pipeline = _FakePipeline()
+
+    for module in (upload_module, ingest_jobs_module):
+        monkeypatch.setattr(module, "document_store", store)
+        monkeypatch.setattr(module, "document_registry", registry)
+    monkeypatch.setattr(upload_module, "ingest_jobs", IngestJobManager(workers=1))
+    monkeypatch.setattr(upload_module, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(ingest_jobs_module, "stream_ingest_many", pipeline)
+    monkeypatch.setattr(
+        ingest_jobs_module, "get_vector_store", lambda: _FakeVectorStore()
+    )
+    monkeypatch.setattr(ingest_jobs_module, "SUMMARY_ON_INGEST", False)
+    return store, registry, pipeline, tmp_path
+
+
+def _upload(session_id, *files):
+    uploads = [
+        UploadFile(file=io.BytesIO(data), filename=name) for name, data in files
+    ]
+    return asyncio.run(
+        upload_module.upload_documents(Response(), session_id, files=uploads)
+    )
+
+
+def test_reupload_attaches_registered_document(env):
+    store, registry, pipeline, upload_dir = env
+
+    first = _upload("s1", ("report.pdf", b"%PDF-1 report"))
+    assert first["dedup_hits"] == 0
+    assert first["job"]["status"] == "completed"
+    assert len(pipeline.parsed) == 1
+
+    # Same bytes, new name, new session: no parsing, no new file on disk
+    second = _upload("s2", ("copy.pdf", b"%PDF-1 report"))
+    assert second["dedup_hits"] == 1
+    assert second["job"] is None
+    assert second["files"] == first["files"]
+    assert len(pipeline.parsed) == 1
+    assert os.listdir(upload_dir) == first["files"]
+
+    original, attached = store.get_all_chunks("s1"), store.get_all_chunks("s2")
+    assert [dict(c) for c in attached] == [dict(c) for c in original]
+    np.testing.assert_array_equal(
+        store.get_vectors("s2", attached), store.get_vectors("s1", original)
+    )
+    assert store.document_hashes("s2") == store.document_hashes("s1")
+    assert registry.stats()["hits"] == 1
+
+
+def test_same_file_twice_in_one_upload_is_attached_once(env):
+    store, registry, pipeline, upload_dir = env
+
+    # Not registered yet: ingested once
+    result = _upload(
+        "s1",
+        ("a.pdf", b"%PDF-1 a"),
+        ("b.pdf", b"%PDF-1 b"),
+        ("a2.pdf", b"%PDF-1 a"),
+    )
+    assert result["dedup_hits"] == 1
+    assert len(pipeline.parsed) == 2
+    assert len(store.get_all_chunks("s1")) == 6
+    assert len(os.listdir(upload_dir)) == 2
+
+    # Registered: attached once
+    result = _upload("s2", ("a.pdf", b"%PDF-1 a"), ("again.pdf", b"%PDF-1 a"))
+    assert result["dedup_hits"] == 2
+    assert result["job"] is None
+    assert len(store.get_all_chunks("s2")) == 3
+    assert len(pipeline.parsed) == 2
+
+
+def test_registry_evicts_least_recently_used():
+    registry = DocumentRegistry(max_documents=2)
+    vectors = [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]]
+
+    table = registry.register("hash-a", "a.pdf", _chunks("a.pdf"), vectors)
+    assert [dict(c) for c in table] == _chunks("a.pdf")
+    registry.register("hash-b", "b.pdf", _chunks("b.pdf"), None)
+
+    entry = registry.get("hash-a")  # a is now the most recent
+    assert entry["source_file"] == "a.pdf"
+    assert entry["chunks"] is table
+    assert entry["vectors"].dtype == np.float32
+    assert entry["vectors"].shape == (3, 2)
+
+    registry.register("hash-c", "c.pdf", _chunks("c.pdf"), None)
+
+    assert registry.get("hash-b") is None
+    assert registry.get("hash-a") is not None
+    assert registry.get("hash-c")["vectors"] is None
+
+    stats = registry.stats()
+    assert stats["documents"] == 2
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1